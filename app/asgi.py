@@ -20,14 +20,28 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+# Em produção, falha imediatamente se os estáticos do build estiverem ausentes ou
+# forem de outro build (a comparação com os fontes roda uma vez no deploy)
+from core.static_build import verify_static_build  # noqa: E402
+
+verify_static_build()
+
 # Import websocket routes AFTER Django is initialized
+from checkout.routing import websocket_urlpatterns as checkout_websocket_urlpatterns  # noqa: E402
 from dashboard.routing import websocket_urlpatterns  # noqa: E402
 
+# Scheduler apenas nos processos do servidor (não em comandos de gerenciamento)
+from reports.scheduler import start_scheduler  # noqa: E402
+
+start_scheduler()
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
-            AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+            AuthMiddlewareStack(
+                URLRouter(websocket_urlpatterns + checkout_websocket_urlpatterns)
+            )
         ),
     }
 )
@@ -99,14 +99,18 @@ else:
         "default": {
             "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
         },
+        # Nomes com hash do conteúdo e versões gzip/brotli, gerados no build da
+        # imagem (manage.py build_static)
         "staticfiles": {
-            "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
+            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
         },
     }
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ReplicaStickinessMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -154,6 +158,20 @@ else:
         }
     }
 
+# Réplica somente leitura (opcional) para relatórios, métricas do painel e catálogo.
+# Views marcadas com core.routers.use_replica leem dela; após uma escrita, o mesmo
+# navegador volta a ler do principal por REPLICA_STICKY_SECONDS. Sem réplica, tudo
+# usa o banco principal.
+DATABASE_REPLICA_URL = config("DATABASE_REPLICA_URL", default=None)
+if DATABASE_REPLICA_URL:
+    DATABASES["replica"] = dj_database_url.parse(
+        DATABASE_REPLICA_URL, conn_max_age=600, ssl_require=False
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=10, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -173,6 +191,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Autenticação (customers.backends)
+# Username ou CPF em uma consulta e um único hash de senha por tentativa.
+# Substitui o ModelBackend (mantém as permissões) também no login do dashboard.
+AUTHENTICATION_BACKENDS = ["customers.backends.UsernameOrCPFBackend"]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -204,6 +227,12 @@ COMPRESS_JS_FILTERS = [
 ]
 COMPRESS_ROOT = STATIC_ROOT
 COMPRESS_URL = STATIC_URL
+# Em produção os blocos {% compress %} são gerados no build da imagem
+# (manage.py build_static) e apenas lidos do manifest em runtime
+COMPRESS_OFFLINE = config("COMPRESS_OFFLINE", default=not DEBUG, cast=bool)
+# Identificador do build (ex.: SHA do commit), gravado no carimbo por build_static.
+# Se definido em runtime, os workers recusam estáticos de outro build
+STATIC_BUILD_ID = config("STATIC_BUILD_ID", default="")
 
 STATICFILES_FINDERS = [
     "django.contrib.staticfiles.finders.FileSystemFinder",
@@ -225,6 +254,17 @@ CALLMEBOT_API_URL = config("CALLMEBOT_API_URL", default=None)
 CALLMEBOT_API_KEY = config("CALLMEBOT_API_KEY", default=None)
 CALLMEBOT_PHONE_NUMBER = config("CALLMEBOT_PHONE_NUMBER", default=None)
 
+# Notificações do admin (services.digest)
+# Enviadas por uma thread do processo. Acima de NOTIFICATIONS_DIGEST_THRESHOLD eventos
+# por minuto (todos os workers) são agrupadas em um resumo a cada
+# NOTIFICATIONS_DIGEST_WINDOW segundos, para respeitar o limite do CallMeBot
+NOTIFICATIONS_DIGEST_THRESHOLD = config(
+    "NOTIFICATIONS_DIGEST_THRESHOLD", default=10, cast=int
+)
+NOTIFICATIONS_DIGEST_WINDOW = config(
+    "NOTIFICATIONS_DIGEST_WINDOW", default=60, cast=int
+)  # segundos
+
 # Authentication settings
 LOGIN_URL = "/dashboard/login/"
 LOGIN_REDIRECT_URL = "/dashboard/"
@@ -242,16 +282,20 @@ if DEBUG:
     # Cache simples em memória para desenvolvimento (não precisa de Redis)
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "BACKEND": "core.cache.InstrumentedLocMemCache",
             "LOCATION": "unique-snowflake",
             "TIMEOUT": 300,  # 5 min default
-        }
+        },
+        "sessions": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "sessions",
+        },
     }
 else:
     # Redis para produção
     CACHES = {
         "default": {
-            "BACKEND": "django_redis.cache.RedisCache",
+            "BACKEND": "core.cache.InstrumentedRedisCache",
             "LOCATION": config("REDIS_URL", default="redis://localhost:6379/1"),
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -260,9 +304,33 @@ else:
             },
             "KEY_PREFIX": "delivery_cache",
             "TIMEOUT": 300,  # 5 min default
-        }
+        },
+        # Sessões: o Redis não deve descartar estas chaves por falta de memória
+        # (use uma instância com maxmemory-policy noeviction em SESSION_REDIS_URL)
+        "sessions": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": config(
+                "SESSION_REDIS_URL",
+                default=config("REDIS_URL", default="redis://localhost:6379/1"),
+            ),
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            },
+            "KEY_PREFIX": "delivery_session",
+        },
     }
 
+# Sessões
+# Os dados da sessão do Django e a identidade do cliente (id da ClientSession, ver
+# utils.session) ficam juntos no cache "sessions": navegar na loja não gera SQL
+# de sessão. Em desenvolvimento o cache é em memória (sessões somem ao reiniciar);
+# use SESSION_ENGINE=django.contrib.sessions.backends.db para mantê-las no banco
+SESSION_ENGINE = config(
+    "SESSION_ENGINE", default="django.contrib.sessions.backends.cache"
+)
+SESSION_CACHE_ALIAS = "sessions"
+
 # Channels Configuration
 # IMPORTANTE: Usar Redis sempre que houver múltiplos workers (mesmo em desenvolvimento)
 # InMemoryChannelLayer NÃO funciona com múltiplos processos/workers
@@ -286,12 +354,108 @@ CACHE_TIMEOUTS = {
     "dashboard_daily": 300,  # 5min
     "dashboard_weekly": 900,  # 15min
     "cart_summary": 1800,  # 30min
+    "payment_status": 600,  # 10min
+    "stock": 3600,  # 1h (atualizado a cada reserva/liberação)
+    "customer_cpf": 86400,  # 24h (CPF → usuário no login, conferido a cada uso)
+}
+
+# Métricas (core.metrics)
+# Exportadas em /metrics/ no formato do Prometheus (staff ou Bearer METRICS_TOKEN).
+# Com METRICS_BACKEND=redis as métricas de todos os workers são somadas no Redis.
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_BACKEND = config("METRICS_BACKEND", default="memory")  # memory | redis
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=5, cast=int)  # segundos
+METRICS_TOKEN = config("METRICS_TOKEN", default=None)
+
+# Rate limit (core.ratelimit)
+# Token bucket por cliente (ClientSession, IP ou usuário) em cada escopo, no formato
+# "<requisições>/<s|m|h>". Com "redis" o limite vale para todos os workers; acima
+# dele a view responde 429 com Retry-After. Contadores em /cache-stats/ e /metrics/
+RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+RATE_LIMIT_BACKEND = config(
+    "RATE_LIMIT_BACKEND", default="memory" if DEBUG else "redis"
+)  # memory | redis
+RATE_LIMITS = {
+    # Adicionar/alterar itens do carrinho
+    "cart": config("RATE_LIMIT_CART", default="60/m"),
+    # Envio do checkout (cria pedido e cobrança no MercadoPago)
+    "checkout": config("RATE_LIMIT_CHECKOUT", default="10/m"),
+    # Verificação manual do status do pagamento (pode consultar o MercadoPago)
+    "payment_status": config("RATE_LIMIT_PAYMENT_STATUS", default="20/m"),
+    # Webhook do MercadoPago, por IP
+    "webhook": config("RATE_LIMIT_WEBHOOK", default="300/m"),
 }
+# Proxies reversos à frente da aplicação (ex.: 1 com um Nginx). O IP do cliente é a
+# entrada do X-Forwarded-For nessa posição a partir da direita; 0 = REMOTE_ADDR
+TRUSTED_PROXY_COUNT = config("TRUSTED_PROXY_COUNT", default=0, cast=int)
+
+# Health checks (core.health)
+# /health/live/ só verifica o processo; /health/ready/ verifica banco, cache e
+# channel layer em paralelo, cada um com timeout próprio, e reaproveita o resultado
+HEALTH_CHECK_TIMEOUT = config("HEALTH_CHECK_TIMEOUT", default=2, cast=float)  # segundos
+HEALTH_CHECK_CACHE_SECONDS = config("HEALTH_CHECK_CACHE_SECONDS", default=5, cast=float)
+
+# Inicialização dos workers (core.benchmark.startup)
+# Tempo máximo de django.setup() + importação das URLs verificado por core.tests
+# e pelo comando `python manage.py startup_benchmark`
+STARTUP_IMPORT_BUDGET_MS = config("STARTUP_IMPORT_BUDGET_MS", default=2000, cast=int)
+
+# Status de pagamento
+# A página de aguardando pagamento lê o status do cache (preenchido pelo webhook);
+# consultas ao MercadoPago são feitas no máximo uma vez por intervalo por pagamento
+PAYMENT_STATUS_MIN_REFRESH = config(
+    "PAYMENT_STATUS_MIN_REFRESH", default=15, cast=int
+)  # segundos
+
+# Relatórios em PDF
+# PDFs dos relatórios salvos são pré-renderizados pelo scheduler e guardados
+# em disco, endereçados pelo hash do conteúdo do relatório
+REPORTS_PDF_CACHE_DIR = config(
+    "REPORTS_PDF_CACHE_DIR", default=str(MEDIA_ROOT / "reports_pdf")
+)
+REPORTS_PDF_RENDER_LOCK_TIMEOUT = config(
+    "REPORTS_PDF_RENDER_LOCK_TIMEOUT", default=60, cast=int
+)  # segundos
+
+# Renderização dos PDFs (reports.renderer)
+# O WeasyPrint roda em um pool de processos próprio, fora dos workers web, para não
+# disputar o GIL com as requisições. Cada processo web mantém REPORTS_PDF_WORKERS
+# renderizadores; até REPORTS_PDF_QUEUE_SIZE PDFs aguardam na fila e os demais
+# recebem 503. Um PDF que passar de REPORTS_PDF_RENDER_TIMEOUT é interrompido
+REPORTS_PDF_WORKERS = config("REPORTS_PDF_WORKERS", default=2, cast=int)
+REPORTS_PDF_QUEUE_SIZE = config("REPORTS_PDF_QUEUE_SIZE", default=8, cast=int)
+REPORTS_PDF_RENDER_TIMEOUT = config(
+    "REPORTS_PDF_RENDER_TIMEOUT", default=30, cast=int
+)  # segundos
+
+# Vendas por produto (reports.sales)
+# Atualizadas a cada pedido pago; os últimos N dias são recalculados às 00:15
+PRODUCT_SALES_REBUILD_DAYS = config("PRODUCT_SALES_REBUILD_DAYS", default=7, cast=int)
+
+# Miniaturas das imagens de produto (products.thumbnails)
+# Larguras em pixels; cada uma é gerada em WebP e JPEG após o upload
+THUMBNAIL_WIDTHS = config("THUMBNAIL_WIDTHS", default="200,400,800", cast=Csv(int))
+THUMBNAIL_QUALITY = config("THUMBNAIL_QUALITY", default=80, cast=int)
+
+# Estoque (products.stock)
+# O catálogo e o carrinho avisam "últimas unidades" a partir deste estoque
+STOCK_LOW_THRESHOLD = config("STOCK_LOW_THRESHOLD", default=5, cast=int)
+
+# Retenção de dados (core.retention)
+# Executada diariamente às 03:30 pelo scheduler ou com `python manage.py apply_retention`.
+# Sessões de cliente inativas (e seus carrinhos) são removidas; pedidos fechados mais
+# antigos que RETENTION_ORDER_DAYS são movidos para o arquivo (ArchivedOrder)
+RETENTION_ENABLED = config("RETENTION_ENABLED", default=True, cast=bool)
+RETENTION_ORDER_DAYS = config("RETENTION_ORDER_DAYS", default=365, cast=int)
+RETENTION_SESSION_DAYS = config("RETENTION_SESSION_DAYS", default=30, cast=int)
+RETENTION_BATCH_SIZE = config("RETENTION_BATCH_SIZE", default=1000, cast=int)
 
 # WhiteNoise configurações apenas para produção
 if not DEBUG:
-    # Essa configuração tá aqu só para verificar se é o whitenoise tá funcionando, olhando o Header, mas não vai ser aplicado por causa do CompressedStaticFilesStorage (que não suporta cache manifest)
-    WHITENOISE_MAX_AGE = 31536000  # Cache por 1 ano em produção
+    # Arquivos com hash no nome (manifest do collectstatic e saída do compressor)
+    # são servidos como imutáveis; os demais usam WHITENOISE_MAX_AGE
+    WHITENOISE_IMMUTABLE_FILE_TEST = r"^.+\.[0-9a-f]{12}\.\w+$"
+    WHITENOISE_MAX_AGE = 3600
     WHITENOISE_AUTOREFRESH = False
     WHITENOISE_USE_FINDERS = False
 
@@ -453,3 +617,15 @@ LOGGING = {
         },
     },
 }
+
+# Scheduler (APScheduler) com eleição de líder via Redis
+# Apenas um processo entre todos os workers/containers executa os jobs.
+# "embedded": os processos web participam da eleição
+# "off": os processos web não executam jobs; use `python manage.py run_scheduler`
+SCHEDULER_MODE = config("SCHEDULER_MODE", default="embedded")
+SCHEDULER_LOCK_TTL = config("SCHEDULER_LOCK_TTL", default=30, cast=int)  # segundos
+
+# Cliente HTTP assíncrono (MercadoPago, CallMeBot)
+# Conexões simultâneas por worker; chamadas além do limite aguardam na fila do pool
+HTTP_CLIENT_MAX_CONNECTIONS = config("HTTP_CLIENT_MAX_CONNECTIONS", default=200, cast=int)
+HTTP_CLIENT_MAX_KEEPALIVE = config("HTTP_CLIENT_MAX_KEEPALIVE", default=50, cast=int)
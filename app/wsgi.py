@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
 application = get_wsgi_application()
+
+# Scheduler apenas nos processos do servidor (não em comandos de gerenciamento)
+from reports.scheduler import start_scheduler  # noqa: E402
+
+start_scheduler()
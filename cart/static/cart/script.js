@@ -46,6 +46,10 @@ document.addEventListener("DOMContentLoaded", function () {
           if (data.success) {
             updateQtyValue(btn, data.quantity);
             if (data.cart_total !== undefined) updateCartTotal(data.cart_total);
+          } else if (data.error) {
+            // Sem estoque para mais uma unidade
+            btn.disabled = true;
+            btn.title = data.error;
           }
         });
     });
@@ -70,6 +74,9 @@ document.addEventListener("DOMContentLoaded", function () {
               updateQtyValue(btn, data.quantity);
               if (data.cart_total !== undefined)
                 updateCartTotal(data.cart_total);
+              // Libera o botão de aumentar desativado por falta de estoque
+              const increaseBtn = btn.parentElement.querySelector(".cart-btn-increase");
+              if (increaseBtn) increaseBtn.disabled = false;
             } else {
               removeCartItemElement(btn);
               if (data.cart_total !== undefined)
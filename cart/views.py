@@ -1,18 +1,23 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView, View
 
+from core.ratelimit import rate_limit
 from products.models import Product
+from products.stock import annotate_availability, exceeds_stock
 
 from .models import Cart, CartItem
 
 
 # AJAX: aumentar quantidade
 @require_POST
+@rate_limit("cart")
 def increase_cart_item(request):
     product_id = request.POST.get("product_id")
-    cart = get_cart(request)
+    cart = get_cart(request, create=False)
     item = get_object_or_404(
         CartItem.objects.select_related("product"), cart=cart, product_id=product_id
     )
@@ -21,6 +26,9 @@ def increase_cart_item(request):
     if not item.product.is_active:
         return JsonResponse({"error": "Produto não está mais disponível"}, status=400)
 
+    if exceeds_stock(item.product, item.quantity + 1):
+        return JsonResponse({"error": "Estoque insuficiente"}, status=400)
+
     item.quantity += 1
     item.save()
     cart_total = cart.total_price
@@ -31,9 +39,10 @@ def increase_cart_item(request):
 
 # AJAX: diminuir quantidade
 @require_POST
+@rate_limit("cart")
 def decrease_cart_item(request):
     product_id = request.POST.get("product_id")
-    cart = get_cart(request)
+    cart = get_cart(request, create=False)
     item = get_object_or_404(
         CartItem.objects.select_related("product"), cart=cart, product_id=product_id
     )
@@ -73,9 +82,10 @@ def decrease_cart_item(request):
 
 # AJAX: remover item
 @require_POST
+@rate_limit("cart")
 def remove_cart_item(request):
     product_id = request.POST.get("product_id")
-    cart = get_cart(request)
+    cart = get_cart(request, create=False)
     item = get_object_or_404(
         CartItem.objects.select_related("product"), cart=cart, product_id=product_id
     )
@@ -84,34 +94,62 @@ def remove_cart_item(request):
     return JsonResponse({"success": True, "cart_total": float(cart_total)})
 
 
-def get_cart(request):
+def get_cart(request, create=True):
     """
     Pega ou cria um carrinho vinculado à ClientSession.
-    Mantém compatibilidade com cart_id na sessão Django.
+
+    Com create=False nada é criado: retorna None se o visitante ainda não tem
+    carrinho (e, sem ClientSession na sessão, não consulta o banco).
     """
-    from utils.session import get_or_create_client_session
+    from utils.session import get_client_session, get_or_create_client_session
+
+    if not create:
+        client_session = get_client_session(request)
+        if client_session is None:
+            return None
+        return Cart.objects.filter(client_session=client_session).first()
 
     # Obter ou criar ClientSession
     client_session = get_or_create_client_session(request)
 
+    cart, _ = Cart.objects.get_or_create(client_session=client_session)
+    return cart
+
+
+async def aget_cart(request, create=True):
+    """
+    Versão assíncrona de get_cart, para views async.
+    """
+    from utils.session import aget_client_session, aget_or_create_client_session
+
+    if not create:
+        client_session = await aget_client_session(request)
+        if client_session is None:
+            return None
+        return await Cart.objects.filter(client_session=client_session).afirst()
+
+    # Obter ou criar ClientSession
+    client_session = await aget_or_create_client_session(request)
+
     # Tentar pegar carrinho pela ClientSession
-    try:
-        cart = Cart.objects.get(client_session=client_session)
-    except Cart.DoesNotExist:
-        # Se não existe, criar novo carrinho vinculado à sessão
-        cart = Cart.objects.create(client_session=client_session)
+    cart, _ = await Cart.objects.aget_or_create(client_session=client_session)
 
     return cart
 
 
+@method_decorator(rate_limit("cart"), name="post")
 class AddToCartView(View):
     def post(self, request, *args, **kwargs):
         product_id = request.POST.get("product_id")
         # SEGURANÇA: Só permite adicionar produtos ativos
         product = get_object_or_404(Product, pk=product_id, is_active=True)
         cart = get_cart(request)
+        if exceeds_stock(product, 1):
+            return JsonResponse({"error": "Produto esgotado"}, status=400)
         item, created = CartItem.objects.get_or_create(cart=cart, product=product)
         if not created:
+            if exceeds_stock(product, item.quantity + 1):
+                return JsonResponse({"error": "Estoque insuficiente"}, status=400)
             item.quantity += 1
             item.save()
         return JsonResponse({"success": True, "cart_count": cart.total_quantity})
@@ -122,10 +160,16 @@ class CartDetailView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        cart = get_cart(self.request)
-        cart_items = cart.items.select_related("product").all()
-        total = cart.total_price
+        cart = get_cart(self.request, create=False)
+        if cart is None:
+            # Visitante sem carrinho: nada é criado só por abrir a página
+            cart_items, total = [], 0
+        else:
+            cart_items = cart.items.select_related("product").all()
+            annotate_availability(item.product for item in cart_items)
+            total = cart.total_price
         context["cart"] = cart
         context["cart_items"] = cart_items
         context["cart_total"] = total
+        context["stock_low_threshold"] = settings.STOCK_LOW_THRESHOLD
         return context
@@ -0,0 +1,71 @@
+import json
+import logging
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from orders.models import Order
+
+from .payment_status import (
+    aget_cached_payment_status,
+    build_payment_status_payload,
+    payment_group_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentStatusConsumer(AsyncWebsocketConsumer):
+    """
+    Consumer WebSocket da página de aguardando pagamento.
+
+    - O cliente se conecta ao grupo do seu pedido e recebe o status atual
+    - Quando o webhook do MercadoPago atualiza o pagamento, o servidor envia
+      o novo status via group_send(), sem necessidade de polling
+    """
+
+    async def connect(self):
+        self.order_id = self.scope["url_route"]["kwargs"]["order_id"]
+
+        order = await database_sync_to_async(
+            Order.objects.filter(id=self.order_id)
+            .values("payment_id", "payment_status")
+            .first
+        )()
+
+        if order is None:
+            await self.close(code=4004)
+            return
+
+        self.group_name = payment_group_name(self.order_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        # Enviar o status atual em cache (sem consultar o gateway)
+        entry = None
+        if order["payment_id"]:
+            entry = await aget_cached_payment_status(order["payment_id"])
+
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "payment_status",
+                    "data": build_payment_status_payload(entry, order["payment_status"]),
+                }
+            )
+        )
+
+    async def disconnect(self, close_code):
+        # Remover do grupo apenas se foi adicionado
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data):
+        # Não precisamos processar mensagens do cliente para este caso
+        pass
+
+    # Receber atualização de status do pagamento (enviada pelo webhook)
+    async def payment_status(self, event):
+        await self.send(
+            text_data=json.dumps({"type": "payment_status", "data": event["data"]})
+        )
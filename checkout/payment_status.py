@@ -0,0 +1,150 @@
+"""
+Status de pagamento em cache para a página de aguardando pagamento.
+
+O webhook do MercadoPago grava o status no cache e publica a mudança para
+os clientes conectados via WebSocket. O endpoint de polling lê do cache e só
+consulta o MercadoPago quando o status em cache tem mais de
+PAYMENT_STATUS_MIN_REFRESH segundos, com uma única consulta simultânea por
+pagamento (single-flight) entre todos os workers.
+"""
+
+import asyncio
+import time
+from logging import getLogger
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+logger = getLogger(__name__)
+
+# Status que não mudam mais: não há motivo para consultar o gateway novamente
+FINAL_STATUSES = {"approved", "rejected", "cancelled", "refunded", "charged_back"}
+
+# Tempo máximo de uma consulta ao gateway (lock single-flight)
+REFRESH_LOCK_TIMEOUT = 10  # segundos
+
+# Tempo máximo que uma requisição espera a consulta de outra requisição
+REFRESH_WAIT = 2  # segundos
+
+
+def payment_group_name(order_id) -> str:
+    """Grupo do channel layer com os clientes aguardando o pagamento do pedido."""
+    return f"payment_status_{order_id}"
+
+
+def _cache_key(payment_id) -> str:
+    return f"checkout:payment:{payment_id}"
+
+
+def _lock_key(payment_id) -> str:
+    return f"checkout:payment:{payment_id}:refresh"
+
+
+async def acache_payment_info(payment_id, payment_info: dict) -> dict:
+    """
+    Grava no cache os campos do pagamento usados pelo checkout.
+
+    Returns:
+        dict: Entrada gravada no cache.
+    """
+    transaction_data = (payment_info.get("point_of_interaction") or {}).get(
+        "transaction_data"
+    ) or {}
+
+    entry = {
+        "status": payment_info.get("status"),
+        "status_detail": payment_info.get("status_detail"),
+        "ticket_url": transaction_data.get("ticket_url"),
+        "qr_code": transaction_data.get("qr_code"),
+        "fetched_at": time.time(),
+    }
+    await cache.aset(
+        _cache_key(payment_id), entry, settings.CACHE_TIMEOUTS["payment_status"]
+    )
+    return entry
+
+
+def _is_fresh(entry: dict) -> bool:
+    return (
+        entry["status"] in FINAL_STATUSES
+        or time.time() - entry["fetched_at"] < settings.PAYMENT_STATUS_MIN_REFRESH
+    )
+
+
+async def aget_payment_status(payment_id) -> dict | None:
+    """
+    Retorna o status do pagamento, consultando o MercadoPago apenas se necessário.
+
+    Se outra requisição já está consultando o mesmo pagamento, aguarda o
+    resultado dela (ou devolve o status anterior em cache).
+
+    Returns:
+        dict | None: Entrada do cache, ou None se o status ainda não é conhecido.
+    """
+    entry = await cache.aget(_cache_key(payment_id))
+    if entry and _is_fresh(entry):
+        return entry
+
+    if await cache.aadd(_lock_key(payment_id), 1, REFRESH_LOCK_TIMEOUT):
+        from services.mercadopago import MercadoPagoService
+
+        try:
+            payment_info = await MercadoPagoService().aget_payment_info(payment_id)
+            if payment_info:
+                return await acache_payment_info(payment_id, payment_info)
+            return entry
+        finally:
+            await cache.adelete(_lock_key(payment_id))
+
+    # Outra requisição está consultando: usar o status anterior, se houver
+    if entry:
+        return entry
+
+    deadline = time.monotonic() + REFRESH_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        entry = await cache.aget(_cache_key(payment_id))
+        if entry:
+            return entry
+
+    return None
+
+
+async def aget_cached_payment_status(payment_id) -> dict | None:
+    """Retorna o status em cache, sem consultar o MercadoPago."""
+    return await cache.aget(_cache_key(payment_id))
+
+
+def build_payment_status_payload(entry: dict | None, order_payment_status: str) -> dict:
+    """Resposta do endpoint de status (mesmo formato enviado via WebSocket)."""
+    entry = entry or {}
+    return {
+        "status": "success",
+        "payment_status": entry.get("status"),
+        "payment_detail": entry.get("status_detail"),
+        "ticket_url": entry.get("ticket_url"),
+        "qr_code": entry.get("qr_code"),
+        "order_paid": order_payment_status == "paid",
+    }
+
+
+async def apublish_payment_status(order_id, entry: dict, order_payment_status: str):
+    """
+    Envia o status atualizado para os clientes na página de aguardando pagamento.
+    Falhas do WebSocket não devem impedir o processamento do webhook.
+    """
+    try:
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+
+        await channel_layer.group_send(
+            payment_group_name(order_id),
+            {
+                "type": "payment_status",
+                "data": build_payment_status_payload(entry, order_payment_status),
+            },
+        )
+    except Exception as e:
+        logger.error(f"Erro ao enviar status do pagamento via WebSocket: {e}")
@@ -1,19 +1,55 @@
+import contextvars
+from contextlib import contextmanager
 from logging import getLogger
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from dashboard.utils.realtime import ORDERS_GROUP, build_order_event_data
 from orders.models import Order, OrderItem
 
 logger = getLogger(__name__)
 
+# Desativa as notificações em operações em lote (ex.: arquivamento de pedidos)
+_updates_suppressed = contextvars.ContextVar("order_updates_suppressed", default=False)
+
+
+@contextmanager
+def suppress_order_updates():
+    """
+    Não envia atualizações via WebSocket dentro do bloco.
+    Usado em operações de manutenção que alteram muitos pedidos de uma vez.
+    """
+    token = _updates_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _updates_suppressed.reset(token)
+
 
 def send_order_update(order, event_type):
     """
     Função helper para enviar atualizações via WebSocket
+
+    O envio acontece após o commit, para que a linha renderizada reflita o
+    pedido já gravado (ex.: com os itens criados na mesma transação).
     """
+    if _updates_suppressed.get():
+        return
+
+    order_id = order.id
+
+    # Callback nomeado: com robust=True o Django registra a falha pelo __qualname__
+    def send_update():
+        _send_order_update(order_id, event_type)
+
+    transaction.on_commit(send_update, robust=True)
+
+
+def _send_order_update(order_id, event_type):
     try:
         channel_layer = get_channel_layer()
 
@@ -21,33 +57,12 @@ def send_order_update(order, event_type):
         if not channel_layer:
             return
 
-        # Preparar dados do pedido
-        order_data = {
-            "order_id": order.id,
-            "customer_name": order.customer_name,
-            "phone": order.phone,
-            "status": order.status,
-            "payment_status": order.payment_status,
-            "payment_method": order.payment_method,
-            "total_price": float(order.total_price),
-            "created_at": order.created_at.isoformat(),
-            "is_late": order.is_late,
-        }
-
-        # Incluir itens do pedido
-        order_data["items"] = []
-        for item in order.items.select_related("product").all():
-            order_data["items"].append(
-                {
-                    "product_name": item.product.name,
-                    "quantity": item.quantity,
-                    "price": float(item.product.price),
-                }
-            )
+        # Dados do pedido com o HTML da linha da lista, renderizado uma vez
+        order_data = build_order_event_data(order_id)
 
         # Enviar mensagem para o grupo
         async_to_sync(channel_layer.group_send)(
-            "orders_updates", {"type": event_type, "data": order_data}
+            ORDERS_GROUP, {"type": event_type, "data": order_data}
         )
 
     except Exception:
@@ -101,6 +116,10 @@ def order_item_deleted(sender, instance, **kwargs):
     """
     Signal chamado quando um item do pedido é deletado
     """
+    # Evita buscar o pedido de cada item em exclusões em lote
+    if _updates_suppressed.get():
+        return
+
     try:
         # Item removido do pedido
         send_order_update(instance.order, "order_item_removed")
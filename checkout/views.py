@@ -1,45 +1,83 @@
 from logging import getLogger
 
-from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
 from channels.layers import get_channel_layer
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 
-from cart.views import get_cart
+from cart.views import aget_cart
+from core.ratelimit import acheck_rate_limit, rate_limit, rate_limited_response
+from customers.models import Customer
+from dashboard.utils.realtime import ORDERS_GROUP, abuild_order_event_data
 from orders.models import Order, OrderItem
-from services.mercadopago import MercadoPagoService
-from services.notifications import (
-    send_order_notifications_with_callmebot,
+from products.stock import OutOfStock, item_quantities, release_stock, reserve_stock
+from utils.session import aget_or_create_client_session
+
+from .payment_status import (
+    aget_cached_payment_status,
+    aget_payment_status,
+    build_payment_status_payload,
 )
+from .signals import suppress_order_updates
 
 logger = getLogger(__name__)
 
 
-class CheckoutView(TemplateView):
+async def arender(request, template_name, context):
+    """
+    Renderiza um template a partir de uma view async.
+    A renderização roda em thread porque os context processors usam o ORM síncrono.
+    """
+    return await sync_to_async(render)(request, template_name, context)
+
+
+class CheckoutView(View):
+    """
+    View assíncrona do checkout: as chamadas ao MercadoPago e ao CallMeBot não
+    ocupam threads do pool síncrono enquanto aguardam a resposta.
+    """
+
     template_name = "checkout/checkout.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        cart = get_cart(self.request)
-        cart_items = cart.items.select_related("product").all()
+    async def aget_context_data(self, **kwargs):
+        context = dict(kwargs)
+        cart = await aget_cart(self.request, create=False)
+        cart_items = (
+            [item async for item in cart.items.select_related("product")]
+            if cart
+            else []
+        )
         context["cart_items"] = cart_items
-        context["cart_total"] = cart.total_price
+        context["cart_total"] = sum(
+            item.quantity * item.product.price
+            for item in cart_items
+            if item.product.is_active
+        )
 
         # Adicionar dados do cliente se logado
-        if self.request.user.is_authenticated and hasattr(
-            self.request.user, "customer_profile"
-        ):
-            customer = self.request.user.customer_profile
-            context["customer"] = customer
+        user = await self.request.auser()
+        if user.is_authenticated:
+            customer = await Customer.objects.filter(user=user).afirst()
+            if customer:
+                context["customer"] = customer
 
         return context
 
-    def post(self, request, *args, **kwargs):
-        cart = get_cart(request)
-        # Uma única consulta otimizada para todos os itens
-        cart_items = cart.items.select_related("product").all()
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return await arender(request, self.template_name, context)
+
+    async def post(self, request, *args, **kwargs):
+        retry_after = await acheck_rate_limit(request, "checkout")
+        if retry_after is not None:
+            return rate_limited_response(request, retry_after)
+
+        context = await self.aget_context_data()
+        cart = await aget_cart(request, create=False)
+        cart_items = context["cart_items"]
 
         # Separar itens ativos e inativos em memória (evita query adicional)
         active_items = []
@@ -53,21 +91,19 @@ class CheckoutView(TemplateView):
 
         # SEGURANÇA: Verificar se há produtos inativos no carrinho
         if inactive_items:
-            context = self.get_context_data()
             context["error_message"] = (
                 "Seu carrinho contém produtos que não estão mais disponíveis. Remova-os antes de continuar."
             )
             context["inactive_products"] = [
                 item.product.name for item in inactive_items
             ]
-            return render(request, "checkout/error.html", context)
+            return await arender(request, "checkout/error.html", context)
 
         if not active_items:
-            context = self.get_context_data()
             context["error_message"] = (
                 "Seu carrinho está vazio ou todos os produtos estão indisponíveis."
             )
-            return render(request, "checkout/error.html", context)
+            return await arender(request, "checkout/error.html", context)
 
         # Calcular total usando os itens ativos em memória
         total = sum(item.quantity * item.product.price for item in active_items)
@@ -77,7 +113,6 @@ class CheckoutView(TemplateView):
         address = request.POST.get("address")
         payment_method = request.POST.get("payment_method")
         cash_value = request.POST.get("cash_value")
-        context = self.get_context_data()
 
         # Validação do troco
         if payment_method == "dinheiro":
@@ -86,39 +121,57 @@ class CheckoutView(TemplateView):
             except Exception:
                 cash_value = 0
             if cash_value < total:
-                return render(request, "checkout/error.html", context)
+                return await arender(request, "checkout/error.html", context)
 
+        # Reserva o estoque antes de criar o pedido (tudo ou nada)
+        quantities = item_quantities(active_items)
+        try:
+            await sync_to_async(reserve_stock)(quantities)
+        except OutOfStock as e:
+            context["error_message"] = (
+                "Alguns produtos do seu carrinho não têm estoque suficiente. "
+                "Ajuste as quantidades antes de continuar."
+            )
+            context["out_of_stock_products"] = [
+                item.product.name
+                for item in active_items
+                if item.product_id in e.product_ids
+            ]
+            return await arender(request, "checkout/error.html", context)
+
+        order = None
+        items_created = False
         try:
             # Pega ou cria ClientSession
-            from utils.session import get_or_create_client_session
-
-            client_session = get_or_create_client_session(self.request)
-
-            # Cria o pedido vinculado à ClientSession
-            order = Order.objects.create(
-                customer_name=name,
-                phone=phone,
-                cpf=cpf if cpf else None,
-                address=address,
-                payment_method=payment_method,
-                cash_value=cash_value if payment_method == "dinheiro" else None,
-                payment_status="pending",
-                client_session=client_session,
-                customer=(
-                    self.request.user.customer_profile
-                    if (
-                        self.request.user.is_authenticated
-                        and hasattr(self.request.user, "customer_profile")
+            client_session = await aget_or_create_client_session(request)
+
+            # Cria o pedido vinculado à ClientSession. O aviso de novo pedido do
+            # signal é suprimido: a linha do dashboard só é enviada abaixo, já
+            # com os itens criados
+            with suppress_order_updates():
+                order = await Order.objects.acreate(
+                    customer_name=name,
+                    phone=phone,
+                    cpf=cpf if cpf else None,
+                    address=address,
+                    payment_method=payment_method,
+                    cash_value=cash_value if payment_method == "dinheiro" else None,
+                    payment_status="pending",
+                    client_session=client_session,
+                    customer=context.get("customer"),
+                    stock_reserved=True,
+                )
+            await OrderItem.objects.abulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        product=item.product,
+                        quantity=item.quantity,
                     )
-                    else None
-                ),
+                    for item in active_items
+                ]
             )
-            for item in active_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                )
+            items_created = True
 
             # Enviar atualização via WebSocket para dashboard
             # NOTA: O cliente NÃO precisa estar conectado ao WebSocket
@@ -126,34 +179,31 @@ class CheckoutView(TemplateView):
             # do dashboard estão conectados e receberão a notificação em tempo real
             try:
                 channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    "orders_updates",
+                await channel_layer.group_send(
+                    ORDERS_GROUP,
                     {
                         "type": "new_order",
-                        "data": {
-                            "order_id": order.id,
-                            "customer_name": order.customer_name,
-                            "status": order.status,
-                            "payment_status": order.payment_status,
-                            "total": float(order.total_price),
-                        },
+                        "data": await abuild_order_event_data(order.id),
                     },
                 )
             except Exception as e:
                 logger.error(f"Erro ao enviar atualização via WebSocket: {e}")
 
             # Envia notificação de novo pedido para todos os métodos de pagamento
-            def send_notification(order):
+            async def send_notification(order):
+                from services.notifications import (
+                    asend_order_notifications_with_callmebot,
+                )
+
                 try:
-                    send_order_notifications_with_callmebot(order)
+                    await asend_order_notifications_with_callmebot(order)
                 except Exception as e:
                     logger.error(f"Erro ao enviar notificação de novo pedido: {e}")
-                    return render(request, "checkout/error.html", context)
 
             # Se o pagamento for PIX, cria o pagamento e redireciona
             if payment_method == "pix":
                 try:
-                    payment_data = create_payment_charge(order)
+                    payment_data = await acreate_payment_charge(order)
                     # Salva o ID do pagamento no pedido para rastreamento
                     order.payment_id = payment_data.get("id")
                     order.payment_url = (
@@ -161,10 +211,10 @@ class CheckoutView(TemplateView):
                         .get("transaction_data", {})
                         .get("ticket_url")
                     )
-                    order.save()
+                    await order.asave()
 
                     # Limpa o carrinho e redireciona para página de aguardar pagamento
-                    cart.items.all().delete()
+                    await cart.items.all().adelete()
                     return redirect("checkout:awaiting_payment", order_id=order.id)
                 except Exception as e:
                     # Se falhar integração com MercadoPago, continua com pagamento manual
@@ -174,7 +224,7 @@ class CheckoutView(TemplateView):
 
                     # Marca que a integração falhou
                     order.payment_integration_failed = True
-                    order.save()
+                    await order.asave()
 
                     # Atualiza contexto para informar que será pagamento manual
                     context["payment_fallback"] = True
@@ -184,21 +234,21 @@ class CheckoutView(TemplateView):
                     )
 
                     # Limpa o carrinho e mostra página de sucesso com aviso
-                    cart.items.all().delete()
-                    return render(request, "checkout/success.html", context)
+                    await cart.items.all().adelete()
+                    return await arender(request, "checkout/success.html", context)
                 finally:
-                    send_notification(order)
+                    await send_notification(order)
 
             if payment_method == "cartao_online":
                 try:
-                    preference_data = create_payment_charge(order)
+                    preference_data = await acreate_payment_charge(order)
                     # Salva a URL de pagamento no pedido, pagamento por preferência não gera ID de pagamento imediato, só depois do pagamento no webhook
                     order.payment_id = None
                     order.payment_url = preference_data.get("init_point")
-                    order.save()
+                    await order.asave()
 
                     # Limpa o carrinho e redireciona para página de aguardar pagamento
-                    cart.items.all().delete()
+                    await cart.items.all().adelete()
                     return redirect("checkout:awaiting_payment", order_id=order.id)
                 except Exception as e:
                     # Se falhar integração com MercadoPago, converte para pagamento presencial
@@ -209,7 +259,7 @@ class CheckoutView(TemplateView):
                     # Converte para cartão presencial e marca que a integração falhou
                     order.payment_method = "cartao_presencial"
                     order.payment_integration_failed = True
-                    order.save()
+                    await order.asave()
 
                     # Atualiza contexto para informar que será pagamento presencial
                     context["payment_fallback"] = True
@@ -219,65 +269,73 @@ class CheckoutView(TemplateView):
                     )
 
                     # Limpa o carrinho e mostra página de sucesso com aviso
-                    cart.items.all().delete()
-                    return render(request, "checkout/success.html", context)
+                    await cart.items.all().adelete()
+                    return await arender(request, "checkout/success.html", context)
                 finally:
-                    send_notification(order)
+                    await send_notification(order)
 
             if payment_method == "cartao_presencial":
                 try:
                     # Pagamento presencial não precisa de processamento online
                     # Limpa o carrinho e redireciona para sucesso
-                    cart.items.all().delete()
-                    return render(request, "checkout/success.html", context)
+                    await cart.items.all().adelete()
+                    return await arender(request, "checkout/success.html", context)
                 except Exception as e:
-                    order.delete()
+                    await order.adelete()
                     logger.error(
                         f"Erro ao processar pagamento com cartão presencial: {e}"
                     )
                     context["error_message"] = (
                         "Erro ao finalizar pedido. Tente novamente."
                     )
-                    return render(request, "checkout/error.html", context)
+                    return await arender(request, "checkout/error.html", context)
                 finally:
-                    send_notification(order)
+                    await send_notification(order)
 
             if payment_method == "dinheiro":
                 try:
                     # Limpa o carrinho
-                    cart.items.all().delete()
-                    return render(request, "checkout/success.html", context)
+                    await cart.items.all().adelete()
+                    return await arender(request, "checkout/success.html", context)
                 except Exception as e:
-                    order.delete()
+                    await order.adelete()
                     logger.error(f"Erro ao processar pagamento em dinheiro: {e}")
                     context["error_message"] = (
                         "Erro ao finalizar pedido. Tente novamente."
                     )
-                    return render(request, "checkout/error.html", context)
+                    return await arender(request, "checkout/error.html", context)
                 finally:
-                    send_notification(order)
+                    await send_notification(order)
 
             # Fallback para outros métodos de pagamento
-            cart.items.all().delete()
-            context = self.get_context_data()
-            send_notification(order)
-            return render(request, "checkout/success.html", context)
+            await cart.items.all().adelete()
+            context = await self.aget_context_data()
+            await send_notification(order)
+            return await arender(request, "checkout/success.html", context)
 
         except Exception as e:
             logger.error(f"Error processing order: {e}")
-            return render(request, "checkout/error.html", context)
+            if not items_created:
+                # O pedido não chegou a ter itens: a reserva não pertence a nenhum pedido
+                await sync_to_async(release_stock)(quantities)
+                if order is not None:
+                    await Order.objects.filter(pk=order.pk).aupdate(stock_reserved=False)
+            return await arender(request, "checkout/error.html", context)
 
 
-def create_payment_charge(order: Order) -> dict:
+async def acreate_payment_charge(order: Order) -> dict:
     """
     Função para criar uma cobrança de pagamento via MercadoPago.
     """
+    # Carregado sob demanda: o cliente HTTP (httpx/requests) só é necessário no checkout
+    from services.mercadopago import MercadoPagoService
 
     mp_service = MercadoPagoService()
+    items = [item async for item in order.items.select_related("product")]
 
     if order.payment_method == "pix":
-        payment_data = mp_service.pay_with_pix(
-            amount=float(order.total_price),
+        payment_data = await mp_service.apay_with_pix(
+            amount=float(sum(item.quantity * item.product.price for item in items)),
             payer_email="cliente@exemplo.com",
             payer_cpf=order.cpf if order.cpf else "00000000000",
             description=f"Pedido #{order.id} - {order.customer_name}",
@@ -286,9 +344,9 @@ def create_payment_charge(order: Order) -> dict:
 
     elif order.payment_method == "cartao_online":
         # Criar lista de itens para a preferência
-        items = []
-        for item in order.items.all():
-            items.append(
+        preference_items = []
+        for item in items:
+            preference_items.append(
                 {
                     "id": str(item.product.id),
                     "title": item.product.name,
@@ -299,8 +357,8 @@ def create_payment_charge(order: Order) -> dict:
             )
 
         # Usar o método adequado do serviço MercadoPago
-        preference_data = mp_service.create_preference_with_card(
-            items, order_id=str(order.id)
+        preference_data = await mp_service.acreate_preference_with_card(
+            preference_items, order_id=str(order.id)
         )
         return preference_data
 
@@ -331,24 +389,28 @@ class AwaitingPaymentView(TemplateView):
         return context
 
 
-def get_payment_info(payment_id: str) -> dict:
-    """
-    Função para buscar informações de um pagamento
-    """
-    mp_service = MercadoPagoService()
-    return mp_service.get_payment_info(payment_id)
-
-
 @csrf_exempt
-def check_payment_status(request, order_id):
+@rate_limit("payment_status")
+async def check_payment_status(request, order_id):
     """
     API endpoint para verificar status do pagamento via AJAX (PIX e Cartão)
+
+    O status vem do cache preenchido pelo webhook; o MercadoPago só é consultado
+    quando o cache está desatualizado (ver checkout.payment_status).
     """
     if request.method == "GET":
         try:
-            order = get_object_or_404(Order, id=order_id)
+            order = await (
+                Order.objects.filter(id=order_id)
+                .values("payment_id", "payment_status")
+                .afirst()
+            )
+            if order is None:
+                return JsonResponse(
+                    {"status": "error", "message": "Pedido não encontrado"}
+                )
 
-            if not order.payment_id:
+            if not order["payment_id"]:
                 return JsonResponse(
                     {
                         "status": "error",
@@ -356,21 +418,14 @@ def check_payment_status(request, order_id):
                     }
                 )
 
-            payment_info = get_payment_info(order.payment_id)
+            # Pedido já pago: usa apenas o cache, sem consultar o gateway
+            if order["payment_status"] == "paid":
+                entry = await aget_cached_payment_status(order["payment_id"])
+            else:
+                entry = await aget_payment_status(order["payment_id"])
 
             return JsonResponse(
-                {
-                    "status": "success",
-                    "payment_status": payment_info.get("status"),
-                    "payment_detail": payment_info.get("status_detail"),
-                    "ticket_url": payment_info.get("point_of_interaction", {})
-                    .get("transaction_data", {})
-                    .get("ticket_url"),
-                    "qr_code": payment_info.get("point_of_interaction", {})
-                    .get("transaction_data", {})
-                    .get("qr_code"),
-                    "order_paid": order.payment_status == "paid",
-                }
+                build_payment_status_payload(entry, order["payment_status"])
             )
 
         except Exception as e:
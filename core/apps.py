@@ -6,4 +6,8 @@ class CoreConfig(AppConfig):
     name = "core"
 
     def ready(self):
+        import core.checks  # noqa: F401
         import core.signals  # noqa: F401
+        from core import metrics
+
+        metrics.install()
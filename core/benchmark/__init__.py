@@ -0,0 +1,5 @@
+"""
+Benchmark de carga do funil loja → checkout.
+
+Usado pelo comando `python manage.py benchmark`.
+"""
@@ -0,0 +1,303 @@
+"""
+Execução do funil loja → checkout com sessões concorrentes e coleta das métricas.
+
+Cada sessão é um cliente httpx com cookies próprios que chama a aplicação ASGI
+diretamente (sem socket), passando por todos os middlewares, CSRF incluso.
+As consultas ao banco são contadas por requisição através de um execute_wrapper
+instalado em todas as conexões e de um ContextVar propagado para as threads do
+sync_to_async.
+"""
+
+import asyncio
+import contextvars
+import random
+import re
+import time
+from dataclasses import dataclass
+
+import httpx
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from orders.models import Order
+
+from .stubs import GatewayStub
+
+# Contador de consultas da requisição em andamento (lista mutável para ser
+# compartilhada com as threads do sync_to_async, que recebem uma cópia do contexto)
+_query_counter = contextvars.ContextVar("benchmark_query_counter", default=None)
+
+AWAITING_PAYMENT_URL = re.compile(r"/checkout/aguardando-pagamento/(?P<order_id>\d+)/")
+
+PERCENTILES = (50, 95, 99)
+
+# Métricas comparadas entre relatórios: (métrica, maior é pior)
+COMPARED_METRICS = (
+    ("p50_ms", True),
+    ("p95_ms", True),
+    ("p99_ms", True),
+    ("queries_mean", True),
+    ("throughput_rps", False),
+)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_on_connection(sender, connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def install_query_counter():
+    """Conta as consultas de todas as conexões, inclusive as abertas depois."""
+    connection_created.connect(
+        _install_on_connection, dispatch_uid="benchmark_query_counter"
+    )
+    for connection in connections.all():
+        _install_on_connection(None, connection)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (valores já ordenados)."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    seconds: float
+    queries: int
+    ok: bool
+
+
+class FunnelBenchmark:
+    """
+    Conduz sessões concorrentes pelo funil:
+    lista de produtos → adicionar ao carrinho → checkout → polling do pagamento → webhook.
+    """
+
+    def __init__(
+        self,
+        app,
+        gateway: GatewayStub,
+        product_ids: list[int],
+        sessions: int = 20,
+        iterations: int = 5,
+        polls: int = 3,
+        items_per_order: int = 2,
+        payment_method: str = "pix",
+        seed: int = 42,
+    ):
+        self.app = app
+        self.gateway = gateway
+        self.product_ids = product_ids
+        self.sessions = sessions
+        self.iterations = iterations
+        self.polls = polls
+        self.items_per_order = items_per_order
+        self.payment_method = payment_method
+        self.seed = seed
+        self.samples: list[Sample] = []
+        self.funnels_completed = 0
+        self.funnels_failed = 0
+        self.errors: list[str] = []
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app),
+            base_url="http://testserver",
+            timeout=30,
+        )
+
+    async def _request(self, client, endpoint, method, url, record=True, **kwargs):
+        counter = [0]
+        token = _query_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _query_counter.reset(token)
+
+        ok = response.status_code < 400
+        if record:
+            self.samples.append(Sample(endpoint, elapsed, counter[0], ok))
+        if not ok:
+            raise RuntimeError(f"{endpoint}: HTTP {response.status_code} em {url}")
+        return response
+
+    async def _run_funnel(self, client, rng: random.Random, session_number: int, record=True):
+        request = self._request
+
+        await request(client, "product_list", "GET", "/products/", record=record)
+        csrf_token = client.cookies.get("csrftoken", "")
+
+        for product_id in rng.sample(
+            self.product_ids, min(self.items_per_order, len(self.product_ids))
+        ):
+            await request(
+                client,
+                "add_to_cart",
+                "POST",
+                "/cart/add/",
+                record=record,
+                data={"product_id": product_id},
+                headers={"X-CSRFToken": csrf_token, "X-Requested-With": "XMLHttpRequest"},
+            )
+
+        await request(client, "checkout_form", "GET", "/checkout/", record=record)
+
+        response = await request(
+            client,
+            "checkout_submit",
+            "POST",
+            "/checkout/",
+            record=record,
+            data={
+                "csrfmiddlewaretoken": csrf_token,
+                "name": f"Cliente Benchmark {session_number}",
+                "phone": f"119{session_number:08d}",
+                "cpf": "19119119100",
+                "address": "Rua do Benchmark, 100 - Centro",
+                "payment_method": self.payment_method,
+                "cash_value": "1000",
+            },
+        )
+
+        if self.payment_method != "pix":
+            return
+
+        match = AWAITING_PAYMENT_URL.search(response.headers.get("location", ""))
+        if not match:
+            raise RuntimeError("checkout_submit: pedido PIX não redirecionou para o pagamento")
+        order_id = int(match.group("order_id"))
+        poll_url = f"/checkout/api/check-payment/{order_id}/"
+
+        for _ in range(self.polls):
+            await request(client, "payment_poll", "GET", poll_url, record=record)
+
+        # O cliente "paga" o PIX e o gateway notifica o webhook
+        payment_id = await (
+            Order.objects.filter(id=order_id).values_list("payment_id", flat=True).afirst()
+        )
+        self.gateway.approve(payment_id)
+        await request(
+            client,
+            "webhook",
+            "POST",
+            "/services/webhook/mercadopago/",
+            record=record,
+            json={"topic": "payment", "resource": str(payment_id)},
+        )
+
+        response = await request(client, "payment_poll_paid", "GET", poll_url, record=record)
+        if not response.json().get("order_paid"):
+            raise RuntimeError(f"payment_poll_paid: pedido #{order_id} não consta como pago")
+
+    async def _run_session(self, session_number: int):
+        rng = random.Random(self.seed + session_number)
+        async with self._client() as client:
+            for _ in range(self.iterations):
+                try:
+                    await self._run_funnel(client, rng, session_number)
+                    self.funnels_completed += 1
+                except Exception as e:
+                    self.funnels_failed += 1
+                    self.errors.append(f"{type(e).__name__}: {e}")
+
+    async def warmup(self):
+        """Executa um funil sem registrar métricas (templates, caches e pool HTTP)."""
+        async with self._client() as client:
+            await self._run_funnel(client, random.Random(self.seed), 0, record=False)
+
+    async def run(self) -> dict:
+        await self.warmup()
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(self._run_session(number) for number in range(1, self.sessions + 1))
+        )
+        duration = time.perf_counter() - start
+
+        return self.summarize(duration)
+
+    def summarize(self, duration: float) -> dict:
+        by_endpoint: dict[str, list[Sample]] = {}
+        for sample in self.samples:
+            by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+        endpoints = {}
+        for endpoint, samples in by_endpoint.items():
+            latencies = sorted(sample.seconds * 1000 for sample in samples)
+            queries = [sample.queries for sample in samples]
+            stats = {
+                "requests": len(samples),
+                "errors": sum(1 for sample in samples if not sample.ok),
+                "throughput_rps": round(len(samples) / duration, 2),
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "max_ms": round(latencies[-1], 2),
+                "queries_mean": round(sum(queries) / len(queries), 2),
+                "queries_max": max(queries),
+            }
+            for pct in PERCENTILES:
+                stats[f"p{pct}_ms"] = round(percentile(latencies, pct), 2)
+            endpoints[endpoint] = stats
+
+        total_requests = len(self.samples)
+        return {
+            "summary": {
+                "duration_s": round(duration, 3),
+                "requests": total_requests,
+                "errors": sum(1 for sample in self.samples if not sample.ok),
+                "throughput_rps": round(total_requests / duration, 2),
+                "funnels_completed": self.funnels_completed,
+                "funnels_failed": self.funnels_failed,
+                "funnels_per_s": round(self.funnels_completed / duration, 2),
+            },
+            "endpoints": endpoints,
+            "gateway_calls": dict(self.gateway.calls),
+            "failures": self.errors[:20],
+        }
+
+
+def compare_reports(current: dict, baseline: dict) -> list[dict]:
+    """
+    Compara as métricas por endpoint com um relatório anterior.
+
+    Returns:
+        list[dict]: Uma entrada por (endpoint, métrica) com a variação percentual,
+        positiva quando a métrica piorou.
+    """
+    changes = []
+    for endpoint, stats in current["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+
+        for metric, higher_is_worse in COMPARED_METRICS:
+            before, after = previous.get(metric), stats.get(metric)
+            if before is None or after is None:
+                continue
+
+            if before:
+                change = (after - before) / before * 100
+            else:
+                change = 0.0 if not after else 100.0
+            changes.append(
+                {
+                    "endpoint": endpoint,
+                    "metric": metric,
+                    "before": before,
+                    "after": after,
+                    "regression_pct": round(change if higher_is_worse else -change, 1),
+                }
+            )
+    return changes
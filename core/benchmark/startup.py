@@ -0,0 +1,132 @@
+"""
+Medição da inicialização de um worker: django.setup() + importação das URLs.
+
+A medição roda em um processo Python novo (os módulos do processo atual já
+estão carregados), com o scheduler desativado. Opcionalmente usa
+`python -X importtime` para obter o tempo de importação por pacote.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+# Dependências pesadas que devem ser carregadas apenas no primeiro uso
+LAZY_MODULES = ("weasyprint", "PIL", "httpx", "requests")
+
+RESULT_PREFIX = "STARTUP_RESULT "
+
+STARTUP_SCRIPT = f"""
+import json, sys, time
+
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print({RESULT_PREFIX!r} + json.dumps({{
+    "setup_seconds": setup_done - start,
+    "urlconf_seconds": urls_done - setup_done,
+    "rss_kb": rss_kb(),
+    "modules": sorted(name for name in sys.modules if "." not in name),
+}}))
+"""
+
+
+def _parse_import_times(stderr) -> dict[str, float]:
+    """Soma o tempo próprio (ms) de cada pacote de topo a partir do -X importtime."""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        packages[name.split(".")[0]] += int(self_us) / 1000
+    return dict(packages)
+
+
+def measure_startup(import_times=False) -> dict:
+    """
+    Inicializa o Django em um processo novo e mede tempo, memória e módulos.
+
+    Returns:
+        dict: setup_ms, urlconf_ms, total_ms, rss_mb, modules (pacotes de topo
+        carregados) e, com import_times, packages ({pacote: ms}).
+    """
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "app.settings"),
+        # O processo de medição não participa da eleição do scheduler
+        "SCHEDULER_MODE": "off",
+    }
+    command = [sys.executable]
+    if import_times:
+        command += ["-X", "importtime"]
+    command += ["-c", STARTUP_SCRIPT]
+
+    process = subprocess.run(
+        command,
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    result_line = next(
+        (line for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)),
+        None,
+    )
+    if process.returncode != 0 or result_line is None:
+        raise RuntimeError(
+            f"Falha ao inicializar o Django (código {process.returncode}): "
+            f"{process.stderr.strip()[-2000:]}"
+        )
+
+    data = json.loads(result_line[len(RESULT_PREFIX) :])
+    result = {
+        "setup_ms": data["setup_seconds"] * 1000,
+        "urlconf_ms": data["urlconf_seconds"] * 1000,
+        "total_ms": (data["setup_seconds"] + data["urlconf_seconds"]) * 1000,
+        "rss_mb": data["rss_kb"] / 1024,
+        "modules": set(data["modules"]),
+    }
+    if import_times:
+        result["packages"] = _parse_import_times(process.stderr)
+    return result
+
+
+def summarize_runs(runs) -> dict:
+    """Mediana de várias medições (a primeira costuma pagar o cache de disco)."""
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("setup_ms", "urlconf_ms", "total_ms", "rss_mb")
+    }
+    summary["eager_lazy_modules"] = sorted(
+        set(LAZY_MODULES) & set.union(*(run["modules"] for run in runs))
+    )
+    packages = [run["packages"] for run in runs if "packages" in run]
+    if packages:
+        names = set().union(*packages)
+        summary["packages"] = {
+            name: statistics.median(run.get(name, 0.0) for run in packages)
+            for name in names
+        }
+    return summary
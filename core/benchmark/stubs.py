@@ -0,0 +1,162 @@
+"""
+Stubs locais das APIs externas (MercadoPago, CallMeBot e Evolution) para o benchmark.
+
+Sobe um servidor HTTP em 127.0.0.1 numa porta livre. As respostas imitam apenas os
+campos usados pelo sistema, e a latência de cada chamada pode ser configurada para
+simular a rede até o gateway.
+"""
+
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAYMENT_PATH = re.compile(r"^/v1/payments/(?P<payment_id>\d+)$")
+
+
+class GatewayStub:
+    """
+    Servidor HTTP que responde como MercadoPago, CallMeBot e Evolution.
+
+    Rotas:
+        POST /v1/payments               → cria pagamento PIX pendente
+        GET  /v1/payments/<id>          → status do pagamento (aprovado após approve())
+        POST /checkout/preferences      → cria preferência de cartão
+        GET  /callmebot/                → envio de mensagem do CallMeBot
+        *    /evolution/...             → qualquer chamada da Evolution API
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = {"mercadopago": 0, "callmebot": 0, "evolution": 0}
+        self._payments = {}
+        self._ids = itertools.count(900000001)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub._handle(self, "GET")
+
+            def do_POST(self):
+                stub._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                # Sem log por requisição para não poluir a saída do benchmark
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True, name="GatewayStub"
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def approve(self, payment_id):
+        """Marca o pagamento como aprovado, como se o cliente tivesse pago o PIX."""
+        with self._lock:
+            payment = self._payments.get(str(payment_id))
+            if payment:
+                payment.update(status="approved", status_detail="accredited")
+
+    def _count(self, service: str):
+        with self._lock:
+            self.calls[service] += 1
+
+    def _create_payment(self, payload: dict) -> dict:
+        with self._lock:
+            payment_id = str(next(self._ids))
+            payment = {
+                "id": int(payment_id),
+                "status": "pending",
+                "status_detail": "pending_waiting_transfer",
+                "transaction_amount": payload.get("transaction_amount"),
+                "external_reference": payload.get("external_reference"),
+                "date_approved": None,
+                "point_of_interaction": {
+                    "transaction_data": {
+                        "qr_code": f"00020126stub{payment_id}",
+                        "ticket_url": f"{self.url}/ticket/{payment_id}",
+                    }
+                },
+            }
+            self._payments[payment_id] = payment
+            return dict(payment)
+
+    def _route(self, method: str, path: str, payload: dict):
+        if path.startswith("/callmebot"):
+            self._count("callmebot")
+            return 200, "Message queued"
+
+        if path.startswith("/evolution"):
+            self._count("evolution")
+            return 201, {"key": {"id": "stub"}, "status": "PENDING"}
+
+        self._count("mercadopago")
+
+        if method == "POST" and path == "/v1/payments":
+            return 201, self._create_payment(payload)
+
+        if method == "POST" and path == "/checkout/preferences":
+            preference_id = next(self._ids)
+            return 201, {
+                "id": f"pref-{preference_id}",
+                "init_point": f"{self.url}/checkout/{preference_id}",
+            }
+
+        match = PAYMENT_PATH.match(path)
+        if method == "GET" and match:
+            with self._lock:
+                payment = self._payments.get(match.group("payment_id"))
+                payment = dict(payment) if payment else None
+            if payment is None:
+                return 404, {"message": "Payment not found", "status": 404}
+            return 200, payment
+
+        return 404, {"message": f"Rota não simulada: {method} {path}", "status": 404}
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        status, content = self._route(method, handler.path.split("?")[0], payload)
+
+        if isinstance(content, str):
+            data = content.encode()
+            content_type = "text/plain; charset=utf-8"
+        else:
+            data = json.dumps(content).encode()
+            content_type = "application/json"
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
@@ -0,0 +1,37 @@
+"""
+Backends de cache que registram acertos e falhas nas métricas (core.metrics).
+
+Mesma configuração dos backends originais; apenas get/get_many são
+instrumentados. As versões assíncronas (aget/aget_many) delegam para eles.
+"""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+from core import metrics
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, _MISSING, version=version, **kwargs)
+        if value is _MISSING:
+            metrics.record_cache_read(hits=0, misses=1)
+            return default
+        metrics.record_cache_read(hits=1, misses=0)
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, **kwargs)
+        metrics.record_cache_read(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.staticfiles, deploy=True)
+def static_build_check(app_configs, **kwargs):
+    """
+    Compara o build de estáticos com os templates e arquivos atuais.
+
+    Lê todos os fontes, por isso roda só no deploy
+    (manage.py check --deploy --tag staticfiles), uma vez e não em cada worker.
+    """
+    if not settings.COMPRESS_OFFLINE:
+        return []
+
+    from core.static_build import static_build_errors
+
+    return [
+        Error(error, hint="Rode 'python manage.py build_static'.", id="core.E001")
+        for error in static_build_errors()
+    ]
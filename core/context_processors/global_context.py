@@ -19,7 +19,8 @@ def global_context(request):
             
             from cart.views import get_cart
 
-            cart = get_cart(request)
+            # Só lê: visitantes sem carrinho não geram consultas nem ClientSession
+            cart = get_cart(request, create=False)
             cart_count = cart.total_quantity if cart else 0
     except Exception as e:
         logger.error(f"Error getting cart count: {e}")
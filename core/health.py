@@ -0,0 +1,150 @@
+"""
+Verificações de saúde da aplicação.
+
+- liveness (/health/live/): apenas o processo, sem banco, cache ou Redis. É a
+  usada pelo HEALTHCHECK do container: uma dependência lenta não deve
+  reiniciar workers saudáveis.
+- readiness (/health/ready/ e /health/): banco, cache e channel layer,
+  verificados em paralelo com timeout de HEALTH_CHECK_TIMEOUT segundos cada.
+  O resultado é reaproveitado por HEALTH_CHECK_CACHE_SECONDS segundos no
+  processo, e requisições simultâneas aguardam a mesma verificação.
+- diagnóstico (/health/details/, staff): verificação nova, com latência e erro
+  de cada dependência.
+
+Os logs são emitidos apenas quando o estado de uma dependência muda.
+"""
+
+import asyncio
+import os
+import time
+from logging import getLogger
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+logger = getLogger(__name__)
+
+STARTED_AT = time.monotonic()
+
+CACHE_KEY = "health_check"
+CHANNEL_GROUP = "health_check_test"
+
+# Último resultado da readiness no processo e verificação em andamento
+_last_report = None
+_last_checked_at = 0.0
+_inflight = None
+
+# Último estado conhecido de cada dependência (True = ok), para logar só mudanças
+_states: dict[str, bool] = {}
+
+
+def _check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def _check_cache():
+    cache.set(CACHE_KEY, "ok", 30)
+    if cache.get(CACHE_KEY) != "ok":
+        raise RuntimeError("falha ao ler/escrever")
+
+
+async def _check_channel_layer():
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        raise RuntimeError("channel layer não configurado")
+    await channel_layer.group_send(CHANNEL_GROUP, {"type": "health.check", "message": "ping"})
+
+
+CHECKS = {
+    "database": sync_to_async(_check_database),
+    "cache": sync_to_async(_check_cache),
+    "websocket": _check_channel_layer,
+}
+
+
+async def _run_check(check, timeout) -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), timeout)
+        error = None
+    except asyncio.TimeoutError:
+        error = f"timeout após {timeout}s"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "ok": error is None,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "error": error,
+    }
+
+
+def _log_state_changes(checks: dict):
+    for name, result in checks.items():
+        previous = _states.get(name)
+        _states[name] = result["ok"]
+        if previous == result["ok"]:
+            continue
+        if not result["ok"]:
+            logger.error(f"[HEALTH] {name} indisponível: {result['error']}")
+        elif previous is False:
+            logger.info(f"[HEALTH] {name} restabelecido ({result['latency_ms']} ms)")
+
+
+async def check_dependencies() -> dict:
+    """
+    Verifica todas as dependências em paralelo e atualiza o resultado em cache.
+
+    Returns:
+        dict: ready (bool), checks ({nome: {ok, latency_ms, error}}) e checked_at
+    """
+    global _last_report, _last_checked_at
+
+    timeout = settings.HEALTH_CHECK_TIMEOUT
+    results = await asyncio.gather(
+        *(_run_check(check, timeout) for check in CHECKS.values())
+    )
+    checks = dict(zip(CHECKS, results, strict=True))
+    _log_state_changes(checks)
+
+    report = {
+        "ready": all(result["ok"] for result in checks.values()),
+        "checks": checks,
+        "checked_at": timezone.now().isoformat(),
+    }
+    _last_report, _last_checked_at = report, time.monotonic()
+    return report
+
+
+async def get_readiness() -> dict:
+    """
+    Resultado da readiness, reaproveitado por HEALTH_CHECK_CACHE_SECONDS.
+    Requisições que chegam durante uma verificação aguardam a mesma execução.
+    """
+    global _inflight
+
+    if (
+        _last_report is not None
+        and time.monotonic() - _last_checked_at < settings.HEALTH_CHECK_CACHE_SECONDS
+    ):
+        return _last_report
+
+    loop = asyncio.get_running_loop()
+    if _inflight is None or _inflight.done() or _inflight.get_loop() is not loop:
+        _inflight = loop.create_task(check_dependencies())
+    # shield: uma requisição cancelada não cancela a verificação das demais
+    return await asyncio.shield(_inflight)
+
+
+def process_info() -> dict:
+    """Informações do processo atual para o diagnóstico."""
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.monotonic() - STARTED_AT),
+        "scheduler_mode": settings.SCHEDULER_MODE,
+    }
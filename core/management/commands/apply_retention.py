@@ -0,0 +1,89 @@
+"""
+Django management command para aplicar a retenção de dados.
+
+Remove sessões de cliente inativas e carrinhos abandonados e move os pedidos
+fechados antigos para o arquivo (ArchivedOrder). Os mesmos passos rodam todos
+os dias às 03:30 pelo scheduler.
+
+Uso:
+    python manage.py apply_retention                      # Usa as configurações RETENTION_*
+    python manage.py apply_retention --dry-run            # Apenas mostra o que seria feito
+    python manage.py apply_retention --order-days 180 --session-days 14
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = "Remove sessões/carrinhos inativos e arquiva pedidos fechados antigos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--order-days",
+            type=int,
+            default=settings.RETENTION_ORDER_DAYS,
+            help=(
+                "Arquiva pedidos fechados criados há mais de N dias "
+                f"(padrão: {settings.RETENTION_ORDER_DAYS})"
+            ),
+        )
+        parser.add_argument(
+            "--session-days",
+            type=int,
+            default=settings.RETENTION_SESSION_DAYS,
+            help=(
+                "Remove sessões sem atividade há mais de N dias "
+                f"(padrão: {settings.RETENTION_SESSION_DAYS})"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RETENTION_BATCH_SIZE,
+            help=f"Linhas por lote/transação (padrão: {settings.RETENTION_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas conta o que seria removido/arquivado, sem alterar nada",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["order_days"], options["session_days"], options["batch_size"]) < 1:
+            raise CommandError(
+                "❌ --order-days, --session-days e --batch-size devem ser maiores que zero"
+            )
+
+        dry_run = options["dry_run"]
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"🧹 Aplicando retenção{' (simulação)' if dry_run else ''}: "
+                f"pedidos fechados com mais de {options['order_days']} dias, "
+                f"sessões inativas há mais de {options['session_days']} dias"
+            )
+        )
+
+        started_at = time.monotonic()
+        result = run_retention(
+            order_days=options["order_days"],
+            session_days=options["session_days"],
+            batch_size=options["batch_size"],
+            dry_run=dry_run,
+        )
+        elapsed = time.monotonic() - started_at
+
+        verb = "seriam" if dry_run else "foram"
+        self.stdout.write(f"  👤 {result.sessions_deleted} sessão(ões) {verb} removida(s)")
+        self.stdout.write(f"  🛒 {result.carts_deleted} carrinho(s) {verb} removido(s)")
+        self.stdout.write(f"  📦 {result.orders_archived} pedido(s) {verb} arquivado(s)")
+        if result.reports_created:
+            self.stdout.write(
+                f"  📊 {result.reports_created} relatório(s) diário(s) gerado(s) antes do arquivamento"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Retenção concluída em {elapsed:.2f}s"))
@@ -0,0 +1,333 @@
+"""
+Django management command para o benchmark de carga do funil loja → checkout.
+
+Roda em um banco de teste isolado, populado por mock_products/mock_orders, com as
+APIs externas (MercadoPago, CallMeBot e Evolution) substituídas por stubs locais.
+Gera um relatório JSON com p50/p95/p99, consultas por requisição e throughput
+por endpoint, que pode ser comparado com o de outro commit.
+
+Uso:
+    python manage.py benchmark                                  # 20 sessões x 5 funis
+    python manage.py benchmark --sessions 50 --iterations 10
+    python manage.py benchmark --gateway-latency 80             # simula latência do gateway
+    python manage.py benchmark --compare main.json --max-regression 15
+"""
+
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from core.benchmark.funnel import (
+    FunnelBenchmark,
+    compare_reports,
+    install_query_counter,
+)
+from core.benchmark.stubs import GatewayStub
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Executa o benchmark de carga do funil loja → checkout e gera um relatório JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sessions", type=int, default=20, help="Sessões concorrentes (padrão: 20)"
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Funis completos por sessão (padrão: 5)",
+        )
+        parser.add_argument(
+            "--polls",
+            type=int,
+            default=3,
+            help="Consultas de status do pagamento antes do webhook (padrão: 3)",
+        )
+        parser.add_argument(
+            "--items", type=int, default=2, help="Produtos por pedido (padrão: 2)"
+        )
+        parser.add_argument(
+            "--payment-method",
+            choices=["pix", "dinheiro", "cartao_presencial"],
+            default="pix",
+            help="Método de pagamento usado no checkout (padrão: pix)",
+        )
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=15,
+            help="Produtos criados pelo mock_products (padrão: 15)",
+        )
+        parser.add_argument(
+            "--orders",
+            type=int,
+            default=50,
+            help="Pedidos históricos criados pelo mock_orders (padrão: 50)",
+        )
+        parser.add_argument(
+            "--gateway-latency",
+            type=int,
+            default=0,
+            help="Latência simulada das APIs externas em ms (padrão: 0)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=42, help="Semente dos dados e das sessões"
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark-report.json",
+            help="Arquivo do relatório JSON (padrão: benchmark-report.json)",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Relatório JSON anterior para comparar as métricas",
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help="Falha se alguma métrica piorar mais que esta porcentagem em relação a --compare",
+        )
+        parser.add_argument(
+            "--local-backends",
+            action="store_true",
+            help="Usa cache e channel layer em memória em vez dos configurados (Redis)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Mantém o banco de teste entre execuções",
+        )
+
+    def handle(self, *args, **options):
+        if options["sessions"] < 1 or options["iterations"] < 1:
+            raise CommandError("❌ --sessions e --iterations devem ser maiores que zero")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"❌ Não foi possível ler {options['compare']}: {e}")
+
+        self.stdout.write(self.style.HTTP_INFO("🚀 BENCHMARK DO FUNIL LOJA → CHECKOUT"))
+        self.stdout.write("=" * 60)
+
+        # SQLite em memória não suporta bem escrita concorrente entre threads
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tempfile.gettempdir(), "delivery-benchmark.sqlite3"
+            )
+
+        old_config = setup_databases(
+            verbosity=0,
+            interactive=False,
+            keepdb=options["keepdb"],
+            serialized_aliases=set(),
+        )
+        gateway = GatewayStub(latency=options["gateway_latency"] / 1000).start()
+
+        try:
+            with override_settings(**self.get_settings_overrides(gateway, options)):
+                self.seed_database(options)
+                report = self.run_benchmark(gateway, options)
+        finally:
+            gateway.stop()
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        output = Path(options["output"])
+        output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+        self.print_report(report)
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Relatório salvo em {output}"))
+
+        if baseline is not None:
+            self.print_comparison(report, baseline, options["max_regression"])
+
+    def get_settings_overrides(self, gateway: GatewayStub, options) -> dict:
+        overrides = {
+            "ALLOWED_HOSTS": ["testserver"],
+            "SECURE_SSL_REDIRECT": False,
+            "SESSION_COOKIE_SECURE": False,
+            "CSRF_COOKIE_SECURE": False,
+            "MP_BASE_API_URL": gateway.url,
+            "MP_ACCESS_TOKEN": settings.MP_ACCESS_TOKEN or "benchmark",
+            "NOTIFICATION_URL": f"{gateway.url}/notifications/",
+            "CALLMEBOT_API_URL": f"{gateway.url}/callmebot/",
+            "CALLMEBOT_API_KEY": "benchmark",
+            "CALLMEBOT_PHONE_NUMBER": "5511999999999",
+            "EVOLUTION_API_BASE_URL": f"{gateway.url}/evolution",
+            "EVOLUTION_API_KEY": "benchmark",
+        }
+
+        if options["local_backends"]:
+            overrides["CACHES"] = {
+                "default": {"BACKEND": "core.cache.InstrumentedLocMemCache"},
+                "sessions": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "benchmark-sessions",
+                },
+            }
+            overrides["CHANNEL_LAYERS"] = {
+                "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+            }
+
+        return overrides
+
+    def seed_database(self, options):
+        self.stdout.write("🌱 Populando banco de teste...")
+        random.seed(options["seed"])
+
+        if options["products"] > 0:
+            call_command("mock_products", count=options["products"], stdout=StringIO())
+        if options["orders"] > 0:
+            call_command("mock_orders", count=options["orders"], stdout=StringIO())
+
+        self.stdout.write(
+            f"   {Product.objects.filter(is_active=True).count()} produtos ativos"
+        )
+
+    def run_benchmark(self, gateway: GatewayStub, options) -> dict:
+        product_ids = list(
+            Product.objects.filter(is_active=True).values_list("id", flat=True)
+        )
+        if not product_ids:
+            raise CommandError("❌ Nenhum produto ativo para o benchmark (use --products)")
+
+        install_query_counter()
+
+        # Sem log de cada chamada HTTP feita pelas sessões e pelos serviços
+        for logger_name in ("httpx", "httpcore"):
+            logging.getLogger(logger_name).setLevel(logging.WARNING)
+
+        benchmark = FunnelBenchmark(
+            app=get_asgi_application(),
+            gateway=gateway,
+            product_ids=product_ids,
+            sessions=options["sessions"],
+            iterations=options["iterations"],
+            polls=options["polls"],
+            items_per_order=options["items"],
+            payment_method=options["payment_method"],
+            seed=options["seed"],
+        )
+
+        self.stdout.write(
+            f"🏃 {options['sessions']} sessões x {options['iterations']} funis "
+            f"({options['payment_method']}, latência do gateway {options['gateway_latency']}ms)"
+        )
+        results = asyncio.run(benchmark.run())
+
+        return {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "commit": self.get_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+                "options": {
+                    key: options[key]
+                    for key in (
+                        "sessions",
+                        "iterations",
+                        "polls",
+                        "items",
+                        "payment_method",
+                        "products",
+                        "orders",
+                        "gateway_latency",
+                        "seed",
+                    )
+                },
+            },
+            **results,
+        }
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, report: dict):
+        summary = report["summary"]
+        self.stdout.write("\n📊 RESULTADOS")
+        self.stdout.write("=" * 60)
+        self.stdout.write(
+            f"{'endpoint':<20}{'req':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'erros':>7}"
+        )
+        for endpoint, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<20}{stats['requests']:>6}{stats['p50_ms']:>9.1f}"
+                f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                f"{stats['queries_mean']:>9.1f}{stats['errors']:>7}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"⏱️  Duração: {summary['duration_s']}s")
+        self.stdout.write(
+            f"🚚 Throughput: {summary['throughput_rps']} req/s, "
+            f"{summary['funnels_per_s']} funis/s"
+        )
+        self.stdout.write(
+            f"✅ Funis completos: {summary['funnels_completed']}  "
+            f"❌ Falhas: {summary['funnels_failed']}"
+        )
+        for failure in report["failures"][:5]:
+            self.stdout.write(self.style.ERROR(f"   {failure}"))
+
+    def print_comparison(self, report: dict, baseline: dict, max_regression=None):
+        self.stdout.write(
+            f"\n🔍 Comparação com {baseline.get('meta', {}).get('commit') or 'relatório anterior'}"
+        )
+        self.stdout.write("=" * 60)
+
+        baseline_options = baseline.get("meta", {}).get("options")
+        if baseline_options and baseline_options != report["meta"]["options"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "⚠️  Os relatórios foram gerados com opções diferentes; a comparação pode não ser válida"
+                )
+            )
+
+        regressions = []
+        for change in compare_reports(report, baseline):
+            line = (
+                f"{change['endpoint']:<20}{change['metric']:<16}"
+                f"{change['before']:>10} → {change['after']:<10}"
+                f"{change['regression_pct']:>+7.1f}%"
+            )
+            if max_regression is not None and change["regression_pct"] > max_regression:
+                regressions.append(change)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"❌ {len(regressions)} métricas pioraram mais de {max_regression}%"
+            )
@@ -0,0 +1,50 @@
+"""
+Django management command para gerar os arquivos estáticos de produção.
+
+Roda na construção da imagem Docker, para que os containers iniciem sem
+collectstatic/compress. Gera os arquivos com hash no nome, as versões
+gzip/brotli e o manifest offline do django-compressor (ver core.static_build).
+
+Uso:
+    DEBUG=False python manage.py build_static
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.static_build import compress_compressor_output, write_build_stamp
+
+
+class Command(BaseCommand):
+    help = "Gera os estáticos de produção (hash, gzip/brotli e manifest do compressor)"
+
+    # O build roda antes de existir banco/estáticos; as verificações não se aplicam
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        if settings.DEBUG or not settings.COMPRESS_OFFLINE:
+            raise CommandError(
+                "❌ build_static deve rodar com DEBUG=False e COMPRESS_OFFLINE ativo"
+            )
+
+        started = time.monotonic()
+
+        self.stdout.write("📦 Coletando arquivos estáticos...")
+        call_command("collectstatic", interactive=False, clear=True, verbosity=0)
+
+        self.stdout.write("🗜️  Comprimindo blocos {% compress %} (offline)...")
+        call_command("compress", force=True, verbosity=0)
+        compressed = compress_compressor_output()
+
+        stamp = write_build_stamp()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Estáticos gerados em {time.monotonic() - started:.1f}s "
+                f"({compressed} arquivo(s) do compressor comprimido(s), "
+                f"impressão digital {stamp['fingerprint'][:12]})"
+            )
+        )
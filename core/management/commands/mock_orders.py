@@ -5,16 +5,32 @@ Uso:
     python manage.py mock_orders                    # Criar pedidos de demo
     python manage.py mock_orders --cleanup          # Remover pedidos de demo
     python manage.py mock_orders --count 50         # Criar quantidade específica de pedidos
+    python manage.py mock_orders --scale 1000000 --days 730 --workers 4
+                                                    # Gerar pedidos em massa para testes de escala
 """
 
 import random
-from datetime import timedelta
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, connections, transaction
+from django.db.models import Max
 from django.utils import timezone
 
+from core.mock_data import (
+    DEFAULT_PAYMENT_WEIGHTS,
+    DEFAULT_STATUS_WEIGHTS,
+    Chunk,
+    ScalePlan,
+    init_worker,
+    parse_weights,
+    reset_sequences,
+    run_chunk,
+    write_chunk,
+)
 from orders.models import Order, OrderItem
 from products.models import Product
 
@@ -35,9 +51,68 @@ class Command(BaseCommand):
             help="Número específico de pedidos para criar (0 = modo padrão)",
         )
 
+        scale = parser.add_argument_group("modo escala (--scale)")
+        scale.add_argument(
+            "--scale",
+            type=int,
+            default=0,
+            help="Gera N pedidos em massa com bulk_create/COPY, sem disparar signals",
+        )
+        scale.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="Data inicial no formato YYYY-MM-DD (padrão: hoje - --days)",
+        )
+        scale.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Data final no formato YYYY-MM-DD (padrão: hoje)",
+        )
+        scale.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Período em dias quando --start não é informado (padrão: 365)",
+        )
+        scale.add_argument(
+            "--statuses",
+            default=",".join(f"{k}:{v}" for k, v in DEFAULT_STATUS_WEIGHTS.items()),
+            help="Pesos dos status (padrão: %(default)s)",
+        )
+        scale.add_argument(
+            "--payment-methods",
+            default=",".join(f"{k}:{v}" for k, v in DEFAULT_PAYMENT_WEIGHTS.items()),
+            help="Pesos dos métodos de pagamento (padrão: %(default)s)",
+        )
+        scale.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Pedidos por lote/transação (padrão: 10000)",
+        )
+        scale.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processos gerando lotes em paralelo (padrão: 1)",
+        )
+        scale.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Semente para gerar sempre os mesmos dados (padrão: 42)",
+        )
+        scale.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="No PostgreSQL, usa bulk_create em vez de COPY",
+        )
+
     def handle(self, *args, **options):
         if options["cleanup"]:
             self.cleanup_demo_orders()
+        elif options["scale"] > 0:
+            self.create_scale_orders(options)
         else:
             count = options["count"]
             self.create_demo_orders(count if count > 0 else None)
@@ -802,3 +877,119 @@ class Command(BaseCommand):
 
         except Exception as e:
             raise CommandError(f"Erro ao criar pedidos: {e}")
+
+    def create_scale_orders(self, options):
+        """Gera pedidos em massa em lotes, opcionalmente em vários processos"""
+        total = options["scale"]
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+
+        end = options["end"] or timezone.localdate()
+        start = options["start"] or end - timedelta(days=options["days"] - 1)
+        if start > end:
+            raise CommandError("❌ A data inicial deve ser anterior ou igual à data final")
+        if batch_size < 1 or workers < 1:
+            raise CommandError("❌ --batch-size e --workers devem ser maiores que zero")
+
+        try:
+            status_weights = parse_weights(
+                options["statuses"], dict(Order.STATUS_CHOICES)
+            )
+            payment_weights = parse_weights(
+                options["payment_methods"], dict(Order.PAYMENT_CHOICES)
+            )
+        except ValueError as e:
+            raise CommandError(f"❌ {e}")
+
+        products = tuple(
+            Product.objects.filter(is_active=True)
+            .order_by("id")
+            .values_list("id", "price")
+        )
+        if not products:
+            raise CommandError(
+                "❌ Nenhum produto ativo encontrado! Crie produtos primeiro."
+            )
+
+        # SQLite só permite um escritor por vez
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write(
+                self.style.WARNING("⚠️ SQLite não suporta escrita paralela; usando 1 processo")
+            )
+            workers = 1
+
+        plan = ScalePlan(
+            start=start,
+            end=end,
+            now=timezone.now(),
+            seed=options["seed"],
+            products=products,
+            status_weights=tuple(status_weights.items()),
+            payment_weights=tuple(payment_weights.items()),
+            use_copy=connection.vendor == "postgresql" and not options["no_copy"],
+        )
+
+        # Reserva uma faixa de IDs para que cada lote seja independente
+        first_id = (Order.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+        chunks = [
+            Chunk(
+                index=index,
+                first_id=first_id + offset,
+                count=min(batch_size, total - offset),
+            )
+            for index, offset in enumerate(range(0, total, batch_size))
+        ]
+
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"🚀 Gerando {total} pedidos de {start} a {end} "
+                f"({len(chunks)} lotes, {workers} processo(s), "
+                f"{'COPY' if plan.use_copy else 'bulk_create'})"
+            )
+        )
+
+        started_at = time.monotonic()
+        orders_created = 0
+        items_created = 0
+
+        def report_progress(orders, items):
+            nonlocal orders_created, items_created
+            orders_created += orders
+            items_created += items
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(
+                f"   📊 {orders_created}/{total} pedidos "
+                f"({orders_created / max(elapsed, 1e-6):,.0f} pedidos/s)"
+            )
+
+        try:
+            if workers == 1:
+                for chunk in chunks:
+                    report_progress(*write_chunk(plan, chunk, batch_size))
+            else:
+                # Os processos filhos abrem suas próprias conexões
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=init_worker
+                ) as executor:
+                    futures = [
+                        executor.submit(run_chunk, plan, chunk, batch_size)
+                        for chunk in chunks
+                    ]
+                    for future in as_completed(futures):
+                        report_progress(*future.result())
+        except Exception as e:
+            raise CommandError(
+                f"Erro ao gerar pedidos ({orders_created} já gravados): {e}"
+            )
+        finally:
+            reset_sequences()
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🎉 {orders_created} pedidos e {items_created} itens criados em {elapsed:.1f}s"
+            )
+        )
+        self.stdout.write("🧹 Para remover: python manage.py mock_orders --cleanup")
@@ -0,0 +1,90 @@
+"""
+Django management command para medir a inicialização de um worker.
+
+Inicializa o Django (django.setup() + URLs) em processos novos e mostra o
+tempo total, a memória (RSS) do processo e o tempo de importação por pacote.
+Também avisa se alguma dependência pesada que deveria ser carregada sob
+demanda (WeasyPrint, Pillow, clientes HTTP) foi importada na inicialização.
+
+Uso:
+    python manage.py startup_benchmark                  # 3 execuções, 15 pacotes
+    python manage.py startup_benchmark --runs 5 --top 30
+    python manage.py startup_benchmark --output startup.json
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark.startup import measure_startup, summarize_runs
+
+
+class Command(BaseCommand):
+    help = "Mede o tempo de importação e a memória de inicialização de um worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs", type=int, default=3, help="Inicializações medidas (padrão: 3)"
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="Pacotes mais lentos exibidos (padrão: 15)"
+        )
+        parser.add_argument(
+            "--budget-ms",
+            type=int,
+            default=settings.STARTUP_IMPORT_BUDGET_MS,
+            help=(
+                "Falha se a inicialização passar deste tempo "
+                f"(padrão: {settings.STARTUP_IMPORT_BUDGET_MS})"
+            ),
+        )
+        parser.add_argument("--output", help="Salva o resultado em um arquivo JSON")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("❌ --runs deve ser maior que zero")
+
+        self.stdout.write(f"⏱️  Medindo {options['runs']} inicialização(ões)...")
+        try:
+            runs = [measure_startup(import_times=True) for _ in range(options["runs"])]
+        except RuntimeError as e:
+            raise CommandError(f"❌ {e}") from e
+        summary = summarize_runs(runs)
+
+        self.stdout.write("")
+        self.stdout.write(f"   django.setup(): {summary['setup_ms']:.0f} ms")
+        self.stdout.write(f"   URLs:           {summary['urlconf_ms']:.0f} ms")
+        self.stdout.write(f"   Total:          {summary['total_ms']:.0f} ms")
+        self.stdout.write(f"   RSS:            {summary['rss_mb']:.1f} MB")
+
+        self.stdout.write("")
+        self.stdout.write("📦 Pacotes mais lentos (tempo próprio de importação):")
+        packages = sorted(summary["packages"].items(), key=lambda item: -item[1])
+        for name, elapsed in packages[: options["top"]]:
+            self.stdout.write(f"   {elapsed:8.1f} ms  {name}")
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(summary, indent=2))
+            self.stdout.write(f"\n💾 Resultado salvo em {options['output']}")
+
+        self.stdout.write("")
+        if summary["eager_lazy_modules"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "⚠️  Carregados na inicialização (deveriam ser sob demanda): "
+                    + ", ".join(summary["eager_lazy_modules"])
+                )
+            )
+
+        if summary["total_ms"] > options["budget_ms"]:
+            raise CommandError(
+                f"❌ Inicialização levou {summary['total_ms']:.0f} ms "
+                f"(limite: {options['budget_ms']} ms)"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Inicialização dentro do limite ({options['budget_ms']} ms)"
+            )
+        )
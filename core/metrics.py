@@ -0,0 +1,392 @@
+"""
+Métricas da aplicação no formato texto do Prometheus.
+
+Registra, por view: latência das requisições, quantidade e tempo das consultas
+SQL e acertos/falhas do cache; e, por integração (MercadoPago, CallMeBot,
+Evolution), a duração das chamadas HTTP externas; as requisições avaliadas pelo
+rate limit (core.ratelimit); e os PDFs gerados pelo pool de renderização
+(reports.renderer).
+
+Todas as amostras são contadores (histogramas viram contadores por bucket), o que
+permite somar os valores de vários processos. Com METRICS_BACKEND=redis cada
+processo acumula os incrementos em memória e os envia ao Redis a cada
+METRICS_FLUSH_INTERVAL segundos; o endpoint de métricas lê o total agregado.
+"""
+
+import contextvars
+import re
+import threading
+import time
+from collections import defaultdict
+from logging import getLogger
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = getLogger(__name__)
+
+REDIS_KEY = "delivery:metrics"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Famílias de métricas: nome → (tipo, descrição)
+FAMILIES = {
+    "delivery_http_requests_total": (
+        "counter",
+        "Requisições HTTP por view, método e status.",
+    ),
+    "delivery_http_request_duration_seconds": (
+        "histogram",
+        "Latência das requisições HTTP por view.",
+    ),
+    "delivery_db_queries_total": ("counter", "Consultas SQL executadas por view."),
+    "delivery_db_query_duration_seconds_total": (
+        "counter",
+        "Tempo total gasto em consultas SQL por view.",
+    ),
+    "delivery_db_queries_per_request": (
+        "histogram",
+        "Quantidade de consultas SQL por requisição.",
+    ),
+    "delivery_cache_requests_total": (
+        "counter",
+        "Leituras do cache por view e resultado (hit/miss).",
+    ),
+    "delivery_external_request_duration_seconds": (
+        "histogram",
+        "Duração das chamadas HTTP para serviços externos.",
+    ),
+    "delivery_rate_limit_requests_total": (
+        "counter",
+        "Requisições avaliadas pelo rate limit por escopo e resultado.",
+    ),
+    "delivery_pdf_renders_total": (
+        "counter",
+        "PDFs enviados ao pool de renderização por resultado.",
+    ),
+    "delivery_pdf_render_duration_seconds": (
+        "histogram",
+        "Duração da geração de PDFs, incluindo a espera na fila.",
+    ),
+    "delivery_admin_notifications_total": (
+        "counter",
+        "Mensagens enviadas ao admin (CallMeBot) por modo e resultado.",
+    ),
+}
+
+_HISTOGRAM_SUFFIX = re.compile(r"_(bucket|sum|count)$")
+_LE_LABEL = re.compile(r'le="([^"]+)"')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+class RequestStats:
+    """Acumulador das consultas SQL da requisição em andamento."""
+
+    __slots__ = ("view", "queries", "query_time")
+
+    def __init__(self):
+        self.view = "unresolved"
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# Requisição em andamento (propagada para as threads do sync_to_async)
+_current_request = contextvars.ContextVar("metrics_current_request", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample_key(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return f"{name}{{{pairs}}}"
+
+
+def _family(key: str) -> str:
+    name = key.split("{", 1)[0]
+    if name in FAMILIES:
+        return name
+    return _HISTOGRAM_SUFFIX.sub("", name)
+
+
+def _sort_key(key: str):
+    # Buckets ordenados numericamente (le="10" depois de le="2.5")
+    match = _LE_LABEL.search(key)
+    le = float(match.group(1)) if match else 0.0
+    return (_family(key), _LE_LABEL.sub("", key), le)
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas do processo, seguro para uso entre threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._pending = defaultdict(float)
+        self._last_flush = time.monotonic()
+        self._redis = None
+        self._flushing = False
+        self._flush_error_logged = False
+
+    @property
+    def uses_redis(self) -> bool:
+        return settings.METRICS_BACKEND == "redis"
+
+    def inc(self, name: str, labels: dict | None = None, value: float = 1.0):
+        key = _sample_key(name, labels or {})
+        with self._lock:
+            if self.uses_redis:
+                self._pending[key] += value
+            else:
+                self._values[key] += value
+
+    def observe(self, name: str, labels: dict, value: float, buckets=LATENCY_BUCKETS):
+        """Registra uma observação no histograma (buckets cumulativos, _sum e _count)."""
+        updates = [
+            (_sample_key(f"{name}_bucket", {**labels, "le": bound}), 1.0)
+            for bound in buckets
+            if value <= bound
+        ]
+        updates.append((_sample_key(f"{name}_bucket", {**labels, "le": "+Inf"}), 1.0))
+        updates.append((_sample_key(f"{name}_sum", labels), value))
+        updates.append((_sample_key(f"{name}_count", labels), 1.0))
+
+        with self._lock:
+            target = self._pending if self.uses_redis else self._values
+            # Buckets não atingidos precisam existir com zero
+            for bound in buckets:
+                target[_sample_key(f"{name}_bucket", {**labels, "le": bound})] += 0.0
+            for key, amount in updates:
+                target[key] += amount
+
+    def _get_redis(self):
+        if self._redis is None:
+            # Carregado só com METRICS_BACKEND=redis, no primeiro envio
+            import redis
+
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=2, socket_connect_timeout=2
+            )
+        return self._redis
+
+    def maybe_flush(self):
+        """
+        Envia os incrementos acumulados ao Redis se o intervalo já passou.
+
+        O envio roda em uma thread para não bloquear o event loop da requisição.
+        """
+        if not self.uses_redis:
+            return
+        if time.monotonic() - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+
+        with self._lock:
+            if self._flushing:
+                return
+            self._flushing = True
+            self._last_flush = time.monotonic()
+
+        threading.Thread(target=self.flush, daemon=True, name="MetricsFlush").start()
+
+    def flush(self):
+        import redis
+
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+            self._flushing = True
+
+        try:
+            if not pending:
+                return
+
+            pipeline = self._get_redis().pipeline(transaction=False)
+            for key, value in pending.items():
+                pipeline.hincrbyfloat(REDIS_KEY, key, value)
+            pipeline.execute()
+            self._flush_error_logged = False
+        except redis.RedisError as e:
+            # Devolve os incrementos para a próxima tentativa
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+            if not self._flush_error_logged:
+                logger.error(
+                    f"[METRICS] Erro ao enviar métricas ao Redis: {type(e).__name__}: {str(e)}"
+                )
+                self._flush_error_logged = True
+        finally:
+            self._flushing = False
+
+    def snapshot(self) -> dict[str, float]:
+        if not self.uses_redis:
+            with self._lock:
+                return dict(self._values)
+
+        self.flush()
+        raw = self._get_redis().hgetall(REDIS_KEY)
+        return {key.decode(): float(value) for key, value in raw.items()}
+
+    def render(self) -> str:
+        """Gera a exposição no formato texto do Prometheus (versão 0.0.4)."""
+        lines = []
+        current_family = None
+        for key, value in sorted(self.snapshot().items(), key=lambda item: _sort_key(item[0])):
+            family = _family(key)
+            if family != current_family:
+                metric_type, help_text = FAMILIES.get(family, ("untyped", ""))
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {metric_type}")
+                current_family = family
+            lines.append(f"{key} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._pending.clear()
+
+
+registry = MetricsRegistry()
+
+
+# --- Requisições e SQL ---
+
+
+def start_request() -> tuple[RequestStats, contextvars.Token]:
+    stats = RequestStats()
+    return stats, _current_request.set(stats)
+
+
+def finish_request(stats: RequestStats, token, method: str, status: int, duration: float):
+    _current_request.reset(token)
+
+    labels = {"view": stats.view, "method": method}
+    registry.inc(
+        "delivery_http_requests_total", {**labels, "status": f"{status // 100}xx"}
+    )
+    registry.observe("delivery_http_request_duration_seconds", labels, duration)
+
+    view_labels = {"view": stats.view}
+    registry.inc("delivery_db_queries_total", view_labels, stats.queries)
+    registry.inc(
+        "delivery_db_query_duration_seconds_total", view_labels, stats.query_time
+    )
+    registry.observe(
+        "delivery_db_queries_per_request",
+        view_labels,
+        stats.queries,
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+    registry.maybe_flush()
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - start
+
+
+def _install_on_connection(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def install():
+    """Instala o execute_wrapper em todas as conexões abertas a partir de agora."""
+    connection_created.connect(_install_on_connection, dispatch_uid="core_metrics")
+
+
+# --- Cache ---
+
+
+def record_cache_read(hits: int, misses: int):
+    stats = _current_request.get()
+    view = stats.view if stats is not None else "background"
+    if hits:
+        registry.inc("delivery_cache_requests_total", {"view": view, "result": "hit"}, hits)
+    if misses:
+        registry.inc(
+            "delivery_cache_requests_total", {"view": view, "result": "miss"}, misses
+        )
+
+
+# --- Chamadas externas ---
+
+
+def external_service_name(url) -> str:
+    """Identifica o serviço externo pelo host da URL."""
+    host = urlparse(str(url)).hostname or "unknown"
+    services = {
+        "mercadopago": settings.MP_BASE_API_URL,
+        "callmebot": settings.CALLMEBOT_API_URL,
+        "evolution": settings.EVOLUTION_API_BASE_URL,
+    }
+    for name, base_url in services.items():
+        if base_url and urlparse(base_url).hostname == host:
+            return name
+    return host
+
+
+def record_external_call(url, method: str, status, duration: float):
+    registry.observe(
+        "delivery_external_request_duration_seconds",
+        {
+            "service": external_service_name(url),
+            "method": method,
+            "status": status,
+        },
+        duration,
+    )
+
+
+# --- Rate limit ---
+
+
+def record_rate_limit(scope: str, result: str):
+    """Registra uma requisição avaliada pelo rate limit (allowed, limited ou error)."""
+    registry.inc("delivery_rate_limit_requests_total", {"scope": scope, "result": result})
+
+
+def rate_limit_counters() -> dict:
+    """Totais do rate limit por escopo: {escopo: {resultado: quantidade}}."""
+    counters = {}
+    for key, value in registry.snapshot().items():
+        if _family(key) != "delivery_rate_limit_requests_total":
+            continue
+        labels = dict(_LABEL.findall(key))
+        counters.setdefault(labels["scope"], {})[labels["result"]] = int(value)
+    return counters
+
+
+# --- Renderização de PDFs ---
+
+
+def record_pdf_render(result: str, duration: float | None = None):
+    """Registra um PDF do pool de renderização (ok, timeout, rejected ou error)."""
+    registry.inc("delivery_pdf_renders_total", {"result": result})
+    if duration is not None:
+        registry.observe("delivery_pdf_render_duration_seconds", {"result": result}, duration)
+
+
+def record_admin_notification(mode: str, result: str):
+    """Registra uma mensagem ao admin (individual ou digest; sent ou error)."""
+    registry.inc("delivery_admin_notifications_total", {"mode": mode, "result": result})
@@ -0,0 +1,116 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import metrics, routers
+
+
+class MetricsMiddleware:
+    """
+    Registra latência, consultas SQL e leituras do cache de cada requisição.
+
+    Funciona tanto com views síncronas quanto assíncronas, sem trocar de thread.
+    As métricas são agrupadas pelo nome da rota (ex.: "checkout:checkout");
+    requisições sem rota (404) ficam em "unresolved".
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS_ENABLED
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats, token = metrics.start_request()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.finish_request(
+                stats, token, request.method, status, time.perf_counter() - start
+            )
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        stats, token = metrics.start_request()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.finish_request(
+                stats, token, request.method, status, time.perf_counter() - start
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = metrics._current_request.get()
+        if stats is not None and request.resolver_match:
+            stats.view = request.resolver_match.view_name or request.resolver_match.route
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes para a réplica do banco (core.routers).
+
+    Requisições que gravam no banco recebem um cookie curto; enquanto ele existir,
+    as leituras daquele navegador não vão para a réplica. Só é ativado quando
+    DATABASE_REPLICA_URL está configurado.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not routers.replica_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = routers.start_request(routers.STICKY_COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.finish_request(token)
+        return self._stick(response, state)
+
+    async def __acall__(self, request):
+        token = routers.start_request(routers.STICKY_COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = routers.finish_request(token)
+        return self._stick(response, state)
+
+    def _stick(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                routers.STICKY_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,367 @@
+"""
+Gerador de pedidos em massa para testes de escala (`mock_orders --scale`).
+
+Os pedidos são gerados em lotes independentes: cada lote tem sua própria semente
+e uma faixa de IDs reservada, então o resultado é o mesmo com qualquer número de
+processos. Os lotes são gravados com bulk_create ou, no PostgreSQL, com COPY.
+Nenhum dos dois dispara os signals de post_save (WebSocket do dashboard).
+"""
+
+import io
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+import django
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Pesos padrão (status do pedido e métodos de pagamento)
+DEFAULT_STATUS_WEIGHTS = {"completed": 85, "cancelled": 10, "pending": 5}
+DEFAULT_PAYMENT_WEIGHTS = {
+    "pix": 45,
+    "dinheiro": 20,
+    "cartao_online": 15,
+    "cartao_presencial": 20,
+}
+
+# Movimento por hora do dia: picos no almoço e no jantar
+HOUR_WEIGHTS = [
+    0, 0, 0, 0, 0, 0, 1, 2, 4, 5, 7, 14,
+    18, 14, 6, 4, 5, 7, 12, 16, 15, 10, 5, 2,
+]  # fmt: skip
+
+# Sexta, sábado e domingo têm mais pedidos
+WEEKDAY_WEIGHTS = [1.0, 0.9, 1.0, 1.1, 1.4, 1.6, 1.3]
+
+ITEMS_PER_ORDER_WEIGHTS = {1: 45, 2: 30, 3: 17, 4: 8}
+QUANTITY_WEIGHTS = {1: 70, 2: 22, 3: 8}
+
+CUSTOMER_POOL_SIZE = 5000
+
+FIRST_NAMES = [
+    "Maria", "João", "Ana", "Carlos", "Lucia", "Pedro", "Sandra", "Roberto",
+    "Fernanda", "Marcos", "Juliana", "Rafael", "Patrícia", "Bruno", "Camila",
+    "Diego", "Larissa", "Thiago", "Beatriz", "Gustavo",
+]  # fmt: skip
+LAST_NAMES = [
+    "Silva", "Santos", "Costa", "Oliveira", "Ferreira", "Almeida", "Lima",
+    "Dias", "Rocha", "Pereira", "Souza", "Gomes", "Ribeiro", "Martins", "Barbosa",
+]  # fmt: skip
+STREETS = [
+    "Rua das Flores", "Av. Principal", "Rua do Comércio", "Alameda dos Pássaros",
+    "Rua da Paz", "Av. das Nações", "Rua Nova Esperança", "Alameda Central",
+    "Rua do Sol", "Av. da Liberdade",
+]  # fmt: skip
+DISTRICTS = ["Centro", "Jardim América", "Vila Nova", "Bela Vista", "Jardim Europa"]
+
+# Marcação usada pelo `mock_orders --cleanup`
+DEMO_SUFFIX = "(DEMO-SCALE)"
+
+
+@dataclass(frozen=True)
+class ScalePlan:
+    """Parâmetros compartilhados por todos os lotes (precisa ser serializável)."""
+
+    start: date
+    end: date
+    now: datetime
+    seed: int
+    products: tuple[tuple[int, Decimal], ...]
+    status_weights: tuple[tuple[str, int], ...]
+    payment_weights: tuple[tuple[str, int], ...]
+    use_copy: bool
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    first_id: int
+    count: int
+
+
+def parse_weights(value: str, choices) -> dict[str, int]:
+    """
+    Converte "pix:40,dinheiro:60" em {"pix": 40, "dinheiro": 60}.
+
+    Raises:
+        ValueError: Se alguma chave não estiver em choices ou o peso for inválido.
+    """
+    weights = {}
+    for part in value.split(","):
+        key, _, weight = part.strip().partition(":")
+        if key not in choices:
+            raise ValueError(f"'{key}' inválido (opções: {', '.join(choices)})")
+        weights[key] = int(weight or 1)
+        if weights[key] < 0:
+            raise ValueError(f"Peso negativo para '{key}'")
+
+    if not any(weights.values()):
+        raise ValueError("Informe ao menos um peso maior que zero")
+    return weights
+
+
+@lru_cache(maxsize=4)
+def _customer_pool(seed: int) -> list[tuple[str, str, str]]:
+    """Clientes recorrentes (nome, telefone, endereço), iguais em todos os processos."""
+    rng = random.Random(seed)
+    return [
+        (
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"119{rng.randrange(10**8):08d}",
+            f"{rng.choice(STREETS)}, {rng.randint(1, 2000)} - {rng.choice(DISTRICTS)}",
+        )
+        for _ in range(CUSTOMER_POOL_SIZE)
+    ]
+
+
+def _cumulative(weights) -> list[float]:
+    total = 0.0
+    cumulative = []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+@lru_cache(maxsize=4)
+def _distributions(plan: ScalePlan) -> dict:
+    """Pré-calcula as distribuições usadas pelos lotes."""
+    days = [
+        plan.start + timedelta(days=offset)
+        for offset in range((plan.end - plan.start).days + 1)
+    ]
+    # Crescimento gradual do movimento ao longo do período (60% → 100%)
+    growth = [0.6 + 0.4 * (i / max(len(days) - 1, 1)) for i in range(len(days))]
+    day_weights = [
+        WEEKDAY_WEIGHTS[day.weekday()] * growth[i] for i, day in enumerate(days)
+    ]
+
+    # Popularidade dos produtos: poucos produtos concentram a maior parte das vendas
+    product_ranks = list(range(len(plan.products)))
+    random.Random(plan.seed).shuffle(product_ranks)
+    product_weights = [1 / (rank + 1) ** 0.8 for rank in product_ranks]
+
+    customer_weights = [1 / (rank + 1) ** 0.5 for rank in range(CUSTOMER_POOL_SIZE)]
+
+    return {
+        "days": days,
+        "day_weights": _cumulative(day_weights),
+        "hour_weights": _cumulative(HOUR_WEIGHTS),
+        "product_weights": _cumulative(product_weights),
+        "customer_weights": _cumulative(customer_weights),
+        "statuses": [status for status, _ in plan.status_weights],
+        "status_weights": _cumulative(weight for _, weight in plan.status_weights),
+        "methods": [method for method, _ in plan.payment_weights],
+        "method_weights": _cumulative(weight for _, weight in plan.payment_weights),
+    }
+
+
+def _payment_status(rng: random.Random, status: str, method: str) -> str:
+    if status == "completed":
+        return "paid"
+    if status == "cancelled":
+        return "cancelled"
+    # Pedido pendente pago online aguardando entrega
+    if method in ("pix", "cartao_online") and rng.random() < 0.5:
+        return "paid"
+    return "pending"
+
+
+def build_chunk(plan: ScalePlan, chunk: Chunk):
+    """
+    Gera os pedidos e itens de um lote.
+
+    Returns:
+        tuple[list[Order], list[OrderItem]]
+    """
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    rng = random.Random(f"{plan.seed}:{chunk.index}")
+    dist = _distributions(plan)
+    customers = _customer_pool(plan.seed)
+    tz = timezone.get_current_timezone()
+
+    days = rng.choices(dist["days"], cum_weights=dist["day_weights"], k=chunk.count)
+    hours = rng.choices(range(24), cum_weights=dist["hour_weights"], k=chunk.count)
+    customer_picks = rng.choices(
+        customers, cum_weights=dist["customer_weights"], k=chunk.count
+    )
+    statuses = rng.choices(
+        dist["statuses"], cum_weights=dist["status_weights"], k=chunk.count
+    )
+    methods = rng.choices(
+        dist["methods"], cum_weights=dist["method_weights"], k=chunk.count
+    )
+
+    orders = []
+    items = []
+    for offset in range(chunk.count):
+        order_id = chunk.first_id + offset
+        created_at = datetime.combine(
+            days[offset],
+            time(hours[offset], rng.randrange(60), rng.randrange(60)),
+            tzinfo=tz,
+        )
+        if created_at > plan.now:
+            created_at = plan.now - timedelta(minutes=rng.randint(1, 180))
+
+        # Itens do pedido (produtos repetidos são somados)
+        quantities = {}
+        num_items = rng.choices(
+            list(ITEMS_PER_ORDER_WEIGHTS), list(ITEMS_PER_ORDER_WEIGHTS.values())
+        )[0]
+        for index in rng.choices(
+            range(len(plan.products)), cum_weights=dist["product_weights"], k=num_items
+        ):
+            quantity = rng.choices(
+                list(QUANTITY_WEIGHTS), list(QUANTITY_WEIGHTS.values())
+            )[0]
+            quantities[index] = quantities.get(index, 0) + quantity
+
+        total = Decimal("0.00")
+        for index, quantity in quantities.items():
+            product_id, price = plan.products[index]
+            items.append(
+                OrderItem(order_id=order_id, product_id=product_id, quantity=quantity)
+            )
+            total += price * quantity
+
+        status = statuses[offset]
+        method = methods[offset]
+        payment_status = _payment_status(rng, status, method)
+
+        cash_value = None
+        if method == "dinheiro":
+            # Valor entregue arredondado para a próxima nota
+            note = rng.choice([10, 20, 50, 100])
+            cash_value = Decimal((int(total) // note + 1) * note)
+
+        name, phone, address = customer_picks[offset]
+        orders.append(
+            Order(
+                id=order_id,
+                customer_name=f"{name} {DEMO_SUFFIX}",
+                phone=phone,
+                address=address,
+                payment_method=method,
+                cash_value=cash_value,
+                payment_status=payment_status,
+                payment_id=(
+                    str(order_id + 10**9)
+                    if payment_status == "paid" and method in ("pix", "cartao_online")
+                    else None
+                ),
+                status=status,
+                created_at=created_at,
+            )
+        )
+
+    return orders, items
+
+
+@contextmanager
+def _keep_created_at(model):
+    """Desativa o auto_now_add de created_at para gravar a data gerada."""
+    field = model._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(cursor, model, objs, skip_pk=False):
+    """Grava os objetos com COPY ... FROM STDIN (PostgreSQL)."""
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not (skip_pk and field.primary_key)
+    ]
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write(
+            "\t".join(
+                _copy_value(
+                    field.get_db_prep_save(getattr(obj, field.attname), connection)
+                )
+                for field in fields
+            )
+        )
+        buffer.write("\n")
+    buffer.seek(0)
+
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    cursor.copy_expert(
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN",
+        buffer,
+    )
+
+
+def write_chunk(plan: ScalePlan, chunk: Chunk, batch_size: int = 5000) -> tuple[int, int]:
+    """
+    Gera e grava um lote em uma transação.
+
+    Returns:
+        tuple[int, int]: Quantidade de pedidos e de itens gravados.
+    """
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    orders, items = build_chunk(plan, chunk)
+
+    with transaction.atomic():
+        if plan.use_copy:
+            with connection.cursor() as cursor:
+                _copy_rows(cursor, Order, orders)
+                _copy_rows(cursor, OrderItem, items, skip_pk=True)
+        else:
+            with _keep_created_at(Order):
+                Order.objects.bulk_create(orders, batch_size=batch_size)
+            OrderItem.objects.bulk_create(items, batch_size=batch_size)
+
+    return len(orders), len(items)
+
+
+def init_worker():
+    """Inicializa o Django nos processos do pool (necessário com spawn)."""
+    if not apps.ready:
+        django.setup()
+
+
+def run_chunk(plan: ScalePlan, chunk: Chunk, batch_size: int = 5000) -> tuple[int, int]:
+    """Ponto de entrada dos processos do pool."""
+    try:
+        return write_chunk(plan, chunk, batch_size)
+    finally:
+        connection.close()
+
+
+def reset_sequences():
+    """Ajusta as sequences depois de inserir pedidos com IDs explícitos."""
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    statements = connection.ops.sequence_reset_sql(no_style(), [Order, OrderItem])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,281 @@
+"""
+Limite de requisições por cliente com token bucket.
+
+Cada escopo (RATE_LIMITS) tem um balde por cliente com capacidade igual ao
+limite e reposição contínua: "30/m" permite rajadas de 30 requisições e
+depois uma a cada 2 segundos. Requisições sem ficha recebem 429 com
+Retry-After antes de chegar ao ORM ou às APIs externas.
+
+Com RATE_LIMIT_BACKEND=redis os baldes ficam no Redis e são atualizados
+atomicamente por um script Lua (valem para todos os workers); com "memory"
+cada processo tem os seus. Se o Redis falhar, as requisições são liberadas.
+
+O cliente é identificado pela ClientSession (ou sessão do Django), pelo IP ou
+pelo usuário logado, conforme o argumento key do decorator.
+"""
+
+import functools
+import math
+import threading
+import time
+from logging import getLogger
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from core.metrics import record_rate_limit
+from utils.session import CLIENT_SESSION_KEY, get_client_ip
+
+logger = getLogger(__name__)
+
+REDIS_KEY_PREFIX = "delivery:ratelimit"
+
+PERIODS = {"s": 1, "m": 60, "h": 3600}
+
+# Repõe as fichas pelo tempo decorrido e consome uma, se houver.
+# Usa o relógio do Redis para que todos os workers concordem.
+# Retorna {permitido (0/1), milissegundos até a próxima ficha}
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) / rate)
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate) + 1000)
+return {allowed, retry_ms}
+"""
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """
+    Converte "30/m" em (capacidade, fichas por milissegundo).
+
+    Raises:
+        ValueError: Se o formato for inválido
+    """
+    try:
+        amount, period = rate.split("/")
+        capacity = int(amount)
+        seconds = PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Limite inválido: {rate!r} (use <quantidade>/<s|m|h>)")
+    if capacity < 1:
+        raise ValueError(f"Limite inválido: {rate!r} (quantidade deve ser positiva)")
+    return capacity, capacity / (seconds * 1000)
+
+
+class MemoryTokenBuckets:
+    """
+    Baldes no próprio processo (desenvolvimento ou worker único).
+
+    Um balde cheio equivale a um balde inexistente: como o PEXPIRE no Redis,
+    os baldes que já se reabasteceram são removidos (varredura a cada
+    prune_interval segundos), para que clientes de passagem não acumulem memória.
+    """
+
+    def __init__(self, prune_interval: float = 60):
+        self._lock = threading.Lock()
+        # {chave: (fichas, instante da leitura, instante em que o balde estará cheio)}
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._prune_interval_ms = prune_interval * 1000
+        self._next_prune = time.monotonic() * 1000 + self._prune_interval_ms
+
+    def hit(self, key: str, capacity: int, rate: float) -> tuple[bool, int]:
+        now = time.monotonic() * 1000
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+
+            tokens, ts, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if allowed:
+                return True, 0
+            return False, math.ceil((1 - tokens) / rate)
+
+    def _prune(self, now: float):
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+        self._next_prune = now + self._prune_interval_ms
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """Baldes no Redis, compartilhados entre workers e containers."""
+
+    def __init__(self):
+        self._script = None
+        self._lock = threading.Lock()
+
+    def _get_script(self):
+        with self._lock:
+            if self._script is None:
+                import redis
+
+                client = redis.Redis.from_url(
+                    settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+                )
+                self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+            return self._script
+
+    def hit(self, key: str, capacity: int, rate: float) -> tuple[bool, int]:
+        allowed, retry_ms = self._get_script()(
+            keys=[f"{REDIS_KEY_PREFIX}:{key}"], args=[capacity, repr(rate)]
+        )
+        return bool(allowed), int(retry_ms)
+
+
+_memory_buckets = MemoryTokenBuckets()
+_redis_buckets = RedisTokenBuckets()
+_redis_error_logged = False
+
+
+def _get_buckets():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return _redis_buckets
+    return _memory_buckets
+
+
+def client_identity(request, key: str) -> str:
+    """
+    Identifica o cliente para o balde.
+
+    key:
+        "client": ClientSession, senão a sessão do Django, senão o IP
+        "user": usuário logado, senão o IP
+        "ip": IP do cliente
+    """
+    if key == "client":
+        client_session_id = request.session.get(CLIENT_SESSION_KEY)
+        if client_session_id:
+            return f"cs:{client_session_id}"
+        if request.session.session_key:
+            return f"s:{request.session.session_key}"
+    elif key == "user":
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"u:{user.pk}"
+    elif key != "ip":
+        raise ValueError(f"Chave de rate limit desconhecida: {key!r}")
+    return f"ip:{get_client_ip(request)}"
+
+
+def check_rate_limit(request, scope: str, key: str = "client") -> int | None:
+    """
+    Consome uma ficha do balde do cliente no escopo.
+
+    Returns:
+        int | None: Segundos até a próxima ficha se o limite foi atingido,
+        None se a requisição pode seguir
+    """
+    global _redis_error_logged
+
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+
+    capacity, rate = parse_rate(settings.RATE_LIMITS[scope])
+    identity = client_identity(request, key)
+    try:
+        allowed, retry_ms = _get_buckets().hit(f"{scope}:{identity}", capacity, rate)
+        _redis_error_logged = False
+    except Exception as e:
+        # Falha no Redis não pode derrubar a loja: libera a requisição
+        if not _redis_error_logged:
+            logger.error(
+                f"[RATELIMIT] Erro ao consultar os baldes, liberando requisições: "
+                f"{type(e).__name__}: {str(e)}"
+            )
+            _redis_error_logged = True
+        record_rate_limit(scope, "error")
+        return None
+
+    if allowed:
+        record_rate_limit(scope, "allowed")
+        return None
+
+    record_rate_limit(scope, "limited")
+    logger.debug(f"[RATELIMIT] Limite de {scope} atingido por {identity}")
+    return max(1, math.ceil(retry_ms / 1000))
+
+
+# Sessão e Redis são síncronos: nas views async a verificação roda fora do event loop
+acheck_rate_limit = sync_to_async(check_rate_limit, thread_sensitive=False)
+
+
+def rate_limited_response(request, retry_after: int) -> HttpResponse:
+    message = "Muitas requisições. Aguarde alguns segundos e tente novamente."
+    if "text/html" in request.headers.get("Accept", ""):
+        response = HttpResponse(
+            message, status=429, content_type="text/plain; charset=utf-8"
+        )
+    else:
+        # "error" é lido pelo carrinho e "message" pela página de pagamento
+        response = JsonResponse(
+            {"status": "error", "error": message, "message": message}, status=429
+        )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def rate_limit(scope: str, key: str = "client"):
+    """
+    Decorator para views (síncronas ou assíncronas) limitadas por RATE_LIMITS[scope].
+
+    Uso:
+        @rate_limit("cart")
+        def increase_cart_item(request): ...
+
+        @method_decorator(rate_limit("cart"), name="post")
+        class AddToCartView(View): ...
+
+    Em métodos async de class-based views use acheck_rate_limit diretamente
+    (method_decorator não preserva métodos async).
+    """
+    if scope not in settings.RATE_LIMITS:
+        raise ValueError(f"Escopo de rate limit não configurado: {scope!r}")
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            @functools.wraps(view_func)
+            async def _async_view(request, *args, **kwargs):
+                retry_after = await acheck_rate_limit(request, scope, key)
+                if retry_after is not None:
+                    return rate_limited_response(request, retry_after)
+                return await view_func(request, *args, **kwargs)
+
+            return _async_view
+
+        @functools.wraps(view_func)
+        def _view(request, *args, **kwargs):
+            retry_after = check_rate_limit(request, scope, key)
+            if retry_after is not None:
+                return rate_limited_response(request, retry_after)
+            return view_func(request, *args, **kwargs)
+
+        return _view
+
+    return decorator
@@ -0,0 +1,239 @@
+"""
+Retenção de dados: mantém as tabelas quentes do tamanho do conjunto de trabalho.
+
+- Sessões de cliente (ClientSession) inativas e seus carrinhos são removidos.
+- Carrinhos sem sessão (órfãos) antigos são removidos.
+- Pedidos fechados (finalizados ou totalmente cancelados) mais antigos que o
+  horizonte são movidos para ArchivedOrder/ArchivedOrderItem. Antes de arquivar,
+  os relatórios diários dos dias envolvidos são gerados, para que os resumos
+  continuem no DailyReport.
+
+Tudo é feito em lotes pequenos (uma transação por lote), para não segurar
+locks nem carregar milhares de linhas na memória de uma vez.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from importlib import import_module
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from cart.models import Cart
+from checkout.signals import suppress_order_updates
+from core.models import ClientSession
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order
+from reports.tasks import backfill_daily_reports
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class RetentionResult:
+    sessions_deleted: int = 0
+    carts_deleted: int = 0
+    django_sessions_cleared: bool = False
+    orders_archived: int = 0
+    reports_created: int = 0
+
+
+def _batches(queryset, batch_size):
+    """Gera listas de ids do queryset, em ordem, com até batch_size ids cada."""
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def purge_inactive_sessions(cutoff, batch_size, dry_run=False):
+    """
+    Remove as ClientSession sem atividade desde cutoff, junto com os carrinhos.
+
+    Os pedidos dessas sessões são mantidos (client_session vira NULL).
+
+    Returns:
+        tuple: (sessões removidas, carrinhos removidos)
+    """
+    sessions = ClientSession.objects.filter(last_activity__lt=cutoff)
+    if dry_run:
+        return sessions.count(), Cart.objects.filter(client_session__in=sessions).count()
+
+    sessions_deleted = carts_deleted = 0
+    for ids in _batches(sessions, batch_size):
+        with transaction.atomic():
+            _, by_model = Cart.objects.filter(client_session_id__in=ids).delete()
+            carts_deleted += by_model.get(Cart._meta.label, 0)
+            ClientSession.objects.filter(pk__in=ids).delete()
+        sessions_deleted += len(ids)
+
+    return sessions_deleted, carts_deleted
+
+
+def purge_orphan_carts(cutoff, batch_size, dry_run=False):
+    """Remove carrinhos sem sessão criados antes de cutoff."""
+    carts = Cart.objects.filter(client_session__isnull=True, created_at__lt=cutoff)
+    if dry_run:
+        return carts.count()
+
+    deleted = 0
+    for ids in _batches(carts, batch_size):
+        Cart.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+    return deleted
+
+
+def clear_expired_django_sessions():
+    """Remove as sessões expiradas do Django (equivalente ao clearsessions)."""
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        # Backends como cache expiram as sessões sozinhos
+        return False
+    return True
+
+
+def _archive_batch(ids):
+    orders = Order.objects.filter(pk__in=ids).prefetch_related("items__product")
+
+    archived_orders = []
+    archived_items = []
+    for order in orders:
+        items = list(order.items.all())
+        archived_orders.append(
+            ArchivedOrder(
+                id=order.id,
+                customer_id=order.customer_id,
+                customer_name=order.customer_name,
+                phone=order.phone,
+                cpf=order.cpf,
+                address=order.address,
+                payment_method=order.payment_method,
+                cash_value=order.cash_value,
+                payment_status=order.payment_status,
+                payment_id=order.payment_id,
+                status=order.status,
+                total_price=sum(
+                    (item.quantity * item.product.price for item in items), 0
+                ),
+                created_at=order.created_at,
+            )
+        )
+        archived_items.extend(
+            ArchivedOrderItem(
+                order_id=order.id,
+                product_id=item.product_id,
+                product_name=item.product.name,
+                unit_price=item.product.price,
+                quantity=item.quantity,
+            )
+            for item in items
+        )
+
+    with transaction.atomic(), suppress_order_updates():
+        ArchivedOrder.objects.bulk_create(archived_orders)
+        ArchivedOrderItem.objects.bulk_create(archived_items)
+        Order.objects.filter(pk__in=ids).delete()
+
+    return len(archived_orders)
+
+
+def archive_closed_orders(cutoff, batch_size, dry_run=False):
+    """
+    Move os pedidos fechados criados antes de cutoff para o arquivo.
+
+    Returns:
+        tuple: (pedidos arquivados, relatórios diários criados)
+    """
+    orders = Order.objects.closed().filter(created_at__lt=cutoff)
+    if dry_run:
+        return orders.count(), 0
+
+    first_order = orders.order_by("created_at").only("created_at").first()
+    if first_order is None:
+        return 0, 0
+
+    # Os resumos dos dias arquivados precisam existir antes de os pedidos saírem
+    # da tabela (relatórios existentes não são recalculados)
+    reports = backfill_daily_reports(
+        timezone.localtime(first_order.created_at).date(),
+        timezone.localtime(cutoff).date() - timedelta(days=1),
+    )
+
+    archived = 0
+    for ids in _batches(orders, batch_size):
+        archived += _archive_batch(ids)
+        logger.info(f"[RETENTION] {archived} pedido(s) arquivado(s) até agora")
+
+    return archived, reports["created"]
+
+
+def run_retention(
+    order_days=None, session_days=None, batch_size=None, dry_run=False, now=None
+):
+    """
+    Executa a rotina completa de retenção. Os parâmetros não informados usam
+    RETENTION_ORDER_DAYS, RETENTION_SESSION_DAYS e RETENTION_BATCH_SIZE.
+
+    Returns:
+        RetentionResult: Quantidades removidas/arquivadas (ou que seriam, com dry_run).
+    """
+    now = now or timezone.now()
+    order_days = order_days or settings.RETENTION_ORDER_DAYS
+    session_days = session_days or settings.RETENTION_SESSION_DAYS
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+
+    session_cutoff = now - timedelta(days=session_days)
+    # O arquivamento começa sempre à meia-noite, para não dividir um dia
+    order_cutoff = timezone.localtime(now - timedelta(days=order_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    logger.info(
+        f"[RETENTION] Iniciando retenção{' (simulação)' if dry_run else ''}: "
+        f"sessões inativas desde {session_cutoff:%Y-%m-%d}, "
+        f"pedidos fechados antes de {order_cutoff:%Y-%m-%d}"
+    )
+
+    result = RetentionResult()
+    result.sessions_deleted, result.carts_deleted = purge_inactive_sessions(
+        session_cutoff, batch_size, dry_run
+    )
+    result.carts_deleted += purge_orphan_carts(session_cutoff, batch_size, dry_run)
+    if not dry_run:
+        result.django_sessions_cleared = clear_expired_django_sessions()
+    result.orders_archived, result.reports_created = archive_closed_orders(
+        order_cutoff, batch_size, dry_run
+    )
+
+    if not dry_run:
+        logger.info(
+            f"[RETENTION] Concluído: {result.sessions_deleted} sessão(ões) e "
+            f"{result.carts_deleted} carrinho(s) removidos, "
+            f"{result.orders_archived} pedido(s) arquivado(s)"
+        )
+    return result
+
+
+def run_scheduled_retention():
+    """Job diário do scheduler."""
+    if not settings.RETENTION_ENABLED:
+        logger.info("[RETENTION] Retenção desativada (RETENTION_ENABLED=False)")
+        return
+
+    try:
+        run_retention()
+    except Exception as e:
+        logger.error(
+            f"[RETENTION] Erro na rotina de retenção: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
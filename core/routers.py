@@ -0,0 +1,125 @@
+"""
+Roteamento de leituras para a réplica do banco (DATABASE_REPLICA_URL).
+
+Por padrão tudo vai para o banco principal. Apenas o código marcado com
+use_replica (relatórios, métricas do painel, busca de pedidos e catálogo) lê da
+réplica. Depois de uma escrita, as leituras da mesma requisição e as requisições
+seguintes do mesmo navegador (por REPLICA_STICKY_SECONDS, via cookie definido
+pelo ReplicaStickinessMiddleware) voltam para o principal, garantindo que o
+usuário veja o que acabou de gravar apesar do atraso da replicação.
+
+Sem réplica configurada, use_replica não tem efeito.
+"""
+
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.template.response import SimpleTemplateResponse
+
+REPLICA_ALIAS = "replica"
+STICKY_COOKIE_NAME = "db_primary"
+
+# Sessão, autenticação e carrinho são lidos sempre do principal: um atraso da
+# réplica aqui deslogaria o usuário ou duplicaria o carrinho. Como nunca são lidos
+# da réplica, escritas nesses apps (feitas em quase toda requisição da loja) não
+# tiram as leituras seguintes da réplica
+PRIMARY_ONLY_APPS = {"sessions", "auth", "contenttypes", "core", "cart"}
+
+
+class RoutingState:
+    """Estado de roteamento da requisição em andamento."""
+
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Estado da requisição (definido pelo middleware) e blocos marcados com use_replica
+_request_state = contextvars.ContextVar("db_routing_state", default=None)
+_replica_requested = contextvars.ContextVar("db_replica_requested", default=False)
+
+
+def replica_enabled() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def _replica_block():
+    token = _replica_requested.set(True)
+    try:
+        yield
+    finally:
+        _replica_requested.reset(token)
+
+
+def use_replica(view_func):
+    """
+    Decorator para views (síncronas ou assíncronas) somente leitura: as
+    consultas feitas durante a view leem da réplica.
+
+    TemplateResponse é renderizado dentro do bloco, já que os querysets das
+    class-based views só são avaliados no template.
+    """
+    if iscoroutinefunction(view_func):
+
+        @functools.wraps(view_func)
+        async def _async_view(*args, **kwargs):
+            with _replica_block():
+                return await view_func(*args, **kwargs)
+
+        return _async_view
+
+    @functools.wraps(view_func)
+    def _view(*args, **kwargs):
+        with _replica_block():
+            response = view_func(*args, **kwargs)
+            if isinstance(response, SimpleTemplateResponse):
+                response.render()
+            return response
+
+    return _view
+
+
+def start_request(pinned: bool) -> contextvars.Token:
+    return _request_state.set(RoutingState(pinned=pinned))
+
+
+def finish_request(token) -> RoutingState:
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state
+
+
+class ReplicaRouter:
+    """Router de banco: escritas no principal, leituras marcadas na réplica."""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_requested.get() or not replica_enabled():
+            return "default"
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return "default"
+
+        state = _request_state.get()
+        if state is not None and state.pinned:
+            return "default"
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            # Leituras seguintes desta requisição e do mesmo navegador vão ao principal
+            state.pinned = True
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A réplica tem os mesmos dados do principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,161 @@
+"""
+Build dos arquivos estáticos de produção.
+
+Roda uma única vez na construção da imagem (manage.py build_static):
+
+1. collectstatic com CompressedManifestStaticFilesStorage: nomes com hash do
+   conteúdo e versões .gz/.br de cada arquivo;
+2. compress offline do django-compressor, que grava os blocos {% compress %}
+   e o manifest em STATIC_ROOT/CACHE;
+3. gzip/brotli também dos arquivos gerados pelo compressor;
+4. um carimbo (build-stamp.json) com a impressão digital dos fontes usados e
+   o identificador do build (STATIC_BUILD_ID, ex.: SHA do commit).
+
+Ao iniciar cada worker, verify_static_build só confere se os arquivos do build
+existem e se o carimbo é do build esperado (STATIC_BUILD_ID), sem ler os
+fontes. A comparação completa com os templates e estáticos atuais roda uma vez
+no deploy (manage.py check --deploy --tag staticfiles, ver core.checks).
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+BUILD_STAMP_NAME = "build-stamp.json"
+
+
+def _static_root() -> Path:
+    return Path(settings.STATIC_ROOT)
+
+
+def _compressor_dir() -> Path:
+    return Path(settings.COMPRESS_ROOT) / settings.COMPRESS_OUTPUT_DIR
+
+
+def _template_dirs():
+    for engine in settings.TEMPLATES:
+        yield from (Path(directory) for directory in engine.get("DIRS", []))
+        if engine.get("APP_DIRS"):
+            for app_config in apps.get_app_configs():
+                directory = Path(app_config.path) / "templates"
+                if directory.is_dir():
+                    yield directory
+
+
+def source_fingerprint() -> str:
+    """
+    Impressão digital dos estáticos (encontrados pelos finders) e dos templates
+    que definem o conteúdo dos arquivos gerados no build.
+    """
+    digest = hashlib.sha256()
+    sources = []
+
+    for finder in get_finders():
+        # Os arquivos do próprio compressor são resultado do build, não fonte
+        if type(finder).__module__.startswith("compressor."):
+            continue
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            sources.append((f"static:{path}", storage.path(path)))
+
+    for directory in _template_dirs():
+        for file_path in directory.rglob("*.html"):
+            sources.append((f"template:{file_path.relative_to(directory)}", file_path))
+
+    for name, file_path in sorted(sources):
+        digest.update(name.encode())
+        with open(file_path, "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+
+    return digest.hexdigest()
+
+
+def compress_compressor_output() -> int:
+    """
+    Gera .gz/.br dos arquivos do compressor, criados depois do collectstatic.
+
+    Returns:
+        int: Quantidade de arquivos comprimidos.
+    """
+    from whitenoise.compress import Compressor
+
+    compressor = Compressor(quiet=True)
+    compressed = 0
+    for directory, _, file_names in os.walk(_compressor_dir()):
+        for file_name in file_names:
+            # Só os CSS/JS gerados; o manifest é lido do disco, não servido
+            if file_name.endswith((".css", ".js")) and compressor.should_compress(file_name):
+                compressor.compress(os.path.join(directory, file_name))
+                compressed += 1
+    return compressed
+
+
+def write_build_stamp() -> dict:
+    """Grava o carimbo do build em STATIC_ROOT."""
+    stamp = {
+        "fingerprint": source_fingerprint(),
+        "build_id": settings.STATIC_BUILD_ID,
+        "built_at": timezone.now().isoformat(),
+    }
+    (_static_root() / BUILD_STAMP_NAME).write_text(json.dumps(stamp, indent=2))
+    return stamp
+
+
+def static_build_errors(check_sources=True) -> list[str]:
+    """
+    Problemas do build de estáticos atual (lista vazia se estiver válido).
+
+    Args:
+        check_sources: Recalcula a impressão digital dos templates e estáticos
+            (lê todos os arquivos; usado no deploy, não a cada worker).
+    """
+    static_root = _static_root()
+    stamp_path = static_root / BUILD_STAMP_NAME
+
+    required = {
+        "manifest do collectstatic": static_root / "staticfiles.json",
+        "manifest do compressor": _compressor_dir() / settings.COMPRESS_OFFLINE_MANIFEST,
+        "carimbo do build": stamp_path,
+    }
+    missing = [f"{label} ({path})" for label, path in required.items() if not path.exists()]
+    if missing:
+        return [f"Arquivo ausente: {item}" for item in missing]
+
+    stamp = json.loads(stamp_path.read_text())
+    expected_id = settings.STATIC_BUILD_ID
+    if expected_id and stamp.get("build_id") != expected_id:
+        return [
+            f"Estáticos do build {stamp.get('build_id') or '(sem identificador)'}, "
+            f"esperado {expected_id}"
+        ]
+    if check_sources and stamp.get("fingerprint") != source_fingerprint():
+        return [
+            f"Estáticos gerados em {stamp.get('built_at')} não correspondem aos "
+            "templates/arquivos atuais"
+        ]
+    return []
+
+
+def verify_static_build():
+    """
+    Falha a inicialização se o build offline estiver ausente ou for de outro build.
+    Só se aplica quando COMPRESS_OFFLINE está ativo (produção).
+
+    Roda em cada worker: não recalcula a impressão digital dos fontes.
+    """
+    if not settings.COMPRESS_OFFLINE:
+        return
+
+    errors = static_build_errors(check_sources=False)
+    if errors:
+        raise ImproperlyConfigured(
+            "Build de estáticos inválido: "
+            + "; ".join(errors)
+            + ". Rode 'python manage.py build_static' na construção da imagem."
+        )
@@ -1 +1,195 @@
-# Create your tests here.
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import ratelimit, static_build
+from core.benchmark.startup import LAZY_MODULES, measure_startup
+from core.checks import static_build_check
+from core.ratelimit import MemoryTokenBuckets, parse_rate, rate_limit
+from utils.session import get_client_ip
+
+
+class StartupBudgetTest(SimpleTestCase):
+    """Inicialização de um worker: django.setup() + importação das URLs."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.startup = measure_startup()
+
+    def test_startup_within_budget(self):
+        self.assertLessEqual(
+            self.startup["total_ms"],
+            settings.STARTUP_IMPORT_BUDGET_MS,
+            f"django.setup() + URLs levou {self.startup['total_ms']:.0f} ms "
+            f"(limite STARTUP_IMPORT_BUDGET_MS={settings.STARTUP_IMPORT_BUDGET_MS})",
+        )
+
+    def test_heavy_modules_are_lazy(self):
+        self.assertEqual(sorted(set(LAZY_MODULES) & self.startup["modules"]), [])
+
+
+class MemoryTokenBucketsTest(SimpleTestCase):
+    """Token bucket em memória (core.ratelimit)."""
+
+    def setUp(self):
+        self.now = 1000.0
+        monotonic = mock.patch.object(
+            ratelimit.time, "monotonic", side_effect=lambda: self.now
+        )
+        monotonic.start()
+        self.addCleanup(monotonic.stop)
+        self.buckets = MemoryTokenBuckets(prune_interval=60)
+        self.capacity, self.rate = parse_rate("3/m")
+
+    def hit(self, key="cart:ip:1"):
+        return self.buckets.hit(key, self.capacity, self.rate)
+
+    def test_burst_then_refill(self):
+        self.assertEqual([self.hit()[0] for _ in range(3)], [True, True, True])
+        self.assertEqual(self.hit(), (False, 20000))
+
+        self.now += 20
+        self.assertEqual(self.hit(), (True, 0))
+        self.assertFalse(self.hit()[0])
+
+    def test_refilled_buckets_are_pruned(self):
+        self.hit("cart:ip:1")
+        self.now += 30
+        for _ in range(3):
+            self.hit("cart:ip:2")
+
+        # ip:1 já está cheio; ip:2 ainda está se reabastecendo
+        self.now += 31
+        self.hit("cart:ip:3")
+
+        self.assertEqual(sorted(self.buckets._buckets), ["cart:ip:2", "cart:ip:3"])
+
+    def test_parse_rate_rejects_invalid_values(self):
+        for rate in ("30", "30/d", "0/m", "abc/m"):
+            with self.subTest(rate=rate), self.assertRaises(ValueError):
+                parse_rate(rate)
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMIT_BACKEND="memory",
+    RATE_LIMITS={"cart": "2/m"},
+)
+class RateLimitDecoratorTest(SimpleTestCase):
+    """Decorator rate_limit: 429 com Retry-After quando o balde esvazia."""
+
+    def setUp(self):
+        ratelimit._memory_buckets.reset()
+        self.addCleanup(ratelimit._memory_buckets.reset)
+        self.view = rate_limit("cart", key="ip")(lambda request: HttpResponse("ok"))
+
+    def request(self, ip="10.0.0.1", **headers):
+        request = RequestFactory().post("/", REMOTE_ADDR=ip, **headers)
+        request.session = SessionStore()
+        return request
+
+    def test_limit_per_client(self):
+        self.assertEqual(self.view(self.request()).status_code, 200)
+        self.assertEqual(self.view(self.request()).status_code, 200)
+
+        response = self.view(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(self.view(self.request(ip="10.0.0.2")).status_code, 200)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        for proxy_count, ip in ((0, "10.0.0.1"), (1, "203.0.113.5")):
+            ratelimit._memory_buckets.reset()
+            with (
+                self.subTest(proxy_count=proxy_count),
+                override_settings(TRUSTED_PROXY_COUNT=proxy_count),
+            ):
+                statuses = [
+                    self.view(
+                        self.request(HTTP_X_FORWARDED_FOR=f"198.51.100.{attempt}, {ip}")
+                    ).status_code
+                    for attempt in range(3)
+                ]
+                self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_client_ip_comes_from_the_trusted_proxy(self):
+        request = self.request(HTTP_X_FORWARDED_FOR="198.51.100.1, 203.0.113.5")
+        self.assertEqual(get_client_ip(request), "203.0.113.5")
+        self.assertEqual(get_client_ip(self.request()), "10.0.0.1")
+
+    def test_backend_errors_let_requests_through(self):
+        with (
+            mock.patch.object(
+                ratelimit._memory_buckets, "hit", side_effect=ConnectionError
+            ),
+            self.assertLogs("core.ratelimit", "ERROR"),
+        ):
+            for _ in range(3):
+                self.assertEqual(self.view(self.request()).status_code, 200)
+
+    def test_unknown_scope_is_rejected(self):
+        with self.assertRaises(ValueError):
+            rate_limit("unknown")
+
+
+class StaticBuildTest(SimpleTestCase):
+    """Verificação do build de estáticos (core.static_build e core.checks)."""
+
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.static_root = Path(static_root.name)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root,
+            COMPRESS_ROOT=self.static_root,
+            COMPRESS_OFFLINE=True,
+            STATIC_BUILD_ID="abc123",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        (self.static_root / "staticfiles.json").write_text("{}")
+        manifest = static_build._compressor_dir() / settings.COMPRESS_OFFLINE_MANIFEST
+        manifest.parent.mkdir(parents=True)
+        manifest.write_text("{}")
+
+    def write_stamp(self, **stamp):
+        stamp_path = self.static_root / static_build.BUILD_STAMP_NAME
+        stamp_path.write_text(json.dumps(stamp))
+
+    def test_worker_check_does_not_read_the_sources(self):
+        self.write_stamp(fingerprint="antiga", build_id="abc123")
+
+        with mock.patch.object(static_build, "source_fingerprint") as fingerprint:
+            static_build.verify_static_build()
+
+        fingerprint.assert_not_called()
+
+    def test_worker_rejects_stamp_of_another_build(self):
+        self.write_stamp(fingerprint="antiga", build_id="def456")
+
+        with self.assertRaisesMessage(ImproperlyConfigured, "esperado abc123"):
+            static_build.verify_static_build()
+
+    def test_worker_rejects_missing_build(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "carimbo do build"):
+            static_build.verify_static_build()
+
+    def test_deploy_check_compares_the_sources(self):
+        self.write_stamp(fingerprint="antiga", build_id="abc123")
+
+        with mock.patch.object(
+            static_build, "source_fingerprint", return_value="atual"
+        ):
+            errors = static_build_check(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
@@ -1,8 +1,19 @@
 from django.urls import path
 
-from core.views import cache_stats_view, health_check
+from core.views import (
+    cache_stats_view,
+    health_details_view,
+    liveness_check,
+    metrics_view,
+    readiness_check,
+)
 
 urlpatterns = [
-    path("health/", health_check, name="health_check"),
+    # /health/ mantido como readiness para monitores já configurados
+    path("health/", readiness_check, name="health_check"),
+    path("health/live/", liveness_check, name="health_live"),
+    path("health/ready/", readiness_check, name="health_ready"),
+    path("health/details/", health_details_view, name="health_details"),
     path("cache-stats/", cache_stats_view, name="cache_stats"),
+    path("metrics/", metrics_view, name="metrics"),
 ]
@@ -1,100 +1,70 @@
 from logging import getLogger
 
-from django.core.cache import cache
-from django.db import connection
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from core import health
+from core.metrics import rate_limit_counters, registry
 
 logger = getLogger(__name__)
 
 
-def health_check(request):
+async def liveness_check(request):
     """
-    Health check endpoint para monitoramento da aplicação
-    Verifica: Database, Cache (Redis) e WebSocket (Channels)
+    Liveness: responde se o processo está atendendo requisições.
+    Não consulta banco, cache nem Redis (ver core.health).
     """
-    health_status = {
-        "status": "healthy",
-        "database": "ok",
-        "cache": "ok",
-        "websocket": "ok",
-    }
-
-    # Test DB connection
-    try:
-        logger.info("Health check: Testando conexão com Database...")
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        logger.info("Health check: Database OK")
-    except Exception as e:
-        logger.error(f"Health check: ERRO no Database - {type(e).__name__}: {str(e)}")
-        health_status["status"] = "unhealthy"
-        health_status["database"] = f"error: {str(e)}"
-
-    # Test cache (Redis)
-    try:
-        logger.info("Health check: Testando conexão com Redis Cache...")
-        cache.set("health_check", "ok", 30)
-        cache_ok = cache.get("health_check") == "ok"
-        if not cache_ok:
-            logger.error("Health check: ERRO no Redis Cache - Falha ao ler/escrever")
-            health_status["status"] = "unhealthy"
-            health_status["cache"] = "error: failed to read/write"
-        else:
-            logger.info("Health check: Redis Cache OK")
-    except Exception as e:
-        logger.error(
-            f"Health check: ERRO no Redis Cache - {type(e).__name__}: {str(e)}"
-        )
-        health_status["status"] = "unhealthy"
-        health_status["cache"] = f"error: {str(e)}"
+    return JsonResponse({"status": "alive"})
 
-    # Test WebSocket/Channels
-    try:
-        logger.info("Health check: Testando WebSocket/Channels (Redis backend)...")
-        from asgiref.sync import async_to_sync
-        from channels.layers import get_channel_layer
-
-        channel_layer = get_channel_layer()
-
-        if channel_layer is None:
-            logger.error(
-                "Health check: ERRO no WebSocket - Channel layer não configurado"
-            )
-            health_status["status"] = "unhealthy"
-            health_status["websocket"] = "error: channel layer not configured"
-        else:
-            # Tenta enviar uma mensagem de teste para o channel layer
-            # Isso verifica se o Redis backend do Channels está funcionando
-            test_group = "health_check_test"
-            async_to_sync(channel_layer.group_send)(
-                test_group, {"type": "health.check", "message": "ping"}
-            )
-            logger.info("Health check: WebSocket/Channels OK")
-            health_status["websocket"] = "ok"
-    except Exception as e:
-        logger.error(
-            f"Health check: ERRO no WebSocket/Channels - {type(e).__name__}: {str(e)}"
-        )
-        health_status["status"] = "unhealthy"
-        health_status["websocket"] = f"error: {str(e)}"
 
-    # Log final
-    if health_status["status"] == "healthy":
-        logger.info("Health check: ✅ Todos os serviços estão saudáveis")
-    else:
-        logger.warning(f"Health check: ⚠️ Sistema UNHEALTHY - {health_status}")
+async def readiness_check(request):
+    """
+    Readiness: Database, Cache (Redis) e WebSocket (Channels), verificados em
+    paralelo e com resultado em cache por alguns segundos (ver core.health)
+    """
+    report = await health.get_readiness()
+    return JsonResponse(
+        {
+            "status": "ready" if report["ready"] else "unavailable",
+            "checks": {
+                name: "ok" if result["ok"] else "error"
+                for name, result in report["checks"].items()
+            },
+        },
+        status=200 if report["ready"] else 503,
+    )
+
+
+async def health_details_view(request):
+    """
+    Diagnóstico detalhado das dependências (apenas para admins).
+    Sempre executa uma verificação nova, com latência e erro de cada uma.
+    """
+    user = await request.auser()
+    if not user.is_staff:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
 
-    status_code = 200 if health_status["status"] == "healthy" else 503
-    return JsonResponse(health_status, status=status_code)
+    report = await health.check_dependencies()
+    return JsonResponse(
+        {**report, "process": health.process_info()},
+        status=200 if report["ready"] else 503,
+    )
 
 
 def cache_stats_view(request):
     """
-    View para mostrar estatísticas do cache (apenas para admins)
+    View para mostrar estatísticas do cache e do rate limit (apenas para admins)
     """
     if not request.user.is_staff:
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
+    # Contadores do rate limit (core.ratelimit) por escopo: allowed/limited/error
+    try:
+        rate_limits = rate_limit_counters()
+    except Exception as e:
+        rate_limits = {"error": str(e)}
+
     try:
         # Verificar se o Redis está disponível
         from django_redis import get_redis_connection
@@ -120,6 +90,28 @@ def cache_stats_view(request):
             round(hits / (hits + misses), 4) if (hits + misses) > 0 else 0
         )
 
+        stats["rate_limits"] = rate_limits
+
         return JsonResponse(stats)
     except Exception as e:
+        return JsonResponse({"error": str(e), "rate_limits": rate_limits}, status=500)
+
+
+def metrics_view(request):
+    """
+    Métricas no formato texto do Prometheus (apenas para admins ou com METRICS_TOKEN)
+    """
+    auth_header = request.headers.get("Authorization", "")
+    has_token = bool(settings.METRICS_TOKEN) and constant_time_compare(
+        auth_header, f"Bearer {settings.METRICS_TOKEN}"
+    )
+    if not has_token and not request.user.is_staff:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+
+    try:
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar métricas: {type(e).__name__}: {str(e)}")
         return JsonResponse({"error": str(e)}, status=500)
@@ -0,0 +1,94 @@
+"""
+Backend de autenticação por username ou CPF.
+
+Substitui o ModelBackend: o usuário é encontrado em uma única consulta
+(username ou CPF do cliente fiel, já com o perfil carregado) e a senha é
+verificada exatamente uma vez por tentativa. Antes, o login por CPF calculava
+dois hashes de senha (um para o username inexistente e outro para o usuário
+do CPF) e fazia uma consulta extra ao Customer.
+
+O id do usuário de cada CPF fica no cache; a entrada é conferida com o perfil
+carregado e descartada se o CPF tiver mudado.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models import Q
+
+from utils.normalize import normalize_cpf
+
+UserModel = get_user_model()
+
+
+def _cpf_cache_key(cpf) -> str:
+    return f"customers:cpf_user:{cpf}"
+
+
+def looks_like_cpf(value) -> bool:
+    """Verifica se o valor (com ou sem pontos e traço) tem os 11 dígitos de um CPF."""
+    cpf = normalize_cpf(value)
+    return bool(cpf) and cpf.isdigit() and len(cpf) == 11
+
+
+class UsernameOrCPFBackend(ModelBackend):
+    """
+    Autentica pelo username ou pelo CPF do cliente fiel.
+
+    O usuário retornado vem com customer_profile carregado (ou sem perfil),
+    então as verificações de superuser e cliente ativo da view de login não
+    fazem consultas.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        user = self.get_user_by_username_or_cpf(username)
+        if user is None:
+            # Mesmo custo de uma senha errada: não revela se o usuário existe
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user_by_username_or_cpf(self, username):
+        """Busca o usuário pelo username ou, se parecer um CPF, também pelo CPF."""
+        users = UserModel._default_manager.select_related("customer_profile")
+
+        if not looks_like_cpf(username):
+            return users.filter(username=username).first()
+
+        cpf = normalize_cpf(username)
+        user_id = cache.get(_cpf_cache_key(cpf))
+        if user_id is not None:
+            user = users.filter(pk=user_id).first()
+            if user is not None and self._customer_cpf(user) == cpf:
+                return user
+            cache.delete(_cpf_cache_key(cpf))
+
+        # Username tem prioridade sobre o CPF de outro usuário, como no login antigo
+        candidates = list(
+            users.filter(
+                Q(username=username) | Q(customer_profile__cpf__in={cpf, username})
+            )[:2]
+        )
+        if not candidates:
+            return None
+        user = next((u for u in candidates if u.username == username), candidates[0])
+
+        if self._customer_cpf(user) == cpf:
+            cache.set(
+                _cpf_cache_key(cpf), user.pk, settings.CACHE_TIMEOUTS["customer_cpf"]
+            )
+        return user
+
+    @staticmethod
+    def _customer_cpf(user):
+        customer = getattr(user, "customer_profile", None)
+        return normalize_cpf(customer.cpf) if customer is not None else None
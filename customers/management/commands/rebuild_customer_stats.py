@@ -0,0 +1,41 @@
+"""
+Django management command para reconstruir as estatísticas de clientes.
+
+Necessário após cargas em lote que não disparam signals (ex.: mock_orders --scale)
+ou para corrigir divergências. No dia a dia as estatísticas são mantidas
+incrementalmente a cada pedido finalizado.
+
+Uso:
+    python manage.py rebuild_customer_stats
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from customers.stats import rebuild_all_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstrói as estatísticas de compra dos clientes a partir dos pedidos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Linhas lidas/gravadas por lote (padrão: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO("📊 Reconstruindo estatísticas de clientes..."))
+
+        started_at = time.monotonic()
+        created = rebuild_all_stats(batch_size=options["batch_size"])
+        elapsed = time.monotonic() - started_at
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Estatísticas de {created} cliente(s) reconstruídas em {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-19 00:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(blank=True, db_index=True, help_text='Telefone normalizado (pedidos sem cliente fiel)', max_length=20)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('average_ticket', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('first_order_at', models.DateTimeField(blank=True, null=True)),
+                ('last_order_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='customers.customer')),
+            ],
+            options={
+                'verbose_name': 'Estatística de Cliente',
+                'verbose_name_plural': 'Estatísticas de Clientes',
+                'indexes': [models.Index(fields=['-revenue'], name='customers_c_revenue_25ef85_idx'), models.Index(fields=['-last_order_at'], name='customers_c_last_or_bc1f1c_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('customer__isnull', True)), fields=('phone',), name='unique_guest_stats_phone')],
+            },
+        ),
+    ]
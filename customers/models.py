@@ -65,3 +65,53 @@ class Customer(models.Model):
         elif len(phone_numbers) == 11:
             return f"({phone_numbers[:2]}) {phone_numbers[2:7]}-{phone_numbers[7:]}"
         return self.phone  # Retorna como está se não tiver 10 ou 11 dígitos
+
+
+class CustomerStats(models.Model):
+    """
+    Estatísticas de compra acumuladas (pedidos finalizados: concluídos e pagos).
+
+    Uma linha por cliente fiel ou, para pedidos sem login, por telefone
+    normalizado (apenas dígitos). Mantida incrementalmente a cada pedido que
+    passa a contar (customers.stats) e reconstruída com
+    `python manage.py rebuild_customer_stats`.
+    """
+
+    customer = models.OneToOneField(
+        Customer,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="stats",
+    )
+    phone = models.CharField(
+        max_length=20,
+        blank=True,
+        db_index=True,
+        help_text="Telefone normalizado (pedidos sem cliente fiel)",
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    average_ticket = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    first_order_at = models.DateTimeField(null=True, blank=True)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estatística de Cliente"
+        verbose_name_plural = "Estatísticas de Clientes"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["phone"],
+                condition=models.Q(customer__isnull=True),
+                name="unique_guest_stats_phone",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["-revenue"]),
+            models.Index(fields=["-last_order_at"]),
+        ]
+
+    def __str__(self):
+        owner = self.customer.full_name if self.customer_id else self.phone
+        return f"{owner}: {self.order_count} pedido(s), R$ {self.revenue}"
@@ -0,0 +1,26 @@
+from logging import getLogger
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from orders.models import Order
+
+from .stats import handle_order_saved
+
+logger = getLogger(__name__)
+
+
+@receiver(post_save, sender=Order)
+def update_customer_stats(sender, instance, created, **kwargs):
+    """
+    Signal chamado quando um pedido é salvo: atualiza as estatísticas do cliente
+    se o pedido passou a ser (ou deixou de ser) finalizado.
+    """
+    try:
+        handle_order_saved(instance, created)
+    except Exception as e:
+        # Estatísticas podem ser reconstruídas; não podem impedir o save do pedido
+        logger.error(
+            f"[STATS] Erro ao atualizar estatísticas do pedido #{instance.id}: "
+            f"{type(e).__name__}: {str(e)}"
+        )
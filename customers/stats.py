@@ -0,0 +1,194 @@
+"""
+Estatísticas de compra por cliente (CustomerStats).
+
+Contam apenas pedidos finalizados (concluídos e pagos), incluindo os arquivados.
+Quando um pedido passa a ser finalizado, a linha do cliente é atualizada com um
+único UPDATE incremental. No caso raro de um pedido deixar de ser finalizado
+(ex.: estorno), as estatísticas daquele cliente são recalculadas.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from logging import getLogger
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, Order
+
+from .models import CustomerStats
+
+logger = getLogger(__name__)
+
+
+def normalize_phone_key(phone):
+    """Telefone apenas com dígitos, usado como chave dos pedidos sem cliente fiel."""
+    return "".join(filter(str.isdigit, phone or ""))
+
+
+def stats_lookup(customer_id, phone):
+    """Filtro que identifica a linha de estatísticas de um pedido."""
+    if customer_id:
+        return {"customer_id": customer_id}
+    return {"customer__isnull": True, "phone": normalize_phone_key(phone)}
+
+
+def _defaults(lookup):
+    if "customer_id" in lookup:
+        return {"customer_id": lookup["customer_id"]}
+    return {"phone": lookup["phone"]}
+
+
+def record_finalized_order(order):
+    """Soma um pedido que acabou de ser finalizado às estatísticas do cliente."""
+    lookup = stats_lookup(order.customer_id, order.phone)
+    total = Decimal(str(order.total_price))
+    created_at = order.created_at
+
+    with transaction.atomic():
+        CustomerStats.objects.get_or_create(**lookup, defaults=_defaults(lookup))
+        CustomerStats.objects.filter(**lookup).update(
+            order_count=F("order_count") + 1,
+            revenue=F("revenue") + total,
+            average_ticket=ExpressionWrapper(
+                (F("revenue") + total) / (F("order_count") + 1),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+            first_order_at=Least(
+                Coalesce(F("first_order_at"), Value(created_at)), Value(created_at)
+            ),
+            last_order_at=Greatest(
+                Coalesce(F("last_order_at"), Value(created_at)), Value(created_at)
+            ),
+            updated_at=timezone.now(),
+        )
+
+
+def _empty_totals():
+    return {"order_count": 0, "revenue": Decimal("0"), "first": None, "last": None}
+
+
+def _accumulate(totals, created_at, total):
+    totals["order_count"] += 1
+    totals["revenue"] += Decimal(str(total or 0))
+    if totals["first"] is None or created_at < totals["first"]:
+        totals["first"] = created_at
+    if totals["last"] is None or created_at > totals["last"]:
+        totals["last"] = created_at
+
+
+def _finalized_orders():
+    """(customer_id, phone, created_at, total) de todos os pedidos finalizados."""
+    orders = (
+        Order.objects.effective()
+        .annotate(total=Sum(F("items__quantity") * F("items__product__price")))
+        .values_list("customer_id", "phone", "created_at", "total")
+    )
+    archived = ArchivedOrder.objects.filter(
+        status="completed", payment_status="paid"
+    ).values_list("customer_id", "phone", "created_at", "total_price")
+    return orders, archived
+
+
+def _build_stats(lookup, totals):
+    count = totals["order_count"]
+    return CustomerStats(
+        **_defaults(lookup),
+        order_count=count,
+        revenue=totals["revenue"],
+        average_ticket=(totals["revenue"] / count).quantize(Decimal("0.01"))
+        if count
+        else Decimal("0"),
+        first_order_at=totals["first"],
+        last_order_at=totals["last"],
+    )
+
+
+def recalculate_stats(customer_id, phone):
+    """Recalcula do zero as estatísticas de um cliente (ou telefone)."""
+    lookup = stats_lookup(customer_id, phone)
+    totals = _empty_totals()
+
+    for queryset in _finalized_orders():
+        if customer_id:
+            rows = queryset.filter(customer_id=customer_id)
+        else:
+            # Filtro aproximado no banco; a comparação exata é feita pela chave
+            key = lookup["phone"]
+            rows = queryset.filter(customer_id__isnull=True, phone__endswith=key[-8:])
+        for _, row_phone, created_at, total in rows:
+            if customer_id or normalize_phone_key(row_phone) == lookup["phone"]:
+                _accumulate(totals, created_at, total)
+
+    with transaction.atomic():
+        CustomerStats.objects.filter(**lookup).delete()
+        if totals["order_count"]:
+            _build_stats(lookup, totals).save()
+
+
+def rebuild_all_stats(batch_size=1000):
+    """
+    Reconstrói todas as estatísticas a partir dos pedidos e do arquivo.
+
+    Returns:
+        int: Quantidade de linhas de estatísticas criadas.
+    """
+    grouped = defaultdict(_empty_totals)
+    for queryset in _finalized_orders():
+        for customer_id, phone, created_at, total in queryset.iterator(
+            chunk_size=batch_size
+        ):
+            key = (customer_id, None) if customer_id else (None, normalize_phone_key(phone))
+            _accumulate(grouped[key], created_at, total)
+
+    stats = [
+        _build_stats(stats_lookup(customer_id, phone), totals)
+        for (customer_id, phone), totals in grouped.items()
+    ]
+
+    with transaction.atomic():
+        CustomerStats.objects.all().delete()
+        CustomerStats.objects.bulk_create(stats, batch_size=batch_size)
+
+    logger.info(f"[STATS] Estatísticas de {len(stats)} cliente(s) reconstruídas")
+    return len(stats)
+
+
+def handle_order_saved(order, created):
+    """
+    Aplica a transição de estado do pedido às estatísticas do cliente.
+
+    A atualização roda após o commit: os itens de um pedido criado já finalizado
+    só existem depois do save, e um rollback não deve alterar as estatísticas.
+    """
+    if created:
+        was_finalized = False
+    else:
+        status = getattr(order, "_loaded_status", None)
+        payment_status = getattr(order, "_loaded_payment_status", None)
+        was_finalized = (
+            None
+            if status is None or payment_status is None
+            else status == "completed" and payment_status == "paid"
+        )
+    is_finalized = order.is_finalized
+
+    # Callbacks nomeados: com robust=True o Django registra a falha pelo __qualname__
+    if was_finalized is None or (was_finalized and not is_finalized):
+        # Estado anterior desconhecido ou pedido que deixou de contar (estorno)
+        customer_id, phone = order.customer_id, order.phone
+
+        def update_stats():
+            recalculate_stats(customer_id, phone)
+
+    elif is_finalized and not was_finalized:
+
+        def update_stats():
+            record_finalized_order(order)
+
+    else:
+        return
+
+    transaction.on_commit(update_stats, robust=True)
@@ -1,2 +1,151 @@
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from customers.backends import looks_like_cpf
+from customers.models import Customer, CustomerStats
+from orders.models import Order, OrderItem
+from products.models import Product
+
+
+class CustomerStatsHookTest(TestCase):
+    """Atualização das estatísticas de clientes após o commit (customers.stats)."""
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg"
+        )
+
+    def create_order(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                customer_name="Cliente",
+                phone="(11) 99999-0000",
+                address="Rua A, 1",
+                payment_method="dinheiro",
+                **kwargs,
+            )
+            OrderItem.objects.create(order=order, product=self.product, quantity=2)
+        return order
+
+    def save(self, order, **changes):
+        for field, value in changes.items():
+            setattr(order, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def stats(self):
+        return CustomerStats.objects.get(customer__isnull=True, phone="11999990000")
+
+    def test_finalized_order_is_recorded_once(self):
+        order = self.create_order()
+        self.assertFalse(CustomerStats.objects.exists())
+
+        self.save(order, status="completed", payment_status="paid")
+        self.save(order, customer_name="Cliente Novo")
+
+        stats = self.stats()
+        self.assertEqual(stats.order_count, 1)
+        self.assertEqual(stats.revenue, Decimal("60.00"))
+        self.assertEqual(stats.average_ticket, Decimal("60.00"))
+
+    def test_refunded_order_is_recalculated(self):
+        order = self.create_order()
+        self.save(order, status="completed", payment_status="paid")
+
+        self.save(order, payment_status="cancelled")
+
+        self.assertFalse(CustomerStats.objects.exists())
+
+    def test_failure_is_logged_without_breaking_the_save(self):
+        order = self.create_order()
+
+        with (
+            mock.patch(
+                "customers.stats.record_finalized_order",
+                side_effect=RuntimeError("falha"),
+            ),
+            self.assertLogs("django", "ERROR") as logs,
+        ):
+            self.save(order, status="completed", payment_status="paid")
+
+        self.assertIn("update_stats", logs.output[0])
+        order.refresh_from_db()
+        self.assertTrue(order.is_finalized)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class UsernameOrCPFBackendTest(TestCase):
+    """Login por username ou CPF (customers.backends)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("maria", password="senha-forte")
+        self.customer = Customer.objects.create(
+            user=self.user,
+            full_name="Maria",
+            phone="11999999999",
+            cpf="52998224725",
+            address="Rua A, 1",
+        )
+
+    def test_login_by_username(self):
+        self.assertEqual(
+            authenticate(username="maria", password="senha-forte"), self.user
+        )
+
+    def test_login_by_cpf_in_one_query(self):
+        for cpf in ("52998224725", "529.982.247-25"):
+            cache.clear()
+            with self.subTest(cpf=cpf), self.assertNumQueries(1):
+                user = authenticate(username=cpf, password="senha-forte")
+                self.assertEqual(user, self.user)
+                self.assertEqual(user.customer_profile.full_name, "Maria")
+
+    def test_wrong_password_checks_the_hash_once(self):
+        with mock.patch.object(
+            User, "check_password", autospec=True, return_value=False
+        ) as check_password:
+            self.assertIsNone(authenticate(username="52998224725", password="errada"))
+
+        check_password.assert_called_once()
+
+    def test_unknown_user_is_rejected(self):
+        self.assertIsNone(authenticate(username="12345678909", password="senha-forte"))
+        self.assertIsNone(authenticate(username="joao", password="senha-forte"))
+
+    def test_username_has_priority_over_cpf(self):
+        other = User.objects.create_user("52998224725", password="outra-senha")
+
+        self.assertEqual(
+            authenticate(username="52998224725", password="outra-senha"), other
+        )
+        self.assertIsNone(authenticate(username="52998224725", password="senha-forte"))
+
+    def test_cached_user_is_discarded_when_cpf_changes(self):
+        authenticate(username="52998224725", password="senha-forte")
+        self.customer.cpf = "11144477735"
+        self.customer.save()
+
+        self.assertIsNone(authenticate(username="52998224725", password="senha-forte"))
+        self.assertEqual(
+            authenticate(username="111.444.777-35", password="senha-forte"), self.user
+        )
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(authenticate(username="52998224725", password="senha-forte"))
+
+    def test_looks_like_cpf(self):
+        self.assertTrue(looks_like_cpf("529.982.247-25"))
+        self.assertFalse(looks_like_cpf("maria"))
+        self.assertFalse(looks_like_cpf("5299822472"))
@@ -4,8 +4,6 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, render
 
-from customers.models import Customer
-
 logger = getLogger(__name__)
 
 
@@ -27,34 +25,9 @@ def customer_login_view(request):
         username_or_cpf = request.POST.get("username-cpf")
         password = request.POST.get("password")
 
-        # Primeiro, tentar autenticar com username
+        # Username ou CPF (customers.backends): uma consulta e um hash de senha
         user = authenticate(request, username=username_or_cpf, password=password)
 
-        # Se não funcionou, tentar buscar por CPF
-        if user is None and username_or_cpf:
-            logger.debug("Tentando autenticar por CPF")
-            # Remover formatação do CPF (pontos e traços)
-            cpf_cleaned = username_or_cpf.replace(".", "").replace("-", "").strip()
-
-            try:
-                # Buscar cliente pelo CPF (tenta sem formatação e com formatação)
-                customer = (
-                    Customer.objects.select_related("user")
-                    .filter(cpf__in=[cpf_cleaned, username_or_cpf])
-                    .first()
-                )
-
-                if customer:
-                    # Tentar autenticar com o username do usuário encontrado
-                    logger.debug(f"Usuário encontrado pelo CPF: {customer.user.username}")
-                    user = authenticate(
-                        request, username=customer.user.username, password=password
-                    )
-                else:
-                    logger.debug("Nenhum cliente encontrado com o CPF fornecido.")
-            except Exception:
-                logger.error("Erro ao buscar cliente por CPF")
-
         if user is not None:
             # Bloquear superusers
             if user.is_superuser:
@@ -1 +1,145 @@
-# Create your tests here.
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, Order, OrderItem
+from orders.transitions import transition
+from products.models import Product
+from products.stock import reserve_stock
+
+
+class ArchivedOrderListTest(TestCase):
+    """Busca nos pedidos arquivados (dashboard.views.archived_order_list)."""
+
+    def setUp(self):
+        admin = User.objects.create_superuser("gerente", password="senha")
+        self.client.force_login(admin)
+        self.url = reverse("dashboard:archived_order_list")
+        for pk, day in ((1, 5), (2, 20)):
+            ArchivedOrder.objects.create(
+                id=pk,
+                customer_name=f"Cliente {pk}",
+                phone="11999999999",
+                address="Rua A, 1",
+                payment_method="pix",
+                payment_status="paid",
+                status="completed",
+                created_at=timezone.make_aware(datetime(2025, 3, day, 12)),
+            )
+
+    def order_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [order.id for order in response.context["orders"]]
+
+    def test_filters_by_date_range(self):
+        self.assertEqual(self.order_ids(date_from="2025-03-10"), [2])
+        self.assertEqual(self.order_ids(date_to="2025-03-10"), [1])
+
+    def test_invalid_dates_are_ignored(self):
+        self.assertEqual(self.order_ids(date_from="abc"), [])
+        self.assertEqual(
+            self.order_ids(date_from="2025-02-30", date_to="2025-03-10"), [1]
+        )
+
+        response = self.client.get(self.url, {"date_from": "abc"})
+        self.assertEqual(response.context["date_from"], "")
+        self.assertFalse(response.context["has_filters"])
+
+
+class OrderEditTest(TestCase):
+    """Edição de pedidos no painel (dashboard.views.order_edit)."""
+
+    def setUp(self):
+        admin = User.objects.create_superuser("gerente", password="senha")
+        self.client.force_login(admin)
+        self.pizza = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg", stock=5
+        )
+        self.soda = Product.objects.create(
+            name="Refrigerante",
+            price=Decimal("8.00"),
+            image="products/soda.jpg",
+            stock=5,
+        )
+        reserve_stock({self.pizza.pk: 2})
+        self.order = Order.objects.create(
+            customer_name="Cliente",
+            phone="11999999999",
+            address="Rua A, 1",
+            payment_method="dinheiro",
+            stock_reserved=True,
+        )
+        OrderItem.objects.create(order=self.order, product=self.pizza, quantity=2)
+        self.url = reverse("dashboard:order_edit", args=[self.order.pk])
+
+    def edit(self, items, **fields):
+        data = {
+            "customer_name": "Cliente",
+            "phone": "11999999999",
+            "address": "Rua A, 1",
+            "status": "pending",
+            "product_id": [product.pk for product, _ in items],
+            "quantity": [quantity for _, quantity in items],
+            **fields,
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data)
+
+    def stocks(self):
+        return [
+            Product.objects.get(pk=product.pk).stock
+            for product in (self.pizza, self.soda)
+        ]
+
+    def test_item_changes_reserve_and_release_the_difference(self):
+        self.edit([(self.pizza, 1), (self.soda, 3)])
+
+        self.assertEqual(self.stocks(), [4, 2])
+
+        transition(Order.objects.get(pk=self.order.pk), "cancel")
+        self.assertEqual(self.stocks(), [5, 5])
+
+    def test_items_past_the_stock_are_rejected(self):
+        response = self.edit([(self.pizza, 2), (self.soda, 6)], address="Rua B, 2")
+
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(self.stocks(), [3, 5])
+        self.assertEqual(
+            list(self.order.items.values_list("product_id", "quantity")),
+            [(self.pizza.pk, 2)],
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).address, "Rua A, 1")
+        self.assertContains(self.client.get(self.url), "Estoque insuficiente")
+
+    def test_orders_without_reservation_keep_the_stock(self):
+        Order.objects.filter(pk=self.order.pk).update(stock_reserved=False)
+
+        self.edit([(self.pizza, 4)])
+
+        self.assertEqual(self.stocks(), [3, 5])
+
+    def test_status_change_uses_the_transition(self):
+        self.edit([(self.pizza, 2)], status="completed", address="Rua B, 2")
+
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.address), ("completed", "Rua B, 2"))
+        self.assertTrue(order.stock_reserved)
+
+        self.edit([(self.pizza, 2)], status="pending")
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "pending")
+
+    def test_status_outside_the_transitions_is_rejected(self):
+        for status in ("cancelled", "", "shipped"):
+            with self.subTest(status=status):
+                response = self.edit(
+                    [(self.pizza, 2)], status=status, address="Rua B, 2"
+                )
+
+                self.assertRedirects(response, self.url, fetch_redirect_response=False)
+                order = Order.objects.get(pk=self.order.pk)
+                self.assertEqual((order.status, order.address), ("pending", "Rua A, 1"))
@@ -25,6 +25,7 @@ urlpatterns = [
     # Order URLs
     path("orders/", views.order_list, name="order_list"),
     path("orders/create/", views.order_create, name="order_create"),
+    path("orders/archive/", views.archived_order_list, name="archived_order_list"),
     path("orders/<int:pk>/", views.order_detail, name="order_detail"),
     path("orders/<int:pk>/edit/", views.order_edit, name="order_edit"),
     path("orders/<int:pk>/cancel/", views.order_cancel, name="order_cancel"),
@@ -55,4 +56,5 @@ urlpatterns = [
     ),
     # Reports URLs
     path("reports/", views.reports_list, name="reports_list"),
+    path("reports/products/", views.product_analytics, name="product_analytics"),
 ]
@@ -0,0 +1,56 @@
+"""
+Atualizações da lista de pedidos em tempo real.
+
+Cada evento enviado ao grupo "orders_updates" leva o HTML da linha da tabela e
+do card do pedido, renderizado uma única vez no servidor com os mesmos parciais
+e a mesma consulta da lista (dashboard.views.order_list). O navegador de cada
+admin conectado apenas substitui ou insere os elementos, sem recarregar a página.
+"""
+
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
+
+from orders.models import Order
+
+ORDERS_GROUP = "orders_updates"
+
+
+def order_list_queryset():
+    """Consulta base da lista de pedidos, com os itens e produtos pré-carregados."""
+    return Order.objects.select_related().prefetch_related("items__product")
+
+
+def build_order_event_data(order_id) -> dict:
+    """
+    Dados do pedido para os eventos do dashboard, incluindo o HTML da linha
+    (row_html) e do card (card_html) da lista de pedidos.
+    """
+    order = order_list_queryset().filter(pk=order_id).first()
+    if order is None:
+        return {"order_id": order_id}
+
+    context = {"order": order}
+    return {
+        "order_id": order.id,
+        "customer_name": order.customer_name,
+        "phone": order.phone,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "payment_method": order.payment_method,
+        "total_price": float(order.total_price),
+        "created_at": order.created_at.isoformat(),
+        "is_late": order.is_late,
+        "items": [
+            {
+                "product_name": item.product.name,
+                "quantity": item.quantity,
+                "price": float(item.product.price),
+            }
+            for item in order.items.all()
+        ],
+        "row_html": render_to_string("dashboard/partials/order_row.html", context),
+        "card_html": render_to_string("dashboard/partials/order_card.html", context),
+    }
+
+
+abuild_order_event_data = sync_to_async(build_order_event_data)
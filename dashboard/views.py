@@ -1,18 +1,32 @@
+from collections import Counter
+from datetime import date, timedelta
+
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db import models, transaction
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods, require_POST
 
+from core.routers import use_replica
 from customers.models import Customer
-from orders.models import Order, OrderItem
+from orders.models import ArchivedOrder, Order, OrderItem
+from orders.transitions import can_transition, transition
 from products.models import Category, Product
+from products.stock import OutOfStock, adjust_order_stock
 from reports.models import DailyReport
+from reports.sales import (
+    TOP_PRODUCTS_ORDERING,
+    product_trends,
+    slow_movers,
+    top_products,
+)
 from utils.normalize import normalize_cpf, normalize_phone
 
 from .utils.metrics import calculate_metrics
+from .utils.realtime import order_list_queryset
 
 
 # Login view
@@ -39,6 +53,7 @@ def login_view(request):
 
 # Dashboard view
 @login_required
+@use_replica
 def dashboard_view(request):
     if not request.user.is_superuser:
         return redirect("product_list")
@@ -47,6 +62,15 @@ def dashboard_view(request):
 
 
 # Product CRUD views
+def _parse_stock(value):
+    """Estoque informado no formulário; vazio ou inválido = sem controle de estoque"""
+    try:
+        stock = int(value)
+    except (TypeError, ValueError):
+        return None
+    return max(stock, 0)
+
+
 @login_required
 def product_list(request):
     if not request.user.is_superuser:
@@ -112,10 +136,16 @@ def product_create(request):
     image = request.FILES.get("image")
     category_id = request.POST.get("category")
     is_active = request.POST.get("is_active") == "true"
+    stock = _parse_stock(request.POST.get("stock"))
 
     category = get_object_or_404(Category, pk=category_id)
     Product.objects.create(
-        name=name, price=price, image=image, category=category, is_active=is_active
+        name=name,
+        price=price,
+        image=image,
+        category=category,
+        is_active=is_active,
+        stock=stock,
     )
 
     return redirect("dashboard:product_list")
@@ -136,7 +166,15 @@ def product_edit(request, pk):
     if category_id:
         product.category = get_object_or_404(Category, pk=category_id)
 
-    product.save()
+    update_fields = ["name", "price", "image", "category"]
+    # O estoque só é gravado quando alterado no formulário, para não desfazer
+    # reservas feitas enquanto o formulário estava aberto
+    stock = _parse_stock(request.POST.get("stock"))
+    if "stock" in request.POST and stock != _parse_stock(request.POST.get("original_stock")):
+        product.stock = stock
+        update_fields.append("stock")
+
+    product.save(update_fields=update_fields)
     return redirect("dashboard:product_list")
 
 
@@ -159,7 +197,7 @@ def product_toggle_active(request, pk):
 
     product = Product.objects.get(pk=pk)
     product.is_active = not product.is_active
-    product.save()
+    product.save(update_fields=["is_active"])
     return redirect("dashboard:product_list")
 
 
@@ -175,6 +213,7 @@ def logout_view(request):
 
 # Order CRUD views
 @login_required
+@use_replica
 def order_list(request):
     if not request.user.is_superuser:
         return redirect("product_list")
@@ -184,8 +223,8 @@ def order_list(request):
     payment_status_filter = request.GET.get("payment_status")
     search_query = request.GET.get("search", "")
 
-    # Start with optimized queryset using select_related
-    orders = Order.objects.select_related().prefetch_related("items__product")
+    # Mesma consulta usada para renderizar as linhas enviadas via WebSocket
+    orders = order_list_queryset()
 
     # Filter orders based on the status
     if status_filter == "pending":
@@ -242,6 +281,72 @@ def order_list(request):
     )
 
 
+def _parse_date(value):
+    """Data (YYYY-MM-DD) informada no filtro; vazia ou inválida = sem filtro"""
+    try:
+        return date.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+@login_required
+@use_replica
+def archived_order_list(request):
+    """
+    Busca nos pedidos arquivados pela rotina de retenção (core.retention).
+
+    Consulta separada da lista de pedidos: a tabela de arquivo é grande e só é
+    lida sob demanda, por isso a busca exige ao menos um filtro.
+    """
+    if not request.user.is_superuser:
+        return redirect("product_list")
+
+    search_query = request.GET.get("search", "").strip()
+    date_from = _parse_date(request.GET.get("date_from"))
+    date_to = _parse_date(request.GET.get("date_to"))
+    has_filters = bool(search_query or date_from or date_to)
+
+    orders = ArchivedOrder.objects.none()
+    if has_filters:
+        orders = ArchivedOrder.objects.prefetch_related("items")
+
+        if search_query:
+            # "#123" ou "123" busca pelo número do pedido
+            order_number = search_query.lstrip("#")
+            if order_number.isdigit():
+                orders = orders.filter(
+                    models.Q(id=int(order_number))
+                    | models.Q(phone__contains=order_number)
+                )
+            else:
+                orders = orders.filter(customer_name__icontains=search_query)
+
+        if date_from:
+            orders = orders.filter(created_at__date__gte=date_from)
+        if date_to:
+            orders = orders.filter(created_at__date__lte=date_to)
+
+        orders = orders.order_by("-created_at")
+
+    paginator = Paginator(orders, 20)
+    page_number = request.GET.get("page")
+    page_obj = paginator.get_page(page_number)
+
+    return render(
+        request,
+        "dashboard/archived_order_list.html",
+        {
+            "orders": page_obj,
+            "search_query": search_query,
+            "date_from": date_from.isoformat() if date_from else "",
+            "date_to": date_to.isoformat() if date_to else "",
+            "has_filters": has_filters,
+            "page_obj": page_obj,
+            "is_paginated": page_obj.has_other_pages(),
+        },
+    )
+
+
 @login_required
 def order_detail(request, pk):
     if not request.user.is_superuser:
@@ -287,6 +392,10 @@ def order_create(request):
     return render(request, "dashboard/order_create.html", {"products": products})
 
 
+# Status do formulário de edição -> transição (orders.transitions)
+ORDER_EDIT_TRANSITIONS = {"completed": "complete", "pending": "reopen"}
+
+
 @login_required
 def order_edit(request, pk):
     if not request.user.is_superuser:
@@ -299,35 +408,68 @@ def order_edit(request, pk):
         return redirect("dashboard:order_detail", pk=order.pk)
 
     if request.method == "POST":
+        # O status muda só por transição (não sobrescreve o webhook ou outro clique)
+        status = request.POST.get("status", order.status)
+        status_transition = None
+        if status != order.status:
+            status_transition = ORDER_EDIT_TRANSITIONS.get(status)
+            if not (status_transition and can_transition(order, status_transition)):
+                request.session["error_message"] = (
+                    "Status inválido para este pedido. O pedido não foi alterado."
+                )
+                return redirect("dashboard:order_edit", pk=order.pk)
+
         # Sempre permitir edição de informações básicas se can_edit_basic_info é True
         order.customer_name = request.POST.get("customer_name")
         order.phone = request.POST.get("phone")
         order.address = request.POST.get("address")
-        order.status = request.POST.get("status")
 
+        items = None
         # Só permitir edição de itens se can_edit_items for True
         if order.can_edit_items:
             # Get product IDs and quantities from the form
             product_ids = request.POST.getlist("product_id")
             quantities = request.POST.getlist("quantity")
-
-            # Update order and items in a transaction
+            items = [
+                (Product.objects.get(pk=product_id), int(quantity))
+                for product_id, quantity in zip(product_ids, quantities, strict=False)
+                if product_id and quantity and int(quantity) > 0
+            ]
+
+        # Update order and items in a transaction
+        try:
             with transaction.atomic():
-                order.save()
-
-                # Delete existing items and create new ones
-                order.items.all().delete()
-
-                # Create new order items
-                for product_id, quantity in zip(product_ids, quantities, strict=False):
-                    if product_id and quantity and int(quantity) > 0:
-                        product = Product.objects.get(pk=product_id)
+                order.save(update_fields=["customer_name", "phone", "address"])
+
+                if items is not None:
+                    # Reservar ou devolver a diferença de estoque dos itens
+                    new_quantities = Counter()
+                    for product, quantity in items:
+                        new_quantities[product.pk] += quantity
+                    adjust_order_stock(order, new_quantities)
+
+                    # Delete existing items and create new ones
+                    order.items.all().delete()
+                    for product, quantity in items:
                         OrderItem.objects.create(
-                            order=order, product=product, quantity=int(quantity)
+                            order=order, product=product, quantity=quantity
                         )
-        else:
-            # Se não pode editar itens, apenas salva as informações básicas
-            order.save()
+        except OutOfStock as e:
+            names = Product.objects.filter(pk__in=e.product_ids).values_list(
+                "name", flat=True
+            )
+            request.session["error_message"] = (
+                f"Estoque insuficiente para: {', '.join(sorted(names))}. "
+                "O pedido não foi alterado."
+            )
+            return redirect("dashboard:order_edit", pk=order.pk)
+
+        if status_transition and not transition(order, status_transition):
+            request.session["error_message"] = (
+                "O status do pedido foi alterado por outra operação e não foi "
+                "atualizado. Os demais dados foram salvos."
+            )
+            return redirect("dashboard:order_edit", pk=order.pk)
 
         return redirect("dashboard:order_detail", pk=order.pk)
 
@@ -354,6 +496,7 @@ def order_edit(request, pk):
             "order": order,
             "products": products,
             "products_with_order_info": products_with_order_info,
+            "error_message": request.session.pop("error_message", None),
         },
     )
 
@@ -369,20 +512,10 @@ def order_cancel(request, pk):
     if order.is_finalized:
         return redirect("dashboard:order_detail", pk=order.pk)
 
-    # Permitir cancelar se a entrega foi concluída mas o pagamento foi cancelado
-    # Isso faz sentido quando houve problema com o produto e foi devolvido o dinheiro
-    if order.status == "completed" and order.payment_status == "cancelled":
-        order.status = "cancelled"
-        order.save()
-        return redirect("dashboard:order_list")
-
-    # Para outros casos, só permite cancelar se o status for "pending"
-    if order.status == "pending":
-        order.status = "cancelled"
-        # Sempre cancelar também o pagamento automaticamente
-        order.payment_status = "cancelled"
-        order.save()
-
+    # Pedidos pendentes são cancelados junto com o pagamento. Pedidos entregues só
+    # podem ser cancelados se o pagamento foi cancelado (produto devolvido e
+    # dinheiro estornado)
+    transition(order, "cancel")
     return redirect("dashboard:order_list")
 
 
@@ -393,19 +526,8 @@ def order_toggle_status(request, pk):
         return redirect("product_list")
 
     order = get_object_or_404(Order, pk=pk)
-    # Não permitir alterar status de pedidos cancelados
-    if order.status == "cancelled":
-        return redirect("dashboard:order_detail", pk=order.pk)
-
-    # Não permitir alterar status se pedido está finalizado (concluído e pago)
-    if order.is_finalized:
-        return redirect("dashboard:order_detail", pk=order.pk)
-
-    if order.status == "pending":
-        order.status = "completed"
-    else:
-        order.status = "pending"
-    order.save()
+    # Pedidos cancelados ou finalizados (concluídos e pagos) não mudam de status
+    transition(order, "complete" if order.status == "pending" else "reopen")
     return redirect("dashboard:order_detail", pk=order.pk)
 
 
@@ -416,20 +538,8 @@ def order_toggle_payment_status(request, pk):
         return redirect("product_list")
 
     order = get_object_or_404(Order, pk=pk)
-    # Permitir alteração apenas se o pagamento não estiver cancelado
-    if order.payment_status == "cancelled":
-        return redirect("dashboard:order_detail", pk=order.pk)
-
-    # Não permitir alterar pagamento se pedido está finalizado (concluído e pago)
-    if order.is_finalized:
-        return redirect("dashboard:order_detail", pk=order.pk)
-
-    # Permitir alterar pagamento mesmo para pedidos cancelados (exceto se finalizado)
-    if order.payment_status == "pending":
-        order.payment_status = "paid"
-    else:
-        order.payment_status = "pending"
-    order.save()
+    # Pagamentos cancelados e pedidos finalizados não mudam; pedidos cancelados sim
+    transition(order, "mark_paid" if order.payment_status == "pending" else "mark_unpaid")
     return redirect("dashboard:order_detail", pk=order.pk)
 
 
@@ -440,14 +550,8 @@ def order_cancel_payment(request, pk):
         return redirect("product_list")
 
     order = get_object_or_404(Order, pk=pk)
-    # Não permitir cancelar pagamento se pedido está finalizado (concluído e pago)
-    if order.is_finalized:
-        return redirect("dashboard:order_detail", pk=order.pk)
-
-    # Só permite cancelar pagamento se não estiver já cancelado
-    if order.payment_status != "cancelled":
-        order.payment_status = "cancelled"
-        order.save()
+    # Não permitir cancelar pagamento já cancelado ou de pedido finalizado
+    transition(order, "cancel_payment")
     return redirect("dashboard:order_detail", pk=order.pk)
 
 
@@ -533,6 +637,7 @@ def category_delete(request, pk):
 
 # Customer CRUD views
 @login_required
+@use_replica
 def customer_list(request):
     """Lista todos os clientes fiéis"""
     if not request.user.is_superuser:
@@ -540,8 +645,10 @@ def customer_list(request):
 
     search_query = request.GET.get("search", "")
     status_filter = request.GET.get("status", "")
+    sort = request.GET.get("sort", "")
 
-    customers = Customer.objects.select_related("user").all()
+    # Estatísticas vêm da tabela materializada (customers.stats), no mesmo JOIN
+    customers = Customer.objects.select_related("user", "stats").all()
 
     # Filtro de busca
     if search_query:
@@ -558,7 +665,16 @@ def customer_list(request):
     elif status_filter == "inactive":
         customers = customers.filter(is_active=False)
 
-    customers = customers.order_by("-created_at")
+    # Ordenação
+    sort_options = {
+        "revenue": models.F("stats__revenue").desc(nulls_last=True),
+        "orders": models.F("stats__order_count").desc(nulls_last=True),
+        "ticket": models.F("stats__average_ticket").desc(nulls_last=True),
+        "last_order": models.F("stats__last_order_at").desc(nulls_last=True),
+    }
+    if sort not in sort_options:
+        sort = ""
+    customers = customers.order_by(sort_options.get(sort, "-created_at"), "-id")
 
     # Paginação
     from django.core.paginator import Paginator
@@ -578,6 +694,7 @@ def customer_list(request):
             "customers": page_obj,
             "search_query": search_query,
             "status_filter": status_filter,
+            "sort": sort,
             "page_obj": page_obj,
             "is_paginated": page_obj.has_other_pages(),
             "error_message": error_message,
@@ -816,6 +933,7 @@ def customer_delete(request, pk):
 
 # Reports list view
 @login_required
+@use_replica
 def reports_list(request):
     """Lista todos os relatórios diários salvos"""
     if not request.user.is_superuser:
@@ -851,3 +969,46 @@ def reports_list(request):
             "is_paginated": page_obj.has_other_pages(),
         },
     )
+
+
+# Product analytics view
+ANALYTICS_PERIODS = (7, 30, 90)
+
+
+@login_required
+@use_replica
+def product_analytics(request):
+    """Mais vendidos, tendências e produtos parados a partir das vendas por produto"""
+    if not request.user.is_superuser:
+        return redirect("product_list")
+
+    try:
+        period = int(request.GET.get("period", 30))
+    except ValueError:
+        period = 30
+    if period not in ANALYTICS_PERIODS:
+        period = 30
+
+    order_by = request.GET.get("by", "revenue")
+    if order_by not in TOP_PRODUCTS_ORDERING:
+        order_by = "revenue"
+
+    end = timezone.localdate()
+    start = end - timedelta(days=period - 1)
+    trends = product_trends(start, end)
+
+    return render(
+        request,
+        "dashboard/product_analytics.html",
+        {
+            "period": period,
+            "periods": ANALYTICS_PERIODS,
+            "order_by": order_by,
+            "start": start,
+            "end": end,
+            "top_products": top_products(start, end, limit=10, by=order_by),
+            "rising": trends["rising"],
+            "falling": trends["falling"],
+            "slow_movers": slow_movers(start, end),
+        },
+    )
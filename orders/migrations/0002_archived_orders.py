@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('customer_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('customer_name', models.CharField(max_length=100)),
+                ('phone', models.CharField(db_index=True, max_length=20)),
+                ('cpf', models.CharField(blank=True, max_length=14, null=True)),
+                ('address', models.TextField()),
+                ('payment_method', models.CharField(choices=[('pix', 'PIX'), ('dinheiro', 'Dinheiro'), ('cartao_online', 'Cartão (Online)'), ('cartao_presencial', 'Cartão (Presencial)')], max_length=20)),
+                ('cash_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pendente'), ('paid', 'Pago'), ('cancelled', 'Cancelado/Devolvido')], max_length=20)),
+                ('payment_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Pedido Arquivado',
+                'verbose_name_plural': 'Pedidos Arquivados',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['phone', 'created_at'], name='orders_arch_phone_bcd470_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField(blank=True, null=True)),
+                ('product_name', models.CharField(max_length=100)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.PositiveIntegerField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+            ],
+            options={
+                'verbose_name': 'Item do Pedido Arquivado',
+                'verbose_name_plural': 'Itens dos Pedidos Arquivados',
+            },
+        ),
+    ]
@@ -47,6 +47,13 @@ class OrderQuerySet(models.QuerySet):
         """Pedidos efetivos (completed + paid)"""
         return self.filter(status="completed", payment_status="paid")
 
+    def closed(self):
+        """Pedidos que não podem mais mudar: finalizados ou totalmente cancelados"""
+        return self.filter(
+            models.Q(status="completed", payment_status="paid")
+            | models.Q(status="cancelled", payment_status="cancelled")
+        )
+
     def last_days(self, days):
         """Pedidos dos últimos N dias"""
         cutoff = timezone.now() - timedelta(days=days)
@@ -154,6 +161,10 @@ class Order(models.Model):
         default=False,
         help_text="Indica se a integração com o gateway de pagamento falhou",
     )
+    stock_reserved = models.BooleanField(
+        default=False,
+        help_text="Indica se o estoque dos itens está reservado para o pedido",
+    )
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default="pending", db_index=True
     )
@@ -171,6 +182,32 @@ class Order(models.Model):
     def __str__(self):
         return f"Order #{self.id} - {self.customer_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o estado carregado do banco, para que os receivers de post_save
+        # (customers.stats, reports.sales) detectem transições de status.
+        # None quando o campo não foi carregado (only/defer)
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_payment_status = instance.__dict__.get("payment_status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # stock_reserved só é alterado por UPDATE condicional (products.stock);
+            # uma instância carregada antes da liberação não pode reativar a reserva
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname != "stock_reserved"
+                and field.attname not in self.get_deferred_fields()
+            ]
+        super().save(*args, **kwargs)
+        # Os receivers de post_save já viram o estado anterior
+        self._loaded_status = self.status
+        self._loaded_payment_status = self.payment_status
+
     @property
     def total_price(self):
         return sum(item.quantity * item.product.price for item in self.items.all())
@@ -244,3 +281,64 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Item do Pedido"
         verbose_name_plural = "Itens do Pedido"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Pedido fechado movido para o arquivo pela rotina de retenção (core.retention).
+
+    Mantém o mesmo id do pedido original e guarda os dados desnormalizados
+    (nome e preço dos produtos no momento do arquivamento), para continuar
+    consultável mesmo que produtos ou clientes sejam removidos depois.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    customer_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    customer_name = models.CharField(max_length=100)
+    phone = models.CharField(max_length=20, db_index=True)
+    cpf = models.CharField(max_length=14, blank=True, null=True)
+    address = models.TextField()
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_CHOICES)
+    cash_value = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    payment_status = models.CharField(
+        max_length=20, choices=Order.PAYMENT_STATUS_CHOICES
+    )
+    payment_id = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pedido Arquivado"
+        verbose_name_plural = "Pedidos Arquivados"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["phone", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived Order #{self.id} - {self.customer_name}"
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(
+        ArchivedOrder, on_delete=models.CASCADE, related_name="items"
+    )
+    product_id = models.BigIntegerField(null=True, blank=True)
+    product_name = models.CharField(max_length=100)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
+    class Meta:
+        verbose_name = "Item do Pedido Arquivado"
+        verbose_name_plural = "Itens dos Pedidos Arquivados"
@@ -1,2 +1,86 @@
+from unittest import mock
 
-# Create your tests here.
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from orders.models import Order
+from orders.transitions import can_transition, transition
+
+
+class OrderTransitionTest(TestCase):
+    """Transições de status com UPDATE condicional (orders.transitions)."""
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            customer_name="Cliente",
+            phone="11999999999",
+            address="Rua A, 1",
+            payment_method="pix",
+        )
+
+    def state(self):
+        order = Order.objects.get(pk=self.order.pk)
+        return order.status, order.payment_status
+
+    def test_allowed_transition_updates_only_status_columns(self):
+        Order.objects.filter(pk=self.order.pk).update(customer_name="Outro Nome")
+
+        self.assertTrue(transition(self.order, "complete"))
+
+        self.assertEqual(self.state(), ("completed", "pending"))
+        self.assertEqual(
+            Order.objects.get(pk=self.order.pk).customer_name, "Outro Nome"
+        )
+        self.assertEqual(self.order.status, "completed")
+
+    def test_disallowed_transition_is_rejected(self):
+        transition(self.order, "complete")
+        transition(self.order, "mark_paid")
+
+        self.assertFalse(can_transition(self.order, "cancel"))
+        self.assertFalse(transition(self.order, "cancel"))
+        self.assertFalse(transition(self.order, "reopen"))
+        self.assertEqual(self.state(), ("completed", "paid"))
+
+    def test_stale_instance_loses_the_race(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.assertTrue(transition(self.order, "mark_paid"))
+
+        self.assertFalse(transition(stale, "customer_cancel"))
+
+        self.assertEqual(self.state(), ("pending", "paid"))
+        self.assertEqual(stale.status, "pending")
+
+    def test_retries_apply_the_decision_on_the_current_state(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition(self.order, "complete")
+
+        self.assertTrue(transition(stale, "payment_approved", retries=1))
+
+        self.assertEqual(self.state(), ("completed", "paid"))
+        self.assertEqual((stale.status, stale.payment_status), ("completed", "paid"))
+
+    def test_post_save_sees_the_previous_state(self):
+        seen = []
+
+        def receiver(instance, update_fields, **kwargs):
+            seen.append(
+                (instance._loaded_status, instance.status, sorted(update_fields))
+            )
+
+        post_save.connect(receiver, sender=Order)
+        self.addCleanup(post_save.disconnect, receiver, sender=Order)
+
+        transition(self.order, "customer_cancel")
+
+        self.assertEqual(seen, [("pending", "cancelled", ["payment_status", "status"])])
+        self.assertEqual(self.order._loaded_status, "cancelled")
+
+    def test_lost_transition_does_not_send_post_save(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition(self.order, "complete")
+
+        with mock.patch.object(post_save, "send") as send:
+            self.assertFalse(transition(stale, "customer_cancel"))
+
+        send.assert_not_called()
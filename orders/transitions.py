@@ -0,0 +1,149 @@
+"""
+Transições de estado dos pedidos (status e payment_status).
+
+Cada transição é um UPDATE condicional no estado lido do pedido:
+
+    UPDATE orders_order SET ... WHERE id = ? AND status = ? AND payment_status = ?
+
+Cliques simultâneos no painel, o cancelamento pelo cliente e o webhook do
+MercadoPago não sobrescrevem uns aos outros: se o pedido mudou depois de ser
+lido, o UPDATE não altera nenhuma linha e a transição perde (retorna False),
+sem SELECT ... FOR UPDATE. O pedido só é relido quando a chamada pede novas
+tentativas (webhook). Só as colunas de status são gravadas.
+
+Quem vence dispara o post_save do pedido (com update_fields), para que os
+receivers de estatísticas, vendas e estoque vejam a transição como em um save().
+"""
+
+from logging import getLogger
+
+from asgiref.sync import sync_to_async
+from django.db import router, transaction
+from django.db.models.signals import post_save
+
+from .models import Order
+
+logger = getLogger(__name__)
+
+STATUSES = [value for value, _ in Order.STATUS_CHOICES]
+PAYMENT_STATUSES = [value for value, _ in Order.PAYMENT_STATUS_CHOICES]
+STATES = [(status, payment) for status in STATUSES for payment in PAYMENT_STATUSES]
+
+FINALIZED = ("completed", "paid")
+CANCELLED = ("cancelled", "cancelled")
+
+# {nome: {(status, payment_status) de origem: (status, payment_status) de destino}}
+# Pedidos finalizados (concluídos e pagos) só mudam pelo webhook do MercadoPago
+TRANSITIONS = {
+    # Painel: alternar entrega
+    "complete": {
+        ("pending", payment): ("completed", payment) for payment in PAYMENT_STATUSES
+    },
+    "reopen": {
+        ("completed", payment): ("pending", payment)
+        for payment in PAYMENT_STATUSES
+        if payment != "paid"
+    },
+    # Painel: alternar pagamento (também em pedidos cancelados)
+    "mark_paid": {(status, "pending"): (status, "paid") for status in STATUSES},
+    "mark_unpaid": {
+        (status, "paid"): (status, "pending")
+        for status in STATUSES
+        if status != "completed"
+    },
+    "cancel_payment": {
+        (status, payment): (status, "cancelled")
+        for status, payment in STATES
+        if payment != "cancelled" and (status, payment) != FINALIZED
+    },
+    # Painel: pedidos pendentes, ou entregues com o pagamento devolvido
+    "cancel": {
+        **{("pending", payment): CANCELLED for payment in PAYMENT_STATUSES},
+        ("completed", "cancelled"): CANCELLED,
+    },
+    # Cliente: apenas enquanto entrega e pagamento estão pendentes
+    "customer_cancel": {("pending", "pending"): CANCELLED},
+    # Webhook do MercadoPago
+    "payment_approved": {
+        (status, payment): (status, "paid")
+        for status, payment in STATES
+        if payment != "paid"
+    },
+    "payment_cancelled": {state: CANCELLED for state in STATES if state != CANCELLED},
+}
+
+
+def can_transition(order, name) -> bool:
+    """Verifica se a transição é permitida a partir do estado carregado do pedido."""
+    return (order.status, order.payment_status) in TRANSITIONS[name]
+
+
+def transition(order, name, retries=0) -> bool:
+    """
+    Aplica a transição ao pedido com um UPDATE condicional no estado carregado.
+
+    Em caso de sucesso a instância é atualizada e o post_save é disparado.
+
+    Args:
+        order: Pedido com status e payment_status carregados
+        name: Nome da transição (chave de TRANSITIONS)
+        retries: Quantas vezes reler o estado e tentar de novo se outra requisição
+            alterou o pedido (o webhook precisa aplicar a decisão do gateway)
+
+    Returns:
+        bool: True se a transição foi aplicada; False se não é permitida a partir
+        do estado do pedido ou se outra requisição alterou o pedido antes
+    """
+    while not _apply(order, name):
+        if retries <= 0 or not can_transition(order, name):
+            return False
+        retries -= 1
+        order.refresh_from_db(fields=["status", "payment_status"])
+    return True
+
+
+def _apply(order, name) -> bool:
+    source = (order.status, order.payment_status)
+    target = TRANSITIONS[name].get(source)
+    if target is None:
+        return False
+
+    changes = {
+        field: value
+        for field, current, value in zip(
+            ("status", "payment_status"), source, target, strict=True
+        )
+        if current != value
+    }
+    using = router.db_for_write(Order, instance=order)
+
+    with transaction.atomic(using=using):
+        updated = (
+            Order.objects.using(using)
+            .filter(pk=order.pk, status=source[0], payment_status=source[1])
+            .update(**changes)
+        )
+        if not updated:
+            logger.info(
+                f"[ORDER] Transição {name} do pedido #{order.pk} não aplicada: "
+                f"pedido alterado por outra requisição"
+            )
+            return False
+
+        # Os receivers comparam o estado carregado com o novo, como em um save()
+        order._loaded_status, order._loaded_payment_status = source
+        order.status, order.payment_status = target
+        post_save.send(
+            sender=Order,
+            instance=order,
+            created=False,
+            update_fields=frozenset(changes),
+            raw=False,
+            using=using,
+        )
+        order._loaded_status, order._loaded_payment_status = target
+
+    return True
+
+
+atransition = sync_to_async(transition)
@@ -5,15 +5,16 @@ from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_POST
 
 from orders.models import Order
-from utils.session import get_or_create_client_session
+from orders.transitions import transition
+from utils.session import get_client_session
 
 
 def order_list(request):
     """Lista todos os pedidos da sessão atual do cliente e do customer logado"""
-    client_session = get_or_create_client_session(request)
+    client_session = get_client_session(request)
 
-    # Buscar pedidos da sessão
-    orders_query = Q(client_session=client_session)
+    # Buscar pedidos da sessão (visitante sem ClientSession não tem pedidos)
+    orders_query = Q(client_session=client_session) if client_session else Q(pk__in=[])
 
     # Se o usuário estiver logado e tiver um customer_profile, incluir pedidos do customer
     if request.user.is_authenticated and hasattr(request.user, "customer_profile"):
@@ -29,13 +30,15 @@ def order_list(request):
 
 def order_detail(request, order_id):
     """Exibe os detalhes de um pedido específico"""
-    client_session = get_or_create_client_session(request)
+    client_session = get_client_session(request)
 
     # Buscar o pedido
     order = get_object_or_404(Order, id=order_id)
 
     # Verificar se o pedido pertence à sessão atual OU ao customer logado
-    has_access = order.client_session == client_session
+    has_access = (
+        client_session is not None and order.client_session_id == client_session.pk
+    )
     if request.user.is_authenticated and hasattr(request.user, "customer_profile"):
         has_access = has_access or order.customer == request.user.customer_profile
 
@@ -56,17 +59,20 @@ def cancel_order(request, order_id):
     from asgiref.sync import async_to_sync
     from channels.layers import get_channel_layer
 
+    from dashboard.utils.realtime import ORDERS_GROUP, build_order_event_data
     from services.notifications import send_order_cancellation_notification
 
     logger = getLogger(__name__)
 
-    client_session = get_or_create_client_session(request)
+    client_session = get_client_session(request)
 
     # Buscar o pedido
     order = get_object_or_404(Order, id=order_id)
 
     # Verificar se o pedido pertence à sessão atual OU ao customer logado
-    has_access = order.client_session == client_session
+    has_access = (
+        client_session is not None and order.client_session_id == client_session.pk
+    )
     if request.user.is_authenticated and hasattr(request.user, "customer_profile"):
         has_access = has_access or order.customer == request.user.customer_profile
 
@@ -75,12 +81,9 @@ def cancel_order(request, order_id):
             {"success": False, "error": "Pedido não encontrado."}, status=404
         )
 
-    # Verificar se ambos os status são pendentes
-    if order.status == "pending" and order.payment_status == "pending":
-        order.status = "cancelled"
-        order.payment_status = "cancelled"
-        order.save()
-
+    # Só cancela se entrega e pagamento ainda estão pendentes (UPDATE condicional:
+    # perde para um pagamento aprovado pelo webhook ao mesmo tempo)
+    if transition(order, "customer_cancel"):
         # Enviar notificação de cancelamento
         try:
             send_order_cancellation_notification(order)
@@ -94,15 +97,10 @@ def cancel_order(request, order_id):
         try:
             channel_layer = get_channel_layer()
             async_to_sync(channel_layer.group_send)(
-                "orders_updates",
+                ORDERS_GROUP,
                 {
                     "type": "order_cancelled",
-                    "data": {
-                        "order_id": order.id,
-                        "status": order.status,
-                        "payment_status": order.payment_status,
-                        "customer_name": getattr(order, "customer_name", None),
-                    },
+                    "data": build_order_event_data(order.id),
                 },
             )
         except Exception as e:
@@ -24,7 +24,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "price", "is_active", "created_at")
+    list_display = ("name", "category", "price", "stock", "is_active", "created_at")
     list_filter = ("is_active", "category", "created_at")
     search_fields = ("name", "description")
     fieldsets = (
@@ -38,6 +38,7 @@ class ProductAdmin(admin.ModelAdmin):
                     "price",
                     "image",
                     "is_active",
+                    "stock",
                 )
             },
         ),
@@ -60,4 +61,12 @@ class ProductAdmin(admin.ModelAdmin):
         form.base_fields["price"].label = "Preço"
         form.base_fields["image"].label = "Imagem"
         form.base_fields["is_active"].label = "Ativo"
+        form.base_fields["stock"].label = "Estoque"
+        form.base_fields["stock"].help_text = "Vazio = sem controle de estoque"
         return form
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "stock" in form.changed_data:
+            # Product.save não grava o estoque sem update_fields explícito
+            obj.save(update_fields=["stock"])
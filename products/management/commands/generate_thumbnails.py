@@ -0,0 +1,48 @@
+"""
+Django management command para gerar as miniaturas das imagens de produto.
+
+Produtos novos ou com imagem alterada ganham miniaturas automaticamente em
+segundo plano; este comando gera as que faltam para os produtos existentes.
+
+Uso:
+    python manage.py generate_thumbnails           # Apenas produtos sem miniaturas
+    python manage.py generate_thumbnails --force   # Regera todas (ex.: após mudar THUMBNAIL_WIDTHS)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.thumbnails import generate_missing_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Gera as miniaturas (WebP e JPEG) das imagens de produto"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regera as miniaturas de todos os produtos, mesmo os que já têm",
+        )
+
+    def handle(self, *args, **options):
+        widths = ", ".join(str(width) for width in settings.THUMBNAIL_WIDTHS)
+        self.stdout.write(
+            self.style.HTTP_INFO(f"🖼️  Gerando miniaturas ({widths}px, WebP e JPEG)...")
+        )
+
+        started_at = time.monotonic()
+        generated, failed = generate_missing_thumbnails(force=options["force"])
+        elapsed = time.monotonic() - started_at
+
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(f"⚠️  {failed} produto(s) com erro (ver logs)")
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Miniaturas de {generated} produto(s) geradas em {elapsed:.2f}s"
+            )
+        )
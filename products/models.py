@@ -24,11 +24,30 @@ class Product(models.Model):
         Category, on_delete=models.CASCADE, related_name="products", default=None, null=True, blank=True
     )
     is_active = models.BooleanField(default=True, db_index=True)
+    # Unidades disponíveis; vazio = sem controle de estoque. Alterado apenas por
+    # UPDATE condicional (ver products.stock), nunca pelo valor carregado na instância
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    # Miniaturas geradas a partir de image (ver products.thumbnails)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # Salvar a instância não sobrescreve reservas nem miniaturas gravadas
+            # depois que ela foi carregada; para alterar o estoque, inclua "stock"
+            # em update_fields (thumbnails só é gravado por products.thumbnails)
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in ("stock", "thumbnails")
+                and field.attname not in self.get_deferred_fields()
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
@@ -0,0 +1,65 @@
+from logging import getLogger
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from orders.models import Order
+
+from .models import Product
+from .stock import refresh_availability, release_order_stock
+from .thumbnails import needs_thumbnails, schedule_thumbnails
+
+logger = getLogger(__name__)
+
+
+@receiver(post_save, sender=Order)
+def release_cancelled_order_stock(sender, instance, created, **kwargs):
+    """
+    Signal chamado quando um pedido é salvo: devolve o estoque reservado se o
+    pedido pendente foi cancelado (pelo cliente, pelo painel ou pelo webhook).
+
+    Pedidos cancelados depois de entregues não devolvem: os produtos já saíram.
+    """
+    if instance.status != "cancelled" or not instance.stock_reserved:
+        return
+    # Estado carregado do banco (Order.from_db e orders.transitions)
+    if created or getattr(instance, "_loaded_status", None) != "pending":
+        return
+
+    try:
+        release_order_stock(instance)
+    except Exception as e:
+        logger.error(
+            f"[STOCK] Erro ao devolver o estoque do pedido #{instance.id}: "
+            f"{type(e).__name__}: {str(e)}"
+        )
+
+
+@receiver(pre_delete, sender=Order)
+def release_deleted_order_stock(sender, instance, **kwargs):
+    """
+    Signal chamado antes de excluir um pedido (enquanto os itens ainda existem):
+    pedidos pendentes excluídos devolvem o estoque reservado.
+    """
+    if instance.status == "pending" and instance.stock_reserved:
+        release_order_stock(instance)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_availability(sender, instance, **kwargs):
+    """Atualiza o estoque em cache quando o produto é alterado."""
+    product_id = instance.pk
+
+    # Callback nomeado: com robust=True o Django registra a falha pelo __qualname__
+    def update_availability():
+        refresh_availability([product_id])
+
+    transaction.on_commit(update_availability, robust=True)
+
+
+@receiver(post_save, sender=Product)
+def generate_product_thumbnails(sender, instance, **kwargs):
+    """Agenda as miniaturas quando o produto ganha uma imagem nova."""
+    if needs_thumbnails(instance):
+        schedule_thumbnails(instance)
@@ -29,6 +29,10 @@ document.addEventListener("DOMContentLoaded", function () {
       })
         .then((response) => response.json())
         .then((data) => {
+          if (data.error) {
+            showToast("Produto indisponível", data.error);
+            return;
+          }
           showToast(
             "Produto adicionado!",
             "Item foi adicionado ao seu carrinho."
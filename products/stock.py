@@ -0,0 +1,185 @@
+"""
+Estoque dos produtos: reservas no checkout e disponibilidade em cache.
+
+Produtos com stock vazio não têm controle de estoque. A reserva é um UPDATE
+condicional por produto (stock = stock - qtd WHERE stock >= qtd): não há
+SELECT ... FOR UPDATE nem leitura antes da escrita, então checkouts simultâneos
+do mesmo produto só disputam a linha pelo tempo do próprio UPDATE. Se algum
+produto não tiver estoque suficiente, a transação inteira é desfeita.
+
+Pedidos com reserva (Order.stock_reserved) devolvem o estoque quando são
+cancelados ou excluídos ainda pendentes (ver products.signals); pedidos
+entregues e depois cancelados não devolvem. A liberação também é um UPDATE
+condicional na flag, garantindo que aconteça uma única vez. Itens editados no
+painel reservam ou devolvem a diferença (adjust_order_stock).
+
+A disponibilidade é mantida no cache a cada reserva/liberação/alteração do
+produto, para que o catálogo (lido da réplica) e o carrinho mostrem o estoque
+atual sem consultas por produto.
+"""
+
+from collections import Counter
+from logging import getLogger
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from orders.models import Order
+
+from .models import Product
+
+logger = getLogger(__name__)
+
+
+class OutOfStock(Exception):
+    """Um ou mais produtos não têm estoque suficiente para a reserva."""
+
+    def __init__(self, product_ids):
+        self.product_ids = set(product_ids)
+        super().__init__(f"Estoque insuficiente para os produtos {sorted(self.product_ids)}")
+
+
+def _cache_key(product_id) -> str:
+    return f"products:stock:{product_id}"
+
+
+def item_quantities(items) -> Counter:
+    """Quantidade por produto de uma lista de itens (carrinho ou pedido)."""
+    quantities = Counter()
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Reserva o estoque de vários produtos de uma vez.
+
+    Args:
+        quantities: {product_id: quantidade}
+
+    Raises:
+        OutOfStock: Nenhum estoque é reservado se algum produto não tiver o suficiente.
+    """
+    failed = []
+    with transaction.atomic():
+        # Ordem fixa evita deadlock entre checkouts com os mesmos produtos
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            updated = Product.objects.filter(
+                Q(stock__isnull=True) | Q(stock__gte=quantity), pk=product_id
+            ).update(stock=F("stock") - quantity)
+            if not updated:
+                failed.append(product_id)
+
+        if failed:
+            raise OutOfStock(failed)
+
+        transaction.on_commit(lambda: refresh_availability(quantities), robust=True)
+
+
+def release_stock(quantities):
+    """Devolve ao estoque as quantidades reservadas ({product_id: quantidade})."""
+    with transaction.atomic():
+        for product_id in sorted(quantities):
+            Product.objects.filter(pk=product_id, stock__isnull=False).update(
+                stock=F("stock") + quantities[product_id]
+            )
+        transaction.on_commit(lambda: refresh_availability(quantities), robust=True)
+
+
+def release_order_stock(order) -> bool:
+    """
+    Devolve o estoque reservado para um pedido, se ainda não foi devolvido.
+
+    Returns:
+        bool: True se o estoque foi devolvido nesta chamada.
+    """
+    with transaction.atomic():
+        released = Order.objects.filter(pk=order.pk, stock_reserved=True).update(
+            stock_reserved=False
+        )
+        if released:
+            release_stock(item_quantities(order.items.all()))
+    order.stock_reserved = False
+
+    if released:
+        logger.info(f"[STOCK] Estoque do pedido #{order.pk} devolvido")
+    return bool(released)
+
+
+def adjust_order_stock(order, quantities):
+    """
+    Ajusta a reserva de um pedido cujos itens foram editados: reserva o que
+    aumentou e devolve o que diminuiu. Chamar antes de substituir os itens,
+    na mesma transação, para que a reserva acompanhe os itens gravados.
+
+    Pedidos sem reserva (anteriores ao controle de estoque ou já devolvidos)
+    não alteram o estoque.
+
+    Args:
+        quantities: Novas quantidades do pedido ({product_id: quantidade})
+
+    Raises:
+        OutOfStock: Se algum produto não tiver estoque para o aumento.
+    """
+    with transaction.atomic():
+        # Trava o pedido: uma devolução simultânea (cancelamento) aguarda os novos itens
+        reserved = (
+            Order.objects.select_for_update()
+            .filter(pk=order.pk)
+            .values_list("stock_reserved", flat=True)
+            .first()
+        )
+        if not reserved:
+            return
+
+        current = item_quantities(order.items.all())
+        # Ordem fixa evita deadlock com checkouts e outras edições
+        for product_id in sorted(current.keys() | quantities.keys()):
+            change = quantities.get(product_id, 0) - current[product_id]
+            if change > 0:
+                reserve_stock({product_id: change})
+            elif change < 0:
+                release_stock({product_id: -change})
+
+
+def refresh_availability(product_ids):
+    """Grava no cache o estoque atual (lido do banco principal) dos produtos."""
+    stocks = Product.objects.filter(pk__in=list(product_ids)).values_list("id", "stock")
+    cache.set_many(
+        {_cache_key(product_id): stock for product_id, stock in stocks},
+        settings.CACHE_TIMEOUTS["stock"],
+    )
+
+
+def get_availability(products) -> dict:
+    """
+    Estoque disponível de cada produto ({product_id: unidades ou None}).
+
+    Usa o cache quando houver; senão, o valor já carregado na instância.
+    Uma única consulta ao cache para todos os produtos.
+    """
+    products = list(products)
+    cached = cache.get_many([_cache_key(product.pk) for product in products])
+    return {
+        product.pk: cached.get(_cache_key(product.pk), product.stock)
+        for product in products
+    }
+
+
+def annotate_availability(products, attr="available_stock"):
+    """Define product.<attr> com o estoque disponível de cada produto."""
+    products = list(products)
+    availability = get_availability(products)
+    for product in products:
+        setattr(product, attr, availability[product.pk])
+    return products
+
+
+def exceeds_stock(product, quantity) -> bool:
+    """Indica se a quantidade pedida passa do estoque atual do produto."""
+    available = get_availability([product])[product.pk]
+    return available is not None and quantity > available
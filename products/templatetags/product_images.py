@@ -0,0 +1,27 @@
+from django import template
+
+from products.thumbnails import picture_sources
+
+register = template.Library()
+
+PLACEHOLDER_URL = "https://via.placeholder.com/200x200?text=Sem+Imagem"
+
+
+@register.inclusion_tag("components/product_image.html")
+def product_image(product, sizes="(max-width: 768px) 50vw, 300px", css_class="", loading="lazy"):
+    """
+    Imagem do produto com srcset das miniaturas (WebP e JPEG).
+    Sem miniaturas, usa a imagem original.
+    """
+    picture = picture_sources(product)
+    if picture is None:
+        src = product.image.url if product.image else PLACEHOLDER_URL
+        picture = {"sources": [], "src": src}
+
+    return {
+        "product": product,
+        "picture": picture,
+        "sizes": sizes,
+        "css_class": css_class,
+        "loading": loading,
+    }
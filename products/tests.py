@@ -1 +1,119 @@
-# Create your tests here.
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from orders.models import Order, OrderItem
+from orders.transitions import transition
+from products.models import Product
+from products.stock import (
+    OutOfStock,
+    get_availability,
+    item_quantities,
+    reserve_stock,
+)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class StockReservationTest(TestCase):
+    """Reserva e devolução do estoque (products.stock e products.signals)."""
+
+    def setUp(self):
+        cache.clear()
+        self.pizza = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg", stock=5
+        )
+        self.soda = Product.objects.create(
+            name="Refrigerante", price=Decimal("8.00"), image="products/soda.jpg"
+        )
+
+    def stock(self, product):
+        product.refresh_from_db(fields=["stock"])
+        return product.stock
+
+    def create_order(self, quantities):
+        """Pedido pendente com o estoque reservado, como no checkout."""
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock(quantities)
+            order = Order.objects.create(
+                customer_name="Cliente",
+                phone="11999999999",
+                address="Rua A, 1",
+                payment_method="dinheiro",
+                stock_reserved=True,
+            )
+            for product_id, quantity in quantities.items():
+                OrderItem.objects.create(
+                    order=order, product_id=product_id, quantity=quantity
+                )
+        return Order.objects.get(pk=order.pk)
+
+    def test_reserve_updates_stock_and_cache(self):
+        self.create_order({self.pizza.pk: 2, self.soda.pk: 3})
+
+        self.assertEqual(self.stock(self.pizza), 3)
+        self.assertIsNone(self.stock(self.soda))
+        self.assertEqual(get_availability([self.pizza])[self.pizza.pk], 3)
+
+    def test_reserve_is_all_or_nothing(self):
+        with self.assertRaises(OutOfStock) as error:
+            reserve_stock({self.pizza.pk: 6, self.soda.pk: 1})
+
+        self.assertEqual(error.exception.product_ids, {self.pizza.pk})
+        self.assertEqual(self.stock(self.pizza), 5)
+
+    def test_cancelled_pending_order_releases_stock_once(self):
+        order = self.create_order({self.pizza.pk: 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(transition(order, "cancel"))
+        order.save()
+
+        self.assertEqual(self.stock(self.pizza), 5)
+        self.assertFalse(Order.objects.get(pk=order.pk).stock_reserved)
+        self.assertEqual(get_availability([self.pizza])[self.pizza.pk], 5)
+
+    def test_order_cancelled_after_delivery_keeps_stock(self):
+        order = self.create_order({self.pizza.pk: 2})
+        transition(order, "complete")
+        transition(order, "cancel_payment")
+
+        self.assertTrue(transition(order, "cancel"))
+
+        self.assertEqual(self.stock(self.pizza), 3)
+
+    def test_deleted_pending_order_releases_stock(self):
+        order = self.create_order({self.pizza.pk: 2})
+
+        order.delete()
+
+        self.assertEqual(self.stock(self.pizza), 5)
+
+    def test_item_quantities_sums_repeated_products(self):
+        items = [
+            OrderItem(product=self.pizza, quantity=1),
+            OrderItem(product=self.pizza, quantity=2),
+        ]
+
+        self.assertEqual(item_quantities(items), {self.pizza.pk: 3})
+
+
+class ProductSaveTest(TestCase):
+    """Product.save não sobrescreve colunas gravadas por UPDATE condicional."""
+
+    def test_stale_instance_keeps_stock_and_thumbnails(self):
+        product = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg", stock=5
+        )
+        thumbnails = {"source": "products/pizza.jpg", "variants": [{"width": 320}]}
+        Product.objects.filter(pk=product.pk).update(stock=3, thumbnails=thumbnails)
+
+        product.name = "Pizza Grande"
+        product.save()
+
+        product = Product.objects.get(pk=product.pk)
+        self.assertEqual(product.name, "Pizza Grande")
+        self.assertEqual(product.stock, 3)
+        self.assertEqual(product.thumbnails, thumbnails)
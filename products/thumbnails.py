@@ -0,0 +1,211 @@
+"""
+Miniaturas das imagens de produto.
+
+Para cada largura de THUMBNAIL_WIDTHS são gerados um WebP e um JPEG (fallback
+para navegadores sem WebP), gravados no mesmo storage da imagem original
+(sistema de arquivos em desenvolvimento, Cloudinary em produção). Os nomes
+ficam em Product.thumbnails junto com o nome da imagem de origem; se a imagem
+mudar, as miniaturas antigas deixam de ser usadas até serem geradas de novo.
+
+A geração roda fora da thread da requisição, em um pool com uma única thread
+por processo, depois do commit do produto. Produtos sem miniaturas continuam
+usando a imagem original; o comando generate_thumbnails e o job noturno do
+scheduler geram as que faltarem.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from logging import getLogger
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .models import Product
+
+logger = getLogger(__name__)
+
+THUMBNAIL_FORMATS = (
+    # (chave em Product.thumbnails, formato do Pillow, extensão, tipo MIME)
+    ("webp", "WEBP", "webp", "image/webp"),
+    ("jpeg", "JPEG", "jpg", "image/jpeg"),
+)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+
+def needs_thumbnails(product) -> bool:
+    """Indica se o produto tem imagem sem miniaturas geradas a partir dela."""
+    if not product.image:
+        return False
+    return (product.thumbnails or {}).get("source") != product.image.name
+
+
+def _encode(image, pil_format) -> bytes:
+    from PIL import Image
+
+    if pil_format == "JPEG" and image.mode != "RGB":
+        # JPEG não tem transparência: aplica a imagem sobre fundo branco
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, quality=settings.THUMBNAIL_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(product) -> bool:
+    """
+    Gera e grava as miniaturas de um produto.
+
+    Returns:
+        bool: False se o produto não tem imagem ou a imagem mudou durante a geração.
+    """
+    if not product.image:
+        return False
+
+    # Pillow só é carregado quando há miniaturas a gerar
+    from PIL import Image, ImageOps
+
+    source = product.image.name
+    storage = product.image.storage
+
+    with product.image.open("rb") as file:
+        original = Image.open(file)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ("RGB", "RGBA"):
+        has_alpha = original.mode in ("LA", "PA") or "transparency" in original.info
+        original = original.convert("RGBA" if has_alpha else "RGB")
+
+    base_name = os.path.splitext(os.path.basename(source))[0]
+    # Larguras maiores que a original não ganham nada; mantém ao menos uma
+    widths = [width for width in settings.THUMBNAIL_WIDTHS if width < original.width]
+    widths = widths or [min(settings.THUMBNAIL_WIDTHS)]
+
+    variants = []
+    for width in widths:
+        resized = original.copy()
+        resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        variant = {"width": resized.width}
+        for key, pil_format, extension, _ in THUMBNAIL_FORMATS:
+            name = f"products/thumbs/{product.pk}/{base_name}_{width}.{extension}"
+            variant[key] = storage.save(name, ContentFile(_encode(resized, pil_format)))
+        variants.append(variant)
+
+    # Miniaturas atuais no banco (podem ter sido geradas por outro processo)
+    previous = (
+        Product.objects.filter(pk=product.pk).values_list("thumbnails", flat=True).first()
+        or {}
+    )
+    thumbnails = {"source": source, "variants": variants}
+
+    # Só grava se a imagem ainda for a mesma usada na geração
+    updated = Product.objects.filter(pk=product.pk, image=source).update(
+        thumbnails=thumbnails
+    )
+    stale = variants if not updated else previous.get("variants", [])
+    for variant in stale:
+        for key, *_ in THUMBNAIL_FORMATS:
+            try:
+                storage.delete(variant[key])
+            except Exception:
+                pass
+
+    if updated:
+        product.thumbnails = thumbnails
+        logger.info(
+            f"[THUMBS] Miniaturas do produto #{product.pk} geradas: "
+            f"{', '.join(str(variant['width']) for variant in variants)}px"
+        )
+    return bool(updated)
+
+
+def _generate_in_background(product_id):
+    try:
+        product = Product.objects.filter(pk=product_id).first()
+        if product is not None and needs_thumbnails(product):
+            generate_thumbnails(product)
+    except Exception as e:
+        logger.error(
+            f"[THUMBS] Erro ao gerar miniaturas do produto #{product_id}: "
+            f"{type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+    finally:
+        # A thread do pool não passa pelo ciclo de requisição do Django
+        close_old_connections()
+
+
+def schedule_thumbnails(product):
+    """Agenda a geração das miniaturas em segundo plano após o commit."""
+    product_id = product.pk
+    transaction.on_commit(
+        lambda: _executor.submit(_generate_in_background, product_id), robust=True
+    )
+
+
+def generate_missing_thumbnails(force=False):
+    """
+    Gera as miniaturas dos produtos que ainda não têm (ou de todos, com force).
+
+    Returns:
+        tuple[int, int]: (miniaturas geradas, falhas)
+    """
+    generated = failed = 0
+    for product in Product.objects.exclude(image="").order_by("pk").iterator(chunk_size=100):
+        if not force and not needs_thumbnails(product):
+            continue
+        try:
+            if generate_thumbnails(product):
+                generated += 1
+        except Exception as e:
+            failed += 1
+            logger.error(
+                f"[THUMBS] Erro ao gerar miniaturas do produto #{product.pk}: "
+                f"{type(e).__name__}: {str(e)}"
+            )
+    return generated, failed
+
+
+def run_scheduled_thumbnails():
+    """Job noturno: gera as miniaturas que não foram geradas no upload."""
+    try:
+        generated, failed = generate_missing_thumbnails()
+        if generated or failed:
+            logger.info(
+                f"[THUMBS] Miniaturas pendentes: {generated} produto(s) gerado(s), {failed} falha(s)"
+            )
+    except Exception as e:
+        logger.error(
+            f"[THUMBS] Erro no job de miniaturas: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+
+
+def picture_sources(product) -> dict | None:
+    """
+    srcset de cada formato para o template, ou None se as miniaturas não
+    correspondem à imagem atual.
+    """
+    if not product.image or needs_thumbnails(product):
+        return None
+
+    variants = product.thumbnails.get("variants") or []
+    if not variants:
+        return None
+
+    storage = product.image.storage
+    sources = []
+    for key, _, _, mime_type in THUMBNAIL_FORMATS:
+        srcset = ", ".join(
+            f"{storage.url(variant[key])} {variant['width']}w" for variant in variants
+        )
+        sources.append({"type": mime_type, "srcset": srcset})
+
+    # Fallback: JPEG de largura intermediária para navegadores sem srcset
+    fallback = variants[len(variants) // 2]
+    return {"sources": sources, "src": storage.url(fallback["jpeg"])}
@@ -1,13 +1,19 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, ListView
 
 from cart.models import CartItem
 from cart.views import get_cart
+from core.ratelimit import rate_limit
+from core.routers import use_replica
 
 from .models import Category, Product
+from .stock import annotate_availability, exceeds_stock
 
 
+@rate_limit("cart")
 def add_to_cart(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid method"}, status=405)
@@ -19,14 +25,19 @@ def add_to_cart(request):
     cart = get_cart(request)
     # SEGURANÇA: Só permite adicionar produtos ativos
     product = get_object_or_404(Product, pk=product_id, is_active=True)
+    if exceeds_stock(product, 1):
+        return JsonResponse({"error": "Produto esgotado"}, status=400)
     item, created = CartItem.objects.get_or_create(cart=cart, product=product)
     if not created:
+        if exceeds_stock(product, item.quantity + 1):
+            return JsonResponse({"error": "Estoque insuficiente"}, status=400)
         item.quantity += 1
         item.save()
 
     return JsonResponse({"success": True, "cart_count": cart.total_quantity})
 
 
+@method_decorator(use_replica, name="get")
 class ProductListView(ListView):
     model = Product
     template_name = "products/product_list.html"
@@ -57,6 +68,9 @@ class ProductListView(ListView):
         context["search_query"] = self.request.GET.get("search", "")
         context["category_filter"] = self.request.GET.get("category", "")
         context["categories"] = Category.objects.all().order_by("name")
+        # Estoque atual (cache) em vez do valor lido da réplica
+        annotate_availability(context["products"])
+        context["stock_low_threshold"] = settings.STOCK_LOW_THRESHOLD
         return context
 
     def get(self, request, *args, **kwargs):
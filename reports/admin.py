@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import DailyReport
+from .models import DailyProductReport, DailyReport
 
 
 @admin.register(DailyReport)
@@ -71,3 +71,19 @@ class DailyReportAdmin(admin.ModelAdmin):
             },
         ),
     )
+
+
+@admin.register(DailyProductReport)
+class DailyProductReportAdmin(admin.ModelAdmin):
+    list_display = [
+        "date",
+        "product_name",
+        "quantity_sold",
+        "quantity_orders",
+        "revenue",
+    ]
+    list_filter = ["date"]
+    search_fields = ["product_name"]
+    readonly_fields = ["created_at"]
+    ordering = ["-date", "-revenue"]
+    date_hierarchy = "date"
@@ -7,7 +7,7 @@ class ReportsConfig(AppConfig):
 
     def ready(self):
         """
-        Inicializa o scheduler quando o Django inicia.
+        Registra os signals. O scheduler é iniciado pelos entrypoints do
+        servidor web (ver reports.scheduler.start_scheduler).
         """
-        from .scheduler import start_scheduler
-        start_scheduler()
+        import reports.signals  # noqa: F401
@@ -0,0 +1,79 @@
+"""
+Eleição de líder entre processos usando um lock no Redis.
+
+Cada candidato tenta gravar seu token na chave do lock (SET NX PX). Quem
+consegue é o líder e precisa renovar o TTL periodicamente; se o processo
+morrer, a chave expira e outro candidato assume após no máximo um TTL.
+Renovação e liberação só afetam o lock se o token ainda for o do processo.
+"""
+
+import os
+import socket
+from logging import getLogger
+from uuid import uuid4
+
+import redis
+from django.conf import settings
+
+logger = getLogger(__name__)
+
+# Renova o TTL apenas se o lock ainda pertence a este processo
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Remove o lock apenas se ainda pertence a este processo
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    """
+    Lock de liderança com expiração, compartilhado entre processos e containers.
+
+    Args:
+        name: Nome da eleição (ex.: "scheduler")
+        ttl: Tempo em segundos até o lock expirar sem renovação
+        url: URL do Redis (padrão: settings.REDIS_URL)
+    """
+
+    def __init__(self, name: str, ttl: int, url: str | None = None):
+        self.key = f"delivery:leader:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.client = redis.Redis.from_url(
+            url or settings.REDIS_URL,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+        )
+        self._renew = self.client.register_script(_RENEW_SCRIPT)
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+
+    def acquire(self) -> bool:
+        """Tenta se tornar líder. Retorna True se o lock foi obtido."""
+        return bool(self.client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    def renew(self) -> bool:
+        """Renova o TTL. Retorna False se a liderança foi perdida."""
+        return bool(self._renew(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    def release(self) -> None:
+        """Libera o lock para que outro candidato assuma imediatamente."""
+        try:
+            self._release(keys=[self.key], args=[self.token])
+        except redis.RedisError as e:
+            logger.warning(
+                f"[LEADER] Erro ao liberar lock {self.key}: {type(e).__name__}: {str(e)}"
+            )
+
+    def holder(self) -> str | None:
+        """Retorna o token do líder atual, se houver."""
+        value = self.client.get(self.key)
+        return value.decode() if value else None
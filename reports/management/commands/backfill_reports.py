@@ -0,0 +1,106 @@
+"""
+Django management command para gerar relatórios diários retroativos.
+
+Uso:
+    python manage.py backfill_reports                             # Dias sem relatório desde o primeiro pedido
+    python manage.py backfill_reports --days 30                   # Últimos 30 dias
+    python manage.py backfill_reports --start 2025-01-01 --end 2025-12-31
+    python manage.py backfill_reports --days 365 --overwrite      # Recalcular relatórios existentes
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.models import Order
+from reports.tasks import backfill_daily_reports
+
+
+class Command(BaseCommand):
+    help = "Gera ou recalcula os relatórios diários de um intervalo de datas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="Data inicial no formato YYYY-MM-DD (padrão: data do primeiro pedido)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Data final no formato YYYY-MM-DD (padrão: ontem)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=0,
+            help="Processar os últimos N dias (ignora --start)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=31,
+            help="Quantidade de dias calculados por consulta (padrão: 31)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Quantidade de threads do pool (padrão: 4)",
+        )
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Recalcula também os dias que já possuem relatório",
+        )
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        end = options["end"] or yesterday
+
+        if options["days"] > 0:
+            start = end - timedelta(days=options["days"] - 1)
+        elif options["start"]:
+            start = options["start"]
+        else:
+            first_order = Order.objects.order_by("created_at").first()
+            if first_order is None:
+                self.stdout.write(self.style.WARNING("⚠️ Nenhum pedido encontrado"))
+                return
+            start = timezone.localtime(first_order.created_at).date()
+
+        if end > yesterday:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"⚠️ O dia atual ainda não está fechado; processando até {yesterday}"
+                )
+            )
+            end = yesterday
+
+        if start > end:
+            raise CommandError("A data inicial deve ser anterior ou igual à data final")
+        if options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size e --workers devem ser maiores que zero")
+
+        self.stdout.write(
+            self.style.HTTP_INFO(f"🚀 Gerando relatórios de {start} a {end}")
+        )
+
+        started_at = time.monotonic()
+        result = backfill_daily_reports(
+            start,
+            end,
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            overwrite=options["overwrite"],
+        )
+        elapsed = time.monotonic() - started_at
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {result['created']} relatório(s) criado(s), "
+                f"{result['updated']} atualizado(s) em {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,35 @@
+"""
+Django management command para rodar o scheduler em um processo dedicado.
+
+Uso:
+    python manage.py run_scheduler
+
+Pode rodar em mais de uma réplica: apenas o líder eleito executa os jobs e,
+se ele cair, outra réplica assume após o TTL do lock (SCHEDULER_LOCK_TTL).
+Combine com SCHEDULER_MODE=off nos processos web.
+"""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from reports.scheduler import run_leader_election
+
+
+class Command(BaseCommand):
+    help = "Roda o scheduler de tarefas em processo dedicado, com eleição de líder"
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def _stop(signum, frame):
+            self.stdout.write(self.style.WARNING("🛑 Encerrando scheduler..."))
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        self.stdout.write(self.style.HTTP_INFO("🚀 Scheduler iniciado"))
+        run_leader_election(stop_event)
+        self.stdout.write(self.style.SUCCESS("✅ Scheduler encerrado"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('product_name', models.CharField(max_length=100)),
+                ('quantity_sold', models.IntegerField(default=0)),
+                ('quantity_orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_reports', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Relatório Diário de Produto',
+                'verbose_name_plural': 'Relatórios Diários de Produtos',
+                'ordering': ['-date', '-revenue'],
+                'indexes': [models.Index(fields=['product', 'date'], name='reports_dai_product_86c5f5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='unique_daily_product_report')],
+            },
+        ),
+    ]
@@ -67,3 +67,44 @@ class DailyReport(models.Model):
             "taxa_conclusao": float(self.taxa_conclusao),
             "taxa_cancelamento": float(self.taxa_cancelamento),
         }
+
+
+class DailyProductReport(models.Model):
+    """
+    Vendas de um produto em um dia, salvas junto com o DailyReport.
+    Permite montar relatórios por produto em intervalos de datas
+    sem varrer os pedidos.
+    """
+
+    date = models.DateField(db_index=True)
+    product = models.ForeignKey(
+        "products.Product",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_reports",
+    )
+    # Nome do produto no dia do relatório (mantido mesmo se o produto for excluído)
+    product_name = models.CharField(max_length=100)
+
+    quantity_sold = models.IntegerField(default=0)
+    quantity_orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Relatório Diário de Produto"
+        verbose_name_plural = "Relatórios Diários de Produtos"
+        ordering = ["-date", "-revenue"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product"], name="unique_daily_product_report"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["product", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} - {self.date.strftime('%d/%m/%Y')}"
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from datetime import date
+from logging import getLogger
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .renderer import render_pdf
+from .sales import top_products_of_day
+
+logger = getLogger(__name__)
+
+# Incrementar sempre que o template do PDF mudar, para invalidar o cache
+PDF_TEMPLATE_VERSION = 2
+
+# Locks por digest dentro do processo (evita renderizar o mesmo PDF em paralelo).
+# Cada lock existe enquanto alguma thread o segura ou aguarda por ele
+_render_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+_render_locks_guard = threading.Lock()
+
+
+def report_pdf_html(data, date, generated_at, products=None) -> str:
+    """
+    Renderiza o HTML do relatório diário usado no PDF.
+
+    Args:
+        data: Dicionário com as métricas do relatório
+        date: Data a que o relatório se refere
+        generated_at: Data/hora exibida como "Relatório gerado em"
+        products: Produtos mais vendidos do dia (ver reports.sales.top_products_of_day)
+    """
+    return render_to_string(
+        "reports/daily_report.html",
+        {
+            "data": data,
+            "date": date,
+            "now": generated_at,
+            "products": products or [],
+        },
+    )
+
+
+def render_report_pdf(data, date, generated_at, products=None) -> bytes:
+    """
+    Gera o PDF do relatório diário no pool de renderização (ver reports.renderer).
+    Os argumentos são os de report_pdf_html.
+    """
+    return render_pdf(report_pdf_html(data, date, generated_at, products=products))
+
+
+GROUP_BY_LABELS = {"day": "Dia", "week": "Semana", "month": "Mês"}
+
+COMPARISON_ROWS = [
+    ("Total de Pedidos", "quantity_orders", False),
+    ("Pedidos Concluídos", "quantity_orders_status_completed", False),
+    ("Pedidos Cancelados", "quantity_orders_status_cancelled", False),
+    ("Receita Confirmada", "revenue", True),
+    ("Ticket Médio", "ticket_medio", True),
+]
+
+
+def range_report_pdf_html(report_data, generated_at) -> str:
+    """
+    Renderiza o HTML de um relatório de intervalo (ver reports.ranges).
+
+    Args:
+        report_data: Dicionário retornado por calculate_range_report_data
+        generated_at: Data/hora exibida como "Relatório gerado em"
+    """
+    context = {
+        "report": report_data,
+        "start": date.fromisoformat(report_data["start"]),
+        "end": date.fromisoformat(report_data["end"]),
+        "group_by_label": GROUP_BY_LABELS[report_data["group_by"]],
+        "series": [
+            {**row, "period": date.fromisoformat(row["period"])}
+            for row in report_data["series"]
+        ],
+        "now": generated_at,
+    }
+
+    if "comparison" in report_data:
+        context["previous_start"] = date.fromisoformat(report_data["previous"]["start"])
+        context["previous_end"] = date.fromisoformat(report_data["previous"]["end"])
+        context["comparison_rows"] = [
+            {
+                "label": label,
+                "is_money": is_money,
+                "current": report_data["summary"][key],
+                **report_data["comparison"][key],
+            }
+            for label, key, is_money in COMPARISON_ROWS
+        ]
+
+    return render_to_string("reports/range_report.html", context)
+
+
+def report_pdf_digest(report, products=None) -> str:
+    """
+    Calcula o digest (sha256) do conteúdo de um relatório salvo.
+    O PDF é endereçado por conteúdo: mesmo digest, mesmo arquivo.
+
+    Inclui os mais vendidos do dia, atualizados a cada pedido pago sem alterar
+    o DailyReport. products evita consultá-los de novo quando já carregados.
+    """
+    if products is None:
+        products = top_products_of_day(report.date)
+    payload = json.dumps(
+        {
+            "version": PDF_TEMPLATE_VERSION,
+            "date": report.date.isoformat(),
+            "generated_at": report.updated_at.isoformat(),
+            "data": report.get_data_dict(),
+            "products": products,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_dir() -> Path:
+    return Path(settings.REPORTS_PDF_CACHE_DIR)
+
+
+def _cache_path(report_date, digest: str) -> Path:
+    return _cache_dir() / f"{report_date.isoformat()}-{digest}.pdf"
+
+
+def get_cached_report_pdf(report, digest=None) -> Path | None:
+    """Retorna o caminho do PDF em cache do relatório, ou None se não existir."""
+    path = _cache_path(report.date, digest or report_pdf_digest(report))
+    return path if path.exists() else None
+
+
+def _remove_superseded(path: Path, report_date):
+    """Remove os PDFs de versões anteriores do relatório do mesmo dia."""
+    for old_path in _cache_dir().glob(f"{report_date.isoformat()}-*.pdf"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+
+
+def _write_atomic(path: Path, content: bytes):
+    """Escreve o arquivo de forma atômica (tmp + rename) para não servir PDFs parciais."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _get_render_lock(digest: str) -> threading.Lock:
+    with _render_locks_guard:
+        lock = _render_locks.get(digest)
+        if lock is None:
+            lock = _render_locks[digest] = threading.Lock()
+        return lock
+
+
+def ensure_report_pdf(report) -> Path:
+    """
+    Garante que o PDF do relatório salvo exista no cache e retorna o caminho.
+
+    Single-flight: dentro do processo um lock por digest serializa as threads,
+    e entre processos/workers um lock no cache (cache.add é atômico no Redis)
+    garante que apenas um worker renderize. Os demais aguardam o arquivo.
+    """
+    products = top_products_of_day(report.date)
+    digest = report_pdf_digest(report, products)
+    path = _cache_path(report.date, digest)
+    if path.exists():
+        return path
+
+    lock_key = f"reports:pdf:render:{digest}"
+    lock_timeout = settings.REPORTS_PDF_RENDER_LOCK_TIMEOUT
+
+    with _get_render_lock(digest):
+        if path.exists():
+            return path
+
+        deadline = time.monotonic() + lock_timeout
+        acquired = cache.add(lock_key, "1", lock_timeout)
+        while not acquired:
+            # Outro worker está renderizando o mesmo PDF
+            if path.exists():
+                return path
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    f"[PDF] Timeout aguardando renderização do relatório {report.date}, renderizando localmente"
+                )
+                break
+            time.sleep(0.2)
+            acquired = cache.add(lock_key, "1", lock_timeout)
+
+        try:
+            if path.exists():
+                return path
+
+            logger.info(f"[PDF] Renderizando PDF do relatório de {report.date}")
+            pdf = render_report_pdf(
+                report.get_data_dict(),
+                report.date,
+                report.updated_at,
+                products=products,
+            )
+            _write_atomic(path, pdf)
+            _remove_superseded(path, report.date)
+            logger.info(f"[PDF] PDF do relatório de {report.date} salvo em cache")
+            return path
+        finally:
+            if acquired:
+                cache.delete(lock_key)
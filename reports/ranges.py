@@ -0,0 +1,333 @@
+"""
+Relatórios por intervalo de datas.
+
+Os dias já fechados são agregados a partir dos DailyReport/DailyProductReport
+salvos (uma linha por dia), e apenas o dia atual é calculado em tempo real.
+Assim um relatório de 90 dias custa uma agregação sobre ~90 linhas,
+independente do volume de pedidos.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailyProductReport, DailyReport
+from .utils import calculate_daily_product_data, calculate_daily_report_data
+
+# Limite de dias por relatório
+MAX_RANGE_DAYS = 366
+
+PERIODS = ("today", "week", "month", "last_7", "last_30", "last_90")
+GROUP_BY = ("day", "week", "month")
+
+# Campos somados de um dia para o outro
+SUM_FIELDS = (
+    "quantity_orders",
+    "quantity_orders_status_completed",
+    "quantity_orders_status_cancelled",
+    "quantity_orders_status_pending",
+    "quantity_orders_late",
+    "revenue",
+    "revenue_pending",
+)
+
+# Mapeamento campo do intervalo -> campo do DailyReport
+REPORT_FIELDS = {
+    "quantity_orders": "quantity_orders",
+    "quantity_orders_status_completed": "quantity_orders_status_completed",
+    "quantity_orders_status_cancelled": "quantity_orders_status_cancelled",
+    "quantity_orders_status_pending": "quantity_orders_status_pending",
+    "quantity_orders_late": "quantity_orders_late",
+    "revenue": "revenue_today",
+    "revenue_pending": "revenue_pending_today",
+}
+
+
+def resolve_period(period=None, start=None, end=None, today=None):
+    """
+    Resolve o intervalo [start, end] a partir de um período nomeado
+    ou de datas explícitas.
+
+    Raises:
+        ValueError: Se o período ou o intervalo forem inválidos.
+    """
+    today = today or timezone.localdate()
+
+    if start or end:
+        start = start or end
+        end = end or today
+    elif period in (None, "", "today"):
+        start = end = today
+    elif period == "week":
+        start = today - timedelta(days=today.weekday())
+        end = today
+    elif period == "month":
+        start = today.replace(day=1)
+        end = today
+    elif period.startswith("last_") and period in PERIODS:
+        days = int(period.split("_")[1])
+        start = today - timedelta(days=days - 1)
+        end = today
+    else:
+        raise ValueError(f"Período inválido: {period}")
+
+    if start > end:
+        raise ValueError("A data inicial deve ser anterior ou igual à data final.")
+
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"O intervalo máximo é de {MAX_RANGE_DAYS} dias.")
+
+    return start, end
+
+
+def previous_period(start, end):
+    """Retorna o período imediatamente anterior, com a mesma quantidade de dias."""
+    days = (end - start).days + 1
+    return start - timedelta(days=days), start - timedelta(days=1)
+
+
+def _empty_totals():
+    return {field: Decimal("0") for field in SUM_FIELDS}
+
+
+def _add_live_day(totals, live):
+    """Soma os dados do dia atual (DailyReportData) aos totais."""
+    totals["quantity_orders"] += live["quantity_orders"]
+    totals["quantity_orders_status_completed"] += live[
+        "quantity_orders_status_completed"
+    ]
+    totals["quantity_orders_status_cancelled"] += live[
+        "quantity_orders_status_cancelled"
+    ]
+    totals["quantity_orders_status_pending"] += live["quantity_orders_status_pending"]
+    totals["quantity_orders_late"] += live["quantity_orders_late"]
+    totals["revenue"] += Decimal(str(live["revenue_today"]))
+    totals["revenue_pending"] += Decimal(str(live["revenue_pending_today"]))
+
+
+def _finalize(totals):
+    """Converte os totais para tipos serializáveis e calcula as métricas derivadas."""
+    result = {
+        field: (
+            float(totals[field])
+            if field.startswith("revenue")
+            else int(totals[field] or 0)
+        )
+        for field in SUM_FIELDS
+    }
+
+    completed = result["quantity_orders_status_completed"]
+    total_orders = result["quantity_orders"]
+
+    result["ticket_medio"] = result["revenue"] / completed if completed > 0 else 0.0
+    result["taxa_conclusao"] = (
+        completed / total_orders * 100 if total_orders > 0 else 0.0
+    )
+    result["taxa_cancelamento"] = (
+        result["quantity_orders_status_cancelled"] / total_orders * 100
+        if total_orders > 0
+        else 0.0
+    )
+    return result
+
+
+def _sum_annotations():
+    return {
+        field: Sum(report_field) for field, report_field in REPORT_FIELDS.items()
+    }
+
+
+def _bucket_start(day, group_by):
+    if group_by == "week":
+        return day - timedelta(days=day.weekday())
+    if group_by == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _calculate_totals(start, end, today, live=None, group_by=None):
+    """
+    Agrega os relatórios salvos de [start, end] e soma o dia atual em tempo real.
+
+    Returns:
+        tuple: (totais, buckets por período ou None, dias sem relatório salvo)
+    """
+    closed_end = min(end, today - timedelta(days=1))
+    closed = DailyReport.objects.filter(date__gte=start, date__lte=closed_end)
+
+    totals = _empty_totals()
+    saved_dates = set()
+    # Sem dias fechados (hoje, semana iniciada hoje ou datas futuras) a série
+    # ainda existe, com no máximo o dia atual
+    buckets = {} if group_by else None
+
+    if start <= closed_end:
+        if group_by:
+            # Uma linha por período (dia, semana ou mês) direto do banco
+            if group_by == "day":
+                rows = closed.values("date").annotate(
+                    bucket=Max("date"), **_sum_annotations()
+                )
+            else:
+                trunc = TruncWeek if group_by == "week" else TruncMonth
+                rows = (
+                    closed.annotate(bucket=trunc("date"))
+                    .values("bucket")
+                    .annotate(days=Count("id"), **_sum_annotations())
+                )
+
+            for row in rows.order_by("bucket"):
+                bucket = _empty_totals()
+                for field in SUM_FIELDS:
+                    bucket[field] += row[field] or 0
+                    totals[field] += row[field] or 0
+                buckets[row["bucket"]] = bucket
+        else:
+            aggregated = closed.aggregate(**_sum_annotations())
+            for field in SUM_FIELDS:
+                totals[field] += aggregated[field] or 0
+
+        saved_dates = set(closed.values_list("date", flat=True))
+
+    includes_today = start <= today <= end
+    if includes_today:
+        live = live or calculate_daily_report_data()
+        _add_live_day(totals, live)
+        if buckets is not None:
+            bucket = buckets.setdefault(_bucket_start(today, group_by), _empty_totals())
+            _add_live_day(bucket, live)
+
+    missing_days = [
+        start + timedelta(days=offset)
+        for offset in range((closed_end - start).days + 1)
+        if start + timedelta(days=offset) not in saved_dates
+    ]
+
+    return totals, buckets, missing_days
+
+
+def _calculate_products(start, end, today):
+    """Vendas por produto no intervalo, a partir dos DailyProductReport salvos."""
+    closed_end = min(end, today - timedelta(days=1))
+    products = {}
+
+    if start <= closed_end:
+        rows = (
+            DailyProductReport.objects.filter(date__gte=start, date__lte=closed_end)
+            .values("product_id")
+            .annotate(
+                product_name=Max("product_name"),
+                quantity_sold=Sum("quantity_sold"),
+                quantity_orders=Sum("quantity_orders"),
+                revenue=Sum("revenue"),
+            )
+        )
+        for row in rows:
+            products[row["product_id"]] = {
+                "product_id": row["product_id"],
+                "product_name": row["product_name"],
+                "quantity_sold": row["quantity_sold"] or 0,
+                "quantity_orders": row["quantity_orders"] or 0,
+                "revenue": Decimal(row["revenue"] or 0),
+            }
+
+    if start <= today <= end:
+        for live in calculate_daily_product_data():
+            product = products.setdefault(
+                live["product_id"],
+                {
+                    "product_id": live["product_id"],
+                    "product_name": live["product_name"],
+                    "quantity_sold": 0,
+                    "quantity_orders": 0,
+                    "revenue": Decimal("0"),
+                },
+            )
+            product["quantity_sold"] += live["quantity_sold"]
+            product["quantity_orders"] += live["quantity_orders"]
+            product["revenue"] += Decimal(str(live["revenue"]))
+
+    result = sorted(products.values(), key=lambda p: p["revenue"], reverse=True)
+    for product in result:
+        product["revenue"] = float(product["revenue"])
+    return result
+
+
+def _compare(current, previous):
+    """Calcula a variação absoluta e percentual de cada métrica em relação ao período anterior."""
+    comparison = {}
+    for field, value in current.items():
+        previous_value = previous.get(field, 0)
+        change = value - previous_value
+        comparison[field] = {
+            "previous": previous_value,
+            "change": change,
+            "change_pct": (change / previous_value * 100) if previous_value else None,
+        }
+    return comparison
+
+
+def calculate_range_report_data(
+    start: date,
+    end: date,
+    group_by: str = "day",
+    compare: bool = True,
+    include_products: bool = True,
+) -> dict:
+    """
+    Calcula o relatório de um intervalo de datas.
+
+    Args:
+        start: Data inicial (inclusiva)
+        end: Data final (inclusiva)
+        group_by: Agrupamento da série ("day", "week" ou "month")
+        compare: Se deve comparar com o período anterior de mesma duração
+        include_products: Se deve incluir as vendas por produto
+
+    Returns:
+        dict: Totais, série agrupada, vendas por produto e comparação.
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Agrupamento inválido: {group_by}")
+
+    today = timezone.localdate()
+
+    # O dia atual é calculado uma única vez, mesmo se usado nos dois períodos
+    live = calculate_daily_report_data() if start <= today <= end else None
+
+    totals, buckets, missing_days = _calculate_totals(
+        start, end, today, live=live, group_by=group_by
+    )
+    summary = _finalize(totals)
+
+    data = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": (end - start).days + 1,
+        "group_by": group_by,
+        "summary": summary,
+        "series": [
+            {"period": bucket.isoformat(), **_finalize(bucket_totals)}
+            for bucket, bucket_totals in sorted(buckets.items())
+        ],
+        "missing_days": [day.isoformat() for day in missing_days],
+    }
+
+    if include_products:
+        data["products"] = _calculate_products(start, end, today)
+
+    if compare:
+        previous_start, previous_end = previous_period(start, end)
+        previous_totals, _, _ = _calculate_totals(previous_start, previous_end, today)
+        previous_summary = _finalize(previous_totals)
+        data["previous"] = {
+            "start": previous_start.isoformat(),
+            "end": previous_end.isoformat(),
+            "summary": previous_summary,
+        }
+        data["comparison"] = _compare(summary, previous_summary)
+
+    return data
@@ -0,0 +1,229 @@
+"""
+Pool de processos para a renderização dos PDFs com WeasyPrint.
+
+Gerar um PDF é trabalho de CPU que segura o GIL: rodando em uma thread do
+worker ASGI, alguns downloads simultâneos atrasavam o checkout no mesmo
+processo. Aqui o HTML é montado no processo web (templates e banco) e só a
+conversão HTML → PDF roda em processos separados:
+
+- REPORTS_PDF_WORKERS processos por worker web, iniciados no primeiro PDF e
+  mantidos aquecidos (WeasyPrint e fontes já carregados);
+- fila limitada a REPORTS_PDF_QUEUE_SIZE PDFs; além disso PDFRendererBusy;
+- cada PDF é interrompido após REPORTS_PDF_RENDER_TIMEOUT segundos
+  (PDFRenderTimeout), sem derrubar os demais.
+
+As views assíncronas usam arender_pdf (aguarda sem ocupar threads); o
+scheduler e ensure_report_pdf usam render_pdf.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from logging import getLogger
+
+from django.conf import settings
+
+from core.metrics import record_pdf_render
+
+logger = getLogger(__name__)
+
+# Folga além do pior caso de fila + renderização antes de considerar o pool travado
+DEADLINE_GRACE_SECONDS = 5
+
+
+class PDFRenderError(Exception):
+    """Falha ao gerar um PDF no pool de renderização."""
+
+
+class PDFRendererBusy(PDFRenderError):
+    """Fila de renderização cheia."""
+
+
+class PDFRenderTimeout(PDFRenderError):
+    """O PDF passou do tempo máximo de renderização."""
+
+
+# --- Processos de renderização ---
+
+
+def _raise_timeout(signum, frame):
+    raise PDFRenderTimeout("Tempo máximo de renderização do PDF excedido")
+
+
+def _init_worker():
+    """Aquece o processo: carrega o WeasyPrint e as fontes antes do primeiro PDF."""
+    # Ctrl+C e o encerramento são tratados pelo processo web
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+    from weasyprint import HTML
+
+    HTML(string="<p>warm-up</p>").write_pdf()
+
+
+def _render_in_worker(html_string, timeout) -> bytes:
+    from weasyprint import HTML
+
+    if not hasattr(signal, "setitimer"):
+        return HTML(string=html_string).write_pdf()
+
+    # A tarefa roda na thread principal do processo: o alarme interrompe só este PDF
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return HTML(string=html_string).write_pdf()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# --- Pool no processo web ---
+
+
+class PDFRenderer:
+    """
+    Pool de renderização do processo web, com concorrência e fila limitadas.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: int):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        slots = self.workers + max(0, queue_size)
+        self._slots = threading.BoundedSemaphore(slots)
+        # Pior caso: esperar todas as rodadas da fila e então renderizar
+        self.deadline = timeout * math.ceil(slots / self.workers) + DEADLINE_GRACE_SECONDS
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"[PDF] Iniciando pool de renderização com {self.workers} processo(s)")
+                # spawn: o processo web tem threads (event loop, scheduler), fork não é seguro
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Descarta um pool quebrado ou travado; o próximo PDF cria um novo."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # Processos presos em código C não respondem ao alarme: encerra à força
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, html_string):
+        """
+        Enfileira um PDF e retorna (executor, future).
+
+        Raises:
+            PDFRendererBusy: Se a fila estiver cheia
+        """
+        if not self._slots.acquire(blocking=False):
+            record_pdf_render("rejected")
+            raise PDFRendererBusy("Fila de renderização de PDFs cheia")
+
+        started = time.monotonic()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_render_in_worker, html_string, self.timeout)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self._discard_executor(executor)
+            record_pdf_render("error")
+            raise PDFRenderError(f"Pool de renderização indisponível: {e}") from e
+
+        def _finished(future):
+            self._slots.release()
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                result = "ok"
+            elif isinstance(error, PDFRenderTimeout):
+                result = "timeout"
+            else:
+                result = "error"
+            record_pdf_render(result, time.monotonic() - started)
+
+        future.add_done_callback(_finished)
+        return executor, future
+
+    def _handle_error(self, executor, error):
+        if isinstance(error, BrokenProcessPool):
+            logger.error(f"[PDF] Processo de renderização encerrado inesperadamente: {error}")
+            self._discard_executor(executor)
+            raise PDFRenderError("Processo de renderização encerrado inesperadamente") from error
+        if isinstance(error, (FutureTimeoutError, asyncio.TimeoutError)):
+            logger.error(
+                f"[PDF] Nenhuma resposta do pool em {self.deadline}s, reiniciando processos"
+            )
+            self._discard_executor(executor)
+            raise PDFRenderTimeout("Pool de renderização não respondeu") from error
+        raise error
+
+    def render(self, html_string) -> bytes:
+        """Gera o PDF aguardando o resultado na thread atual."""
+        executor, future = self.submit(html_string)
+        try:
+            return future.result(timeout=self.deadline)
+        except PDFRenderError:
+            raise
+        except Exception as e:
+            self._handle_error(executor, e)
+
+    async def arender(self, html_string) -> bytes:
+        """Gera o PDF sem bloquear o event loop."""
+        executor, future = self.submit(html_string)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.deadline)
+        except PDFRenderError:
+            raise
+        except Exception as e:
+            self._handle_error(executor, e)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> PDFRenderer:
+    """Retorna o pool de renderização do processo, criando-o se necessário."""
+    global _renderer
+
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PDFRenderer(
+                    workers=settings.REPORTS_PDF_WORKERS,
+                    queue_size=settings.REPORTS_PDF_QUEUE_SIZE,
+                    timeout=settings.REPORTS_PDF_RENDER_TIMEOUT,
+                )
+
+    return _renderer
+
+
+def render_pdf(html_string) -> bytes:
+    """Converte o HTML em PDF no pool de renderização (bloqueia a thread atual)."""
+    return get_renderer().render(html_string)
+
+
+async def arender_pdf(html_string) -> bytes:
+    """Converte o HTML em PDF no pool de renderização."""
+    return await get_renderer().arender(html_string)
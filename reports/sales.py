@@ -0,0 +1,277 @@
+"""
+Vendas por produto: manutenção incremental e consultas analíticas.
+
+As vendas ficam no DailyProductReport (uma linha por produto e dia, apenas
+pedidos pagos, pelo dia de criação do pedido). Além de serem gravadas junto com
+o relatório diário, as linhas são atualizadas a cada pedido que passa a ser
+(ou deixa de ser) pago, e os últimos PRODUCT_SALES_REBUILD_DAYS dias são
+recalculados toda madrugada pelo scheduler para corrigir divergências.
+
+As consultas (mais vendidos, tendências, produtos parados) leem apenas essa
+tabela: o custo é limitado por produtos × dias, independente do volume de pedidos.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from orders.models import ArchivedOrder
+from products.models import Product
+
+from .models import DailyProductReport
+from .ranges import previous_period
+from .utils import calculate_daily_products_data
+
+logger = getLogger(__name__)
+
+TOP_PRODUCTS_ORDERING = {
+    "revenue": "-revenue",
+    "quantity": "-quantity_sold",
+    "orders": "-quantity_orders",
+}
+
+
+# --- Manutenção incremental ---
+
+
+def apply_order_sales(order, sign=1):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) os itens de um pedido nas vendas do dia.
+    """
+    day = timezone.localdate(order.created_at)
+
+    sales = defaultdict(lambda: {"quantity": 0, "revenue": Decimal("0"), "name": ""})
+    for item in order.items.select_related("product"):
+        product_sales = sales[item.product_id]
+        product_sales["quantity"] += item.quantity
+        product_sales["revenue"] += item.quantity * item.product.price
+        product_sales["name"] = item.product.name
+
+    with transaction.atomic():
+        # Ordem fixa dos produtos: pedidos simultâneos bloqueiam as linhas na
+        # mesma sequência e não entram em deadlock
+        for product_id, product_sales in sorted(sales.items()):
+            DailyProductReport.objects.get_or_create(
+                date=day,
+                product_id=product_id,
+                defaults={"product_name": product_sales["name"]},
+            )
+            DailyProductReport.objects.filter(date=day, product_id=product_id).update(
+                quantity_sold=F("quantity_sold") + sign * product_sales["quantity"],
+                quantity_orders=F("quantity_orders") + sign,
+                revenue=F("revenue") + sign * product_sales["revenue"],
+            )
+
+        if sign < 0:
+            DailyProductReport.objects.filter(
+                date=day, product_id__in=list(sales), quantity_orders__lte=0
+            ).delete()
+
+
+def handle_order_saved(order, created):
+    """
+    Aplica a mudança de status de pagamento do pedido às vendas por produto.
+
+    Roda após o commit, quando os itens de um pedido recém-criado já existem.
+    """
+    loaded_payment_status = (
+        None if created else getattr(order, "_loaded_payment_status", None)
+    )
+    if not created and loaded_payment_status is None:
+        # Estado anterior desconhecido; a reconstrução noturna corrige o dia
+        return
+
+    was_paid = loaded_payment_status == "paid"
+    is_paid = order.payment_status == "paid"
+
+    if is_paid == was_paid:
+        return
+    sign = 1 if is_paid else -1
+
+    # Callback nomeado: com robust=True o Django registra a falha pelo __qualname__
+    def update_sales():
+        apply_order_sales(order, sign)
+
+    transaction.on_commit(update_sales, robust=True)
+
+
+# --- Reconstrução ---
+
+
+def rebuild_product_sales(start, end):
+    """
+    Recalcula as vendas por produto de um intervalo de dias a partir dos pedidos.
+
+    Dias que já têm pedidos arquivados não são recalculados, pois os pedidos
+    não estão mais na tabela.
+
+    Returns:
+        int: Quantidade de dias recalculados.
+    """
+    last_archived = ArchivedOrder.objects.order_by("-created_at").first()
+    if last_archived is not None:
+        start = max(
+            start, timezone.localdate(last_archived.created_at) + timedelta(days=1)
+        )
+    if start > end:
+        return 0
+
+    products_data = calculate_daily_products_data(start, end)
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+    with transaction.atomic():
+        DailyProductReport.objects.filter(date__gte=start, date__lte=end).delete()
+        DailyProductReport.objects.bulk_create(
+            [
+                DailyProductReport(
+                    date=day,
+                    product_id=product["product_id"],
+                    product_name=product["product_name"],
+                    quantity_sold=product["quantity_sold"],
+                    quantity_orders=product["quantity_orders"],
+                    revenue=product["revenue"],
+                )
+                for day in days
+                for product in products_data.get(day, [])
+            ]
+        )
+
+    return len(days)
+
+
+def rebuild_recent_product_sales():
+    """Job noturno: recalcula as vendas por produto dos últimos dias."""
+    today = timezone.localdate()
+    start = today - timedelta(days=settings.PRODUCT_SALES_REBUILD_DAYS)
+
+    try:
+        days = rebuild_product_sales(start, today)
+        logger.info(
+            f"[TASK] Vendas por produto recalculadas: {days} dia(s) desde {start}"
+        )
+    except Exception as e:
+        logger.error(
+            f"[TASK] Erro ao recalcular vendas por produto: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+
+
+# --- Consultas ---
+
+
+def _sales_by_product(start, end):
+    return (
+        DailyProductReport.objects.filter(
+            date__gte=start, date__lte=end, product__isnull=False
+        )
+        .values("product_id")
+        .annotate(
+            product_name=Max("product_name"),
+            quantity_sold=Sum("quantity_sold"),
+            quantity_orders=Sum("quantity_orders"),
+            revenue=Sum("revenue"),
+        )
+    )
+
+
+def _with_velocity(row, days):
+    return {
+        **row,
+        "revenue": float(row["revenue"] or 0),
+        # Unidades vendidas por dia no período
+        "velocity": (row["quantity_sold"] or 0) / days,
+    }
+
+
+def top_products(start, end, limit=10, by="revenue"):
+    """Produtos mais vendidos no intervalo (por receita, quantidade ou pedidos)."""
+    days = (end - start).days + 1
+    rows = _sales_by_product(start, end).order_by(TOP_PRODUCTS_ORDERING[by])[:limit]
+    return [_with_velocity(row, days) for row in rows]
+
+
+def product_trends(start, end, limit=10):
+    """
+    Compara a quantidade vendida no intervalo com o período anterior de mesma
+    duração.
+
+    Returns:
+        dict: "rising" (maiores altas) e "falling" (maiores quedas), com até
+        limit produtos cada.
+    """
+    previous_start, previous_end = previous_period(start, end)
+
+    current = {row["product_id"]: row for row in _sales_by_product(start, end)}
+    previous = {
+        row["product_id"]: row
+        for row in _sales_by_product(previous_start, previous_end)
+    }
+
+    trends = []
+    for product_id in current.keys() | previous.keys():
+        row = current.get(product_id) or previous[product_id]
+        current_quantity = current.get(product_id, {}).get("quantity_sold") or 0
+        previous_quantity = previous.get(product_id, {}).get("quantity_sold") or 0
+        change = current_quantity - previous_quantity
+        trends.append(
+            {
+                "product_id": product_id,
+                "product_name": row["product_name"],
+                "quantity_sold": current_quantity,
+                "previous_quantity_sold": previous_quantity,
+                "change": change,
+                "change_pct": (change / previous_quantity * 100)
+                if previous_quantity
+                else None,
+            }
+        )
+
+    rising = sorted(
+        (trend for trend in trends if trend["change"] > 0),
+        key=lambda trend: trend["change"],
+        reverse=True,
+    )
+    falling = sorted(
+        (trend for trend in trends if trend["change"] < 0),
+        key=lambda trend: trend["change"],
+    )
+    return {"rising": rising[:limit], "falling": falling[:limit]}
+
+
+def slow_movers(start, end, limit=10):
+    """Produtos ativos que menos venderam no intervalo (incluindo os sem vendas)."""
+    days = (end - start).days + 1
+    sold = {row["product_id"]: row for row in _sales_by_product(start, end)}
+
+    rows = []
+    for product_id, name in Product.objects.filter(is_active=True).values_list(
+        "id", "name"
+    ):
+        row = sold.get(product_id) or {
+            "product_id": product_id,
+            "quantity_sold": 0,
+            "quantity_orders": 0,
+            "revenue": 0,
+        }
+        rows.append(_with_velocity({**row, "product_name": name}, days))
+
+    rows.sort(key=lambda row: (row["quantity_sold"] or 0, row["revenue"]))
+    return rows[:limit]
+
+
+def top_products_of_day(day, limit=10):
+    """Mais vendidos de um dia, com a participação de cada um na receita."""
+    rows = list(top_products(day, day, limit=limit))
+    total = sum(
+        DailyProductReport.objects.filter(date=day).values_list("revenue", flat=True),
+        Decimal("0"),
+    )
+    for row in rows:
+        row["revenue_share"] = row["revenue"] / float(total) * 100 if total else 0.0
+    return rows
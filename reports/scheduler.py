@@ -1,93 +1,207 @@
 import logging
+import threading
+import time
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+import redis
 from django.conf import settings
-from django_apscheduler.jobstores import DjangoJobStore
 
+from core.retention import run_scheduled_retention
+from products.thumbnails import run_scheduled_thumbnails
+
+from .leader import LeaderLock
+from .sales import rebuild_recent_product_sales
 from .tasks import generate_and_save_daily_report
 
 logger = logging.getLogger(__name__)
 
 scheduler = None
 
+# Thread de eleição do processo atual (modo embedded)
+election_thread = None
 
-def start_scheduler():
+
+def _create_scheduler():
     """
-    Inicia o scheduler em background para executar tarefas agendadas.
-    Roda em uma thread separada para evitar conflitos com ASGI/async context.
+    Cria o scheduler com o job store no banco e registra os jobs.
     """
+    # O APScheduler só é carregado no processo eleito líder
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from django_apscheduler.jobstores import DjangoJobStore
+
+    new_scheduler = BackgroundScheduler(timezone=settings.TIME_ZONE)
+    new_scheduler.add_jobstore(DjangoJobStore(), "default")
+
+    # Agendar geração do relatório diário às 23:55
+    new_scheduler.add_job(
+        generate_and_save_daily_report,
+        trigger=CronTrigger(hour=23, minute=55),  # Executa às 23:55 todos os dias
+        id="generate_daily_report",
+        name="Gerar relatório diário",
+        replace_existing=True,
+        max_instances=1,  # Garante que só uma instância rode por vez
+    )
+
+    # Recalcular as vendas por produto dos últimos dias às 00:15
+    new_scheduler.add_job(
+        rebuild_recent_product_sales,
+        trigger=CronTrigger(hour=0, minute=15),
+        id="rebuild_product_sales",
+        name="Recalcular vendas por produto",
+        replace_existing=True,
+        max_instances=1,
+    )
+
+    # Retenção de dados (sessões, carrinhos e arquivamento de pedidos) às 03:30
+    new_scheduler.add_job(
+        run_scheduled_retention,
+        trigger=CronTrigger(hour=3, minute=30),
+        id="apply_retention",
+        name="Aplicar retenção de dados",
+        replace_existing=True,
+        max_instances=1,
+    )
+
+    # Miniaturas de produto que não foram geradas após o upload, às 04:00
+    new_scheduler.add_job(
+        run_scheduled_thumbnails,
+        trigger=CronTrigger(hour=4, minute=0),
+        id="generate_thumbnails",
+        name="Gerar miniaturas pendentes",
+        replace_existing=True,
+        max_instances=1,
+    )
+
+    return new_scheduler
+
+
+def _start_jobs():
+    global scheduler
+
+    scheduler = _create_scheduler()
+    scheduler.start()
+
+    # Log detalhado sobre os jobs agendados
+    logger.info(
+        "[SCHEDULER] Scheduler iniciado com sucesso. Relatórios diários serão gerados às 23:55."
+    )
+    for job in scheduler.get_jobs():
+        logger.info(
+            f"[SCHEDULER] Job agendado: {job.name} (ID: {job.id}) - Próxima execução: {job.next_run_time}"
+        )
+
+
+def _stop_jobs():
     global scheduler
 
-    # Evita inicializar o scheduler múltiplas vezes
     if scheduler is not None:
-        logger.info("[SCHEDULER] Scheduler já está em execução")
-        return
+        try:
+            scheduler.shutdown(wait=False)
+        except Exception as e:
+            logger.error(
+                f"[SCHEDULER] Erro ao parar scheduler: {type(e).__name__}: {str(e)}",
+                exc_info=True,
+            )
+        scheduler = None
 
-    # Só inicia o scheduler se não estiver em modo de migração, testes, collectstatic ou compress
-    import sys
 
-    skip_commands = [
-        "migrate",
-        "makemigrations",
-        "test",
-        "collectstatic",
-        "compress",
-        "compilemessages",
-        "createcachetable",
-    ]
+def run_leader_election(stop_event: threading.Event):
+    """
+    Participa da eleição de líder e executa o scheduler apenas enquanto for líder.
 
-    if any(cmd in sys.argv for cmd in skip_commands):
-        logger.info(
-            f"[SCHEDULER] Pulando inicialização do scheduler durante comando de gerenciamento: {sys.argv}"
-        )
-        return
+    O lock é renovado a cada TTL/3. Se a renovação falhar (lock perdido ou Redis
+    indisponível por tempo suficiente para o lock expirar), o scheduler é parado
+    antes que outro processo possa assumir, evitando execuções duplicadas.
+    Bloqueia até stop_event ser sinalizado.
+    """
+    ttl = settings.SCHEDULER_LOCK_TTL
+    interval = ttl / 3
+    lock = LeaderLock("scheduler", ttl=ttl)
+    is_leader = False
+    last_renewed = 0.0
+    redis_error_logged = False
 
-    try:
-        # Rodar o scheduler em uma thread separada para evitar problemas com ASGI/async
-        import threading
+    logger.info(f"[SCHEDULER] Candidato à liderança do scheduler: {lock.token}")
 
-        def _start_scheduler_thread():
-            global scheduler
+    try:
+        while not stop_event.is_set():
             try:
-                scheduler = BackgroundScheduler(timezone=settings.TIME_ZONE)
-                scheduler.add_jobstore(DjangoJobStore(), "default")
-
-                # Agendar geração do relatório diário às 23:55
-                scheduler.add_job(
-                    generate_and_save_daily_report,
-                    trigger=CronTrigger(
-                        hour=23, minute=55
-                    ),  # Executa às 23:55 todos os dias
-                    id="generate_daily_report",
-                    name="Gerar relatório diário",
-                    replace_existing=True,
-                    max_instances=1,  # Garante que só uma instância rode por vez
-                )
-
-                scheduler.start()
-
-                # Log detalhado sobre os jobs agendados
-                jobs = scheduler.get_jobs()
-                logger.info(
-                    "[SCHEDULER] Scheduler iniciado com sucesso. Relatórios diários serão gerados às 23:55."
-                )
-                for job in jobs:
-                    logger.info(
-                        f"[SCHEDULER] Job agendado: {job.name} (ID: {job.id}) - Próxima execução: {job.next_run_time}"
+                if is_leader:
+                    if lock.renew():
+                        last_renewed = time.monotonic()
+                    else:
+                        logger.warning(
+                            "[SCHEDULER] Liderança perdida; parando scheduler neste processo"
+                        )
+                        _stop_jobs()
+                        is_leader = False
+                elif lock.acquire():
+                    is_leader = True
+                    last_renewed = time.monotonic()
+                    logger.info(f"[SCHEDULER] Processo eleito líder: {lock.token}")
+                    _start_jobs()
+
+                if redis_error_logged:
+                    logger.info("[SCHEDULER] Conexão com o Redis restabelecida")
+                    redis_error_logged = False
+
+            except redis.RedisError as e:
+                if not redis_error_logged:
+                    logger.error(
+                        f"[SCHEDULER] Erro no lock de liderança: {type(e).__name__}: {str(e)}"
+                    )
+                    redis_error_logged = True
+
+                # Sem renovar, o lock expira e outro processo pode assumir
+                if is_leader and time.monotonic() - last_renewed >= ttl - interval:
+                    logger.warning(
+                        "[SCHEDULER] Não foi possível renovar a liderança; parando scheduler"
                     )
+                    _stop_jobs()
+                    is_leader = False
+
+            stop_event.wait(interval)
+    finally:
+        if is_leader:
+            _stop_jobs()
+            lock.release()
+            logger.info("[SCHEDULER] Liderança liberada")
+
+
+def start_scheduler():
+    """
+    Inicia a eleição de líder do scheduler em background.
+
+    Chamado apenas pelos entrypoints do servidor web (app/asgi.py e app/wsgi.py):
+    comandos de gerenciamento, testes e shells nunca iniciam o scheduler.
+
+    Todos os processos web participam da eleição, mas apenas o líder executa
+    os jobs. Com SCHEDULER_MODE=off os processos web não participam e o
+    scheduler deve rodar em processo dedicado (`python manage.py run_scheduler`).
+    Roda em uma thread separada para evitar conflitos com ASGI/async context.
+    """
+    global election_thread
+
+    # Evita inicializar o scheduler múltiplas vezes
+    if election_thread is not None:
+        logger.info("[SCHEDULER] Scheduler já está em execução")
+        return
 
-            except Exception as e:
-                logger.error(
-                    f"[SCHEDULER] Erro ao iniciar scheduler na thread: {type(e).__name__}: {str(e)}",
-                    exc_info=True,
-                )
+    if settings.SCHEDULER_MODE != "embedded":
+        logger.info(
+            f"[SCHEDULER] Scheduler desativado neste processo (SCHEDULER_MODE={settings.SCHEDULER_MODE})"
+        )
+        return
 
+    try:
         # Iniciar em thread daemon para não bloquear o shutdown
-        thread = threading.Thread(
-            target=_start_scheduler_thread, daemon=True, name="SchedulerThread"
+        election_thread = threading.Thread(
+            target=run_leader_election,
+            args=(threading.Event(),),
+            daemon=True,
+            name="SchedulerThread",
         )
-        thread.start()
+        election_thread.start()
         logger.info("[SCHEDULER] Thread do scheduler iniciada")
 
     except Exception as e:
@@ -0,0 +1,26 @@
+from logging import getLogger
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from orders.models import Order
+
+from .sales import handle_order_saved
+
+logger = getLogger(__name__)
+
+
+@receiver(post_save, sender=Order)
+def update_product_sales(sender, instance, created, **kwargs):
+    """
+    Signal chamado quando um pedido é salvo: atualiza as vendas por produto
+    do dia se o pedido passou a ser (ou deixou de ser) pago.
+    """
+    try:
+        handle_order_saved(instance, created)
+    except Exception as e:
+        # As vendas são recalculadas toda madrugada; não podem impedir o save
+        logger.error(
+            f"[TASK] Erro ao atualizar vendas por produto do pedido #{instance.id}: "
+            f"{type(e).__name__}: {str(e)}"
+        )
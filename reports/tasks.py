@@ -1,11 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from logging import getLogger
 from time import sleep
 
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 
-from .models import DailyReport
-from .utils import calculate_daily_report_data
+from orders.models import ArchivedOrder
+
+from .models import DailyProductReport, DailyReport
+from .pdf import ensure_report_pdf
+from .utils import (
+    DailyReportData,
+    calculate_daily_product_data,
+    calculate_daily_products_data,
+    calculate_daily_report_data,
+    calculate_daily_reports_data,
+)
 
 logger = getLogger(__name__)
 
@@ -20,7 +31,7 @@ def generate_and_save_daily_report():
 
     for attempt in range(max_retries):
         try:
-            today = timezone.now().date()
+            today = timezone.localdate()
 
             if attempt == 0:
                 logger.info(
@@ -32,7 +43,8 @@ def generate_and_save_daily_report():
                 )
 
             # Calcular dados do relatório
-            data = calculate_daily_report_data()
+            data = calculate_daily_report_data(today)
+            products_data = calculate_daily_product_data(today)
 
             # Criar ou atualizar o relatório com transaction atomic
             with transaction.atomic():
@@ -41,12 +53,31 @@ def generate_and_save_daily_report():
                     defaults=data,
                 )
 
+                # Substituir as vendas por produto do dia
+                DailyProductReport.objects.filter(date=today).delete()
+                DailyProductReport.objects.bulk_create(
+                    [
+                        DailyProductReport(
+                            date=today,
+                            product_id=product["product_id"],
+                            product_name=product["product_name"],
+                            quantity_sold=product["quantity_sold"],
+                            quantity_orders=product["quantity_orders"],
+                            revenue=product["revenue"],
+                        )
+                        for product in products_data
+                    ]
+                )
+
             action = "criado" if created else "atualizado"
             logger.info(
                 f"[TASK] Relatório diário {action} com sucesso: {data['quantity_orders']} pedidos, "
                 f"R$ {data['revenue_today']:.2f} em receita"
             )
 
+            # Pré-renderizar o PDF para que o download seja servido do cache
+            prerender_report_pdf(report)
+
             return report
 
         except Exception as e:
@@ -72,3 +103,164 @@ def generate_and_save_daily_report():
     # Se chegou aqui, todas as tentativas falharam
     logger.error(f"[TASK] Falha ao gerar relatório após {max_retries} tentativas")
     raise Exception(f"Falha ao gerar relatório após {max_retries} tentativas")
+
+
+def prerender_report_pdf(report):
+    """
+    Renderiza e armazena em cache o PDF de um relatório salvo.
+    Falhas aqui não devem impedir a geração do relatório: o PDF
+    será renderizado sob demanda no primeiro download.
+    """
+    try:
+        path = ensure_report_pdf(report)
+        logger.info(f"[TASK] PDF do relatório de {report.date} pré-renderizado: {path.name}")
+    except Exception as e:
+        logger.error(
+            f"[TASK] Erro ao pré-renderizar PDF do relatório de {report.date}: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+
+
+def _calculate_chunk(start, end):
+    """
+    Calcula os relatórios de um bloco de dias (executado em uma thread do pool).
+    A conexão com o banco é por thread e é fechada ao final.
+    """
+    try:
+        return (
+            start,
+            end,
+            calculate_daily_reports_data(start, end),
+            calculate_daily_products_data(start, end),
+        )
+    finally:
+        connection.close()
+
+
+def _save_chunk(reports_data, products_data, overwrite):
+    """
+    Salva os relatórios de um bloco de dias com operações em lote.
+
+    Relatórios existentes são atualizados (mantendo o id) apenas se overwrite=True.
+
+    Returns:
+        tuple: (quantidade criada, quantidade atualizada)
+    """
+    now = timezone.now()
+    existing = DailyReport.objects.in_bulk(list(reports_data), field_name="date")
+    reports_data = {
+        day: data
+        for day, data in reports_data.items()
+        if day not in existing or overwrite
+    }
+
+    to_create = []
+    to_update = []
+    for day, data in reports_data.items():
+        report = existing.get(day)
+        if report is None:
+            to_create.append(DailyReport(date=day, **data))
+            continue
+        for field, value in data.items():
+            setattr(report, field, value)
+        # bulk_update não aplica auto_now
+        report.updated_at = now
+        to_update.append(report)
+
+    with transaction.atomic():
+        DailyReport.objects.bulk_create(to_create)
+        if to_update:
+            DailyReport.objects.bulk_update(
+                to_update, [*DailyReportData.__annotations__, "updated_at"]
+            )
+
+        # Substituir as vendas por produto dos dias salvos
+        days = list(reports_data)
+        DailyProductReport.objects.filter(date__in=days).delete()
+        DailyProductReport.objects.bulk_create(
+            [
+                DailyProductReport(
+                    date=day,
+                    product_id=product["product_id"],
+                    product_name=product["product_name"],
+                    quantity_sold=product["quantity_sold"],
+                    quantity_orders=product["quantity_orders"],
+                    revenue=product["revenue"],
+                )
+                for day in days
+                for product in products_data.get(day, [])
+            ]
+        )
+
+    return len(to_create), len(to_update)
+
+
+def backfill_daily_reports(start, end, chunk_size=31, workers=4, overwrite=False):
+    """
+    Gera (ou recalcula) os relatórios diários de um intervalo de dias fechados.
+
+    Os dias são divididos em blocos de chunk_size dias. Cada bloco é calculado
+    com uma consulta agrupada por dia, em paralelo em um pool de threads, e
+    salvo em lote na thread principal (uma transação por bloco).
+
+    Dias até o último pedido arquivado são ignorados (nem criados nem
+    recalculados): seus pedidos já saíram da tabela, e o relatório calculado
+    a partir dela ficaria incompleto. A rotina de retenção gera os relatórios
+    desses dias antes de arquivar.
+
+    Args:
+        start: Data inicial (inclusiva)
+        end: Data final (inclusiva); limitada a ontem
+        chunk_size: Quantidade de dias por bloco
+        workers: Quantidade de threads do pool
+        overwrite: Se deve recalcular relatórios já existentes
+
+    Returns:
+        dict: Quantidade de relatórios criados e atualizados.
+    """
+    end = min(end, timezone.localdate() - timedelta(days=1))
+
+    last_archived = ArchivedOrder.objects.order_by("-created_at").first()
+    if last_archived is not None:
+        archived_until = timezone.localtime(last_archived.created_at).date()
+        if start <= archived_until:
+            logger.warning(
+                f"[TASK] Dias de {start} a {min(end, archived_until)} têm pedidos "
+                f"arquivados e não serão gerados nem recalculados"
+            )
+            start = archived_until + timedelta(days=1)
+
+    if start > end:
+        return {"created": 0, "updated": 0}
+
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_size - 1), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+
+    logger.info(
+        f"[TASK] Backfill de relatórios de {start} a {end}: "
+        f"{len(chunks)} bloco(s) de até {chunk_size} dias, {workers} thread(s)"
+    )
+
+    created = updated = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_calculate_chunk, *chunk) for chunk in chunks]
+        for future in futures:
+            chunk_start, chunk_end, reports_data, products_data = future.result()
+            chunk_created, chunk_updated = _save_chunk(
+                reports_data, products_data, overwrite
+            )
+            created += chunk_created
+            updated += chunk_updated
+            logger.info(
+                f"[TASK] Bloco {chunk_start} a {chunk_end}: "
+                f"{chunk_created} criado(s), {chunk_updated} atualizado(s)"
+            )
+
+    logger.info(
+        f"[TASK] Backfill concluído: {created} relatório(s) criado(s), {updated} atualizado(s)"
+    )
+    return {"created": created, "updated": updated}
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import gc
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, Order, OrderItem
+from products.models import Product
+from reports import pdf, scheduler
+from reports.models import DailyProductReport, DailyReport
+from reports.ranges import calculate_range_report_data, resolve_period
+
+
+class ReportPdfCacheTest(TestCase):
+    """PDFs dos relatórios salvos em cache (reports.pdf)."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(REPORTS_PDF_CACHE_DIR=self.cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        render = mock.patch.object(pdf, "render_report_pdf", return_value=b"%PDF-test")
+        self.render = render.start()
+        self.addCleanup(render.stop)
+
+        self.report = DailyReport.objects.create(
+            date=date(2025, 3, 10), quantity_orders=3
+        )
+
+    def test_pdf_is_rendered_once_per_version(self):
+        path = pdf.ensure_report_pdf(self.report)
+
+        self.assertEqual(pdf.ensure_report_pdf(self.report), path)
+        self.assertEqual(pdf.get_cached_report_pdf(self.report), path)
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_new_version_replaces_superseded_pdf(self):
+        old_path = pdf.ensure_report_pdf(self.report)
+
+        self.report.quantity_orders = 4
+        self.report.save()
+        new_path = pdf.ensure_report_pdf(self.report)
+
+        self.assertNotEqual(new_path, old_path)
+        self.assertTrue(new_path.exists())
+        self.assertFalse(old_path.exists())
+
+    def test_product_sales_change_the_digest(self):
+        old_path = pdf.ensure_report_pdf(self.report)
+
+        product = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg"
+        )
+        DailyProductReport.objects.create(
+            date=self.report.date,
+            product=product,
+            product_name="Pizza",
+            quantity_sold=2,
+            quantity_orders=1,
+            revenue=60,
+        )
+        new_path = pdf.ensure_report_pdf(self.report)
+
+        self.assertNotEqual(new_path, old_path)
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(
+            self.render.call_args.kwargs["products"][0]["product_name"], "Pizza"
+        )
+
+    def test_download_is_revalidated_by_etag(self):
+        User.objects.create_user("staff", password="senha", is_staff=True)
+        self.client.login(username="staff", password="senha")
+        pdf.ensure_report_pdf(self.report)
+        url = reverse("reports:saved_report_pdf", args=[self.report.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-test")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_render_lock_is_shared_while_in_use(self):
+        lock = pdf._get_render_lock("digest")
+        with lock:
+            self.assertIs(pdf._get_render_lock("digest"), lock)
+
+        del lock
+        gc.collect()
+        self.assertNotIn("digest", pdf._render_locks)
+
+
+class RangeReportTest(TestCase):
+    """Relatórios por intervalo (reports.ranges)."""
+
+    today = date(2025, 3, 12)  # quarta-feira
+
+    def setUp(self):
+        localdate = mock.patch(
+            "django.utils.timezone.localdate", return_value=self.today
+        )
+        localdate.start()
+        self.addCleanup(localdate.stop)
+
+    def test_today_has_only_the_live_day(self):
+        start, end = resolve_period("today")
+        data = calculate_range_report_data(start, end)
+
+        self.assertEqual([row["period"] for row in data["series"]], ["2025-03-12"])
+        self.assertEqual(data["missing_days"], [])
+
+    def test_future_range_is_empty(self):
+        start = self.today + timedelta(days=5)
+        data = calculate_range_report_data(start, start + timedelta(days=2))
+
+        self.assertEqual(data["series"], [])
+        self.assertEqual(data["summary"]["quantity_orders"], 0)
+
+    def test_week_starting_today(self):
+        monday = date(2025, 3, 10)
+        start, end = resolve_period("week", today=monday)
+
+        with mock.patch("django.utils.timezone.localdate", return_value=monday):
+            data = calculate_range_report_data(start, end, group_by="week")
+
+        self.assertEqual([row["period"] for row in data["series"]], ["2025-03-10"])
+
+    def test_closed_days_come_from_saved_reports(self):
+        DailyReport.objects.create(
+            date=date(2025, 3, 10), quantity_orders=2, revenue_today=30
+        )
+        DailyReport.objects.create(
+            date=date(2025, 3, 11), quantity_orders=3, revenue_today=45
+        )
+
+        data = calculate_range_report_data(
+            date(2025, 3, 9), date(2025, 3, 11), group_by="week", compare=False
+        )
+
+        self.assertEqual(
+            [(row["period"], row["quantity_orders"]) for row in data["series"]],
+            [("2025-03-10", 5)],
+        )
+        self.assertEqual(data["summary"]["revenue"], 75.0)
+        self.assertEqual(data["missing_days"], ["2025-03-09"])
+
+
+class BackfillReportsTest(TransactionTestCase):
+    """Comando backfill_reports (os blocos são calculados em threads)."""
+
+    def create_order(self, day, **kwargs):
+        order = Order.objects.create(
+            customer_name="Cliente",
+            phone="11999999999",
+            address="Rua A, 1",
+            payment_method="dinheiro",
+            **kwargs,
+        )
+        created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        Order.objects.filter(pk=order.pk).update(
+            created_at=created_at + timedelta(hours=12)
+        )
+        return order
+
+    def backfill(self, **options):
+        call_command("backfill_reports", stdout=StringIO(), **options)
+
+    def test_creates_missing_days_in_chunks(self):
+        start = timezone.localdate() - timedelta(days=5)
+        self.create_order(start)
+        self.create_order(start)
+        self.create_order(start + timedelta(days=2), status="cancelled")
+
+        self.backfill(days=5, end=start + timedelta(days=4), chunk_size=2)
+
+        reports = dict(DailyReport.objects.values_list("date", "quantity_orders"))
+        self.assertEqual(len(reports), 5)
+        self.assertEqual(reports[start], 2)
+        self.assertEqual(reports[start + timedelta(days=2)], 1)
+        self.assertEqual(
+            DailyReport.objects.get(
+                date=start + timedelta(days=2)
+            ).quantity_orders_status_cancelled,
+            1,
+        )
+
+    def test_existing_days_only_change_with_overwrite(self):
+        day = timezone.localdate() - timedelta(days=1)
+        DailyReport.objects.create(date=day, quantity_orders=9)
+        self.create_order(day)
+
+        self.backfill(start=day)
+        self.assertEqual(DailyReport.objects.get(date=day).quantity_orders, 9)
+
+        self.backfill(start=day, overwrite=True)
+        self.assertEqual(DailyReport.objects.get(date=day).quantity_orders, 1)
+
+    def test_days_with_archived_orders_are_skipped(self):
+        day = timezone.localdate() - timedelta(days=3)
+        ArchivedOrder.objects.create(
+            id=999,
+            customer_name="Cliente",
+            phone="11999999999",
+            address="Rua A, 1",
+            payment_method="dinheiro",
+            payment_status="paid",
+            status="completed",
+            total_price=50,
+            created_at=timezone.make_aware(datetime.combine(day, datetime.min.time())),
+        )
+        self.create_order(day)
+        self.create_order(day + timedelta(days=1))
+
+        with self.assertLogs("reports.tasks", "WARNING"):
+            self.backfill(start=day, end=day + timedelta(days=1), overwrite=True)
+
+        self.assertEqual(
+            dict(DailyReport.objects.values_list("date", "quantity_orders")),
+            {day + timedelta(days=1): 1},
+        )
+
+
+class SchedulerStartupTest(SimpleTestCase):
+    """Inicialização do scheduler (reports.scheduler.start_scheduler)."""
+
+    def start(self, mode):
+        with (
+            override_settings(SCHEDULER_MODE=mode),
+            mock.patch.object(scheduler, "election_thread", None),
+            mock.patch.object(scheduler.threading, "Thread") as thread,
+        ):
+            scheduler.start_scheduler()
+        return thread
+
+    def test_embedded_mode_starts_the_election_thread(self):
+        self.start("embedded").return_value.start.assert_called_once()
+
+    def test_off_mode_does_not_start(self):
+        self.start("off").assert_not_called()
+
+    def test_app_setup_does_not_start_the_scheduler(self):
+        # Comandos de gerenciamento só executam o django.setup()
+        with mock.patch.object(scheduler, "start_scheduler") as start_scheduler:
+            apps.get_app_config("reports").ready()
+
+        start_scheduler.assert_not_called()
+
+
+class ProductSalesHookTest(TestCase):
+    """Vendas por produto atualizadas após o commit (reports.sales)."""
+
+    def setUp(self):
+        self.pizza = Product.objects.create(
+            name="Pizza", price=Decimal("30.00"), image="products/pizza.jpg"
+        )
+        self.soda = Product.objects.create(
+            name="Refrigerante", price=Decimal("8.00"), image="products/soda.jpg"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order = Order.objects.create(
+                customer_name="Cliente",
+                phone="11999999999",
+                address="Rua A, 1",
+                payment_method="pix",
+            )
+            OrderItem.objects.create(order=self.order, product=self.pizza, quantity=2)
+            OrderItem.objects.create(order=self.order, product=self.soda, quantity=1)
+
+    def set_payment_status(self, payment_status):
+        self.order.payment_status = payment_status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save()
+
+    def sales(self):
+        return dict(
+            DailyProductReport.objects.values_list("product_name", "quantity_sold")
+        )
+
+    def test_paid_order_is_added_and_refund_is_removed(self):
+        self.assertEqual(self.sales(), {})
+
+        self.set_payment_status("paid")
+        self.assertEqual(self.sales(), {"Pizza": 2, "Refrigerante": 1})
+        self.assertEqual(
+            DailyProductReport.objects.get(product=self.pizza).revenue, Decimal("60.00")
+        )
+
+        self.set_payment_status("cancelled")
+        self.assertEqual(self.sales(), {})
+
+    def test_failure_is_logged_without_breaking_the_save(self):
+        with (
+            mock.patch(
+                "reports.sales.apply_order_sales", side_effect=RuntimeError("falha")
+            ),
+            self.assertLogs("django", "ERROR") as logs,
+        ):
+            self.set_payment_status("paid")
+
+        self.assertIn("update_sales", logs.output[0])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "paid")
@@ -1,6 +1,12 @@
 from django.urls import path
 
-from .views import daily_report_pdf, get_daily_report, saved_report_pdf
+from .views import (
+    daily_report_pdf,
+    get_daily_report,
+    range_report,
+    range_report_pdf,
+    saved_report_pdf,
+)
 
 app_name = "reports"
 
@@ -8,4 +14,6 @@ urlpatterns = [
     path("daily/", get_daily_report, name="daily_report"),
     path("daily/pdf/", daily_report_pdf, name="daily_report_pdf"),
     path("saved/<int:report_id>/pdf/", saved_report_pdf, name="saved_report_pdf"),
+    path("range/", range_report, name="range_report"),
+    path("range/pdf/", range_report_pdf, name="range_report_pdf"),
 ]
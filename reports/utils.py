@@ -1,11 +1,11 @@
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
 from typing import TypedDict
 
-from django.db.models import Count, F, FloatField, Q, Sum
-from django.db.models.functions import Coalesce
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 
-from orders.models import Order
+from orders.models import Order, OrderItem
 from products.models import Product
 
 
@@ -34,47 +34,67 @@ class DailyReportData(TypedDict):
     taxa_cancelamento: float
 
 
-def calculate_daily_report_data() -> DailyReportData:
+class DailyProductData(TypedDict):
+    """Estrutura tipada para as vendas de um produto no dia."""
+
+    product_id: int
+    product_name: str
+    quantity_sold: int
+    quantity_orders: int
+    revenue: float
+
+
+# Pedidos pendentes há mais de LATE_MINUTES são considerados atrasados
+LATE_MINUTES = 25
+
+# Para dias fechados, o atraso é medido no fim do dia (23:35 com LATE_MINUTES=25)
+LATE_CUTOFF_TIME = time(23, 60 - LATE_MINUTES)
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
     """
-    Calcula todos os dados do relatório diário.
+    Retorna o intervalo [início, fim) de um dia no fuso horário local.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
 
-    Returns:
-        DailyReportData: Dicionário tipado com todas as métricas do relatório.
+
+def _order_stats_aggregates(late_filter: Q) -> dict:
     """
-    cutoff_time = timezone.now() - timedelta(minutes=25)
+    Agregações dos pedidos usadas pelos relatórios.
 
-    # Buscar dados dos pedidos do dia
-    order_stats = Order.objects.today().aggregate(
-        total_orders=Count("id"),
-        completed_orders=Count("id", filter=Q(status="completed")),
-        cancelled_orders=Count("id", filter=Q(status="cancelled")),
-        pending_orders=Count("id", filter=Q(status="pending")),
-        late_orders=Count("id", filter=Q(status="pending", created_at__lt=cutoff_time)),
-        revenue_paid=Coalesce(
-            Sum(
-                F("items__quantity") * F("items__product__price"),
-                filter=Q(payment_status="paid"),
-                output_field=FloatField(),
-            ),
+    As contagens usam distinct porque a receita faz join com os itens,
+    o que multiplicaria as linhas de cada pedido.
+    """
+    revenue = F("items__quantity") * F("items__product__price")
+    return {
+        "total_orders": Count("id", distinct=True),
+        "completed_orders": Count("id", filter=Q(status="completed"), distinct=True),
+        "cancelled_orders": Count("id", filter=Q(status="cancelled"), distinct=True),
+        "pending_orders": Count("id", filter=Q(status="pending"), distinct=True),
+        "late_orders": Count("id", filter=late_filter, distinct=True),
+        "revenue_paid": Coalesce(
+            Sum(revenue, filter=Q(payment_status="paid"), output_field=FloatField()),
             0.0,
         ),
-        revenue_pending=Coalesce(
-            Sum(
-                F("items__quantity") * F("items__product__price"),
-                filter=Q(payment_status="pending"),
-                output_field=FloatField(),
-            ),
+        "revenue_pending": Coalesce(
+            Sum(revenue, filter=Q(payment_status="pending"), output_field=FloatField()),
             0.0,
         ),
-    )
+    }
 
-    # Buscar dados dos produtos
-    products_stats = Product.objects.aggregate(
+
+def _products_stats() -> dict:
+    return Product.objects.aggregate(
         total_products=Count("id"),
         active_products=Count("id", filter=Q(is_active=True)),
         inactive=Count("id", filter=Q(is_active=False)),
     )
 
+
+def _build_report_data(order_stats: dict, products_stats: dict) -> DailyReportData:
+    """Monta o DailyReportData a partir das agregações de pedidos e produtos."""
     # Calcular métricas adicionais
     ticket_medio = 0.0
     if order_stats["completed_orders"] > 0:
@@ -102,3 +122,153 @@ def calculate_daily_report_data() -> DailyReportData:
         taxa_conclusao=taxa_conclusao,
         taxa_cancelamento=taxa_cancelamento,
     )
+
+
+def calculate_daily_report_data(day: date | None = None) -> DailyReportData:
+    """
+    Calcula todos os dados do relatório diário.
+
+    Args:
+        day: Dia do relatório (padrão: hoje)
+
+    Returns:
+        DailyReportData: Dicionário tipado com todas as métricas do relatório.
+    """
+    day = day or timezone.localdate()
+    day_start, day_end = day_bounds(day)
+    cutoff_time = min(timezone.now(), day_end) - timedelta(minutes=LATE_MINUTES)
+
+    # Buscar dados dos pedidos do dia
+    order_stats = Order.objects.filter(
+        created_at__gte=day_start, created_at__lt=day_end
+    ).aggregate(
+        **_order_stats_aggregates(Q(status="pending", created_at__lt=cutoff_time))
+    )
+
+    return _build_report_data(order_stats, _products_stats())
+
+
+def calculate_daily_reports_data(start: date, end: date) -> dict[date, DailyReportData]:
+    """
+    Calcula os relatórios de vários dias fechados com uma única consulta agrupada.
+
+    Dias sem pedidos também são retornados (com métricas zeradas). As métricas de
+    produtos refletem o catálogo atual, pois não há histórico de produtos.
+
+    Args:
+        start: Data inicial (inclusiva)
+        end: Data final (inclusiva), anterior a hoje
+
+    Returns:
+        dict[date, DailyReportData]: Relatório de cada dia do intervalo.
+    """
+    range_start, _ = day_bounds(start)
+    _, range_end = day_bounds(end)
+
+    rows = (
+        Order.objects.filter(created_at__gte=range_start, created_at__lt=range_end)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(
+            **_order_stats_aggregates(
+                Q(status="pending", created_at__time__lt=LATE_CUTOFF_TIME)
+            )
+        )
+        .order_by("day")
+    )
+    stats_by_day = {row["day"]: row for row in rows}
+
+    empty_stats = {
+        "total_orders": 0,
+        "completed_orders": 0,
+        "cancelled_orders": 0,
+        "pending_orders": 0,
+        "late_orders": 0,
+        "revenue_paid": 0.0,
+        "revenue_pending": 0.0,
+    }
+    products_stats = _products_stats()
+
+    return {
+        day: _build_report_data(stats_by_day.get(day, empty_stats), products_stats)
+        for day in (
+            start + timedelta(days=offset) for offset in range((end - start).days + 1)
+        )
+    }
+
+
+def _product_sales_annotations() -> dict:
+    return {
+        "quantity_sold": Sum("quantity"),
+        "quantity_orders": Count("order_id", distinct=True),
+        "revenue": Sum(
+            F("quantity") * F("product__price"),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    }
+
+
+def _build_product_data(row: dict) -> DailyProductData:
+    return DailyProductData(
+        product_id=row["product_id"],
+        product_name=row["product__name"],
+        quantity_sold=row["quantity_sold"] or 0,
+        quantity_orders=row["quantity_orders"] or 0,
+        revenue=float(row["revenue"] or 0),
+    )
+
+
+def calculate_daily_product_data(day: date | None = None) -> list[DailyProductData]:
+    """
+    Calcula as vendas do dia agrupadas por produto (apenas pedidos pagos).
+
+    Args:
+        day: Dia do relatório (padrão: hoje)
+
+    Returns:
+        list[DailyProductData]: Uma entrada por produto vendido, ordenada pela receita.
+    """
+    day_start, day_end = day_bounds(day or timezone.localdate())
+
+    rows = (
+        OrderItem.objects.filter(
+            order__created_at__gte=day_start,
+            order__created_at__lt=day_end,
+            order__payment_status="paid",
+        )
+        .values("product_id", "product__name")
+        .annotate(**_product_sales_annotations())
+        .order_by("-revenue")
+    )
+
+    return [_build_product_data(row) for row in rows]
+
+
+def calculate_daily_products_data(
+    start: date, end: date
+) -> dict[date, list[DailyProductData]]:
+    """
+    Calcula as vendas por produto de vários dias com uma única consulta agrupada.
+
+    Returns:
+        dict[date, list[DailyProductData]]: Vendas por produto de cada dia com vendas.
+    """
+    range_start, _ = day_bounds(start)
+    _, range_end = day_bounds(end)
+
+    rows = (
+        OrderItem.objects.filter(
+            order__created_at__gte=range_start,
+            order__created_at__lt=range_end,
+            order__payment_status="paid",
+        )
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id", "product__name")
+        .annotate(**_product_sales_annotations())
+        .order_by("day", "-revenue")
+    )
+
+    products_by_day = {}
+    for row in rows:
+        products_by_day.setdefault(row["day"], []).append(_build_product_data(row))
+    return products_by_day
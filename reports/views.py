@@ -1,19 +1,39 @@
+from datetime import date
 from logging import getLogger
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
-from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+)
+from django.shortcuts import aget_object_or_404
 from django.utils import timezone
-from weasyprint import HTML
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.routers import use_replica
 
 from .models import DailyReport
+from .pdf import (
+    ensure_report_pdf,
+    get_cached_report_pdf,
+    range_report_pdf_html,
+    report_pdf_digest,
+    report_pdf_html,
+)
+from .ranges import calculate_range_report_data, resolve_period
+from .renderer import PDFRendererBusy, PDFRenderError, arender_pdf
+from .sales import top_products_of_day
 from .utils import calculate_daily_report_data
 
 logger = getLogger(__name__)
 
 
 @login_required
+@use_replica
 def get_daily_report(request):
     """
     Retorna dados do relatório diário em formato JSON.
@@ -36,35 +56,57 @@ def get_daily_report(request):
     return JsonResponse(data)
 
 
+def _pdf_unavailable(error: PDFRenderError) -> HttpResponse:
+    """Resposta quando o pool de renderização não conseguiu gerar o PDF."""
+    if isinstance(error, PDFRendererBusy):
+        logger.warning(f"[PDF] Download recusado, fila de renderização cheia: {error}")
+        response = HttpResponse(
+            "Muitos relatórios sendo gerados no momento. Tente novamente em instantes.",
+            status=503,
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Retry-After"] = "10"
+        return response
+
+    logger.error(f"[PDF] Falha ao gerar PDF: {type(error).__name__}: {error}")
+    return HttpResponse(
+        "Não foi possível gerar o PDF do relatório.",
+        status=504,
+        content_type="text/plain; charset=utf-8",
+    )
+
+
+def _daily_report_html(now):
+    data = calculate_daily_report_data()
+    products = top_products_of_day(timezone.localdate())
+    return report_pdf_html(data, now, now, products=products)
+
+
 @login_required
-def daily_report_pdf(request):
+@use_replica
+async def daily_report_pdf(request):
     """
     Gera um PDF do relatório diário usando WeasyPrint.
+
+    O HTML é montado aqui e o PDF é gerado no pool de renderização
+    (reports.renderer), sem ocupar o worker enquanto aguarda.
     """
-    if not request.user.is_staff:
+    user = await request.auser()
+    if not user.is_staff:
         logger.warning(
-            f"Tentativa de acesso não autorizado ao PDF do relatório por: {request.user.username}"
+            f"Tentativa de acesso não autorizado ao PDF do relatório por: {user.username}"
         )
         return HttpResponseForbidden("You are not authorized to view this report.")
 
-    logger.info(f"Gerando PDF do relatório diário para {request.user.username}")
+    logger.info(f"Gerando PDF do relatório diário para {user.username}")
 
     today = timezone.now()
-    data = calculate_daily_report_data()
+    html_string = await sync_to_async(_daily_report_html)(today)
 
-    # Renderizar template HTML
-    html_string = render_to_string(
-        "reports/daily_report.html",
-        {
-            "data": data,
-            "date": today,
-            "now": timezone.now(),
-        },
-    )
-
-    # Gerar PDF com WeasyPrint
-    html = HTML(string=html_string)
-    pdf = html.write_pdf()
+    try:
+        pdf = await arender_pdf(html_string)
+    except PDFRenderError as e:
+        return _pdf_unavailable(e)
 
     # Preparar resposta HTTP
     response = HttpResponse(pdf, content_type="application/pdf")
@@ -78,47 +120,168 @@ def daily_report_pdf(request):
 
 
 @login_required
-def saved_report_pdf(request, report_id):
+@use_replica
+async def saved_report_pdf(request, report_id):
     """
-    Gera PDF a partir de um relatório salvo no banco de dados.
+    Entrega o PDF de um relatório salvo no banco de dados.
+
+    O PDF é pré-renderizado pelo scheduler e servido do cache em disco,
+    com suporte a ETag/Last-Modified. Em caso de cache miss, o PDF é gerado
+    no pool de renderização, com lock single-flight.
 
     Args:
         report_id: ID do relatório no banco de dados
     """
-    if not request.user.is_staff:
+    user = await request.auser()
+    if not user.is_staff:
         logger.warning(
-            f"Tentativa de acesso não autorizado ao PDF de relatório salvo por: {request.user.username}"
+            f"Tentativa de acesso não autorizado ao PDF de relatório salvo por: {user.username}"
         )
         return HttpResponseForbidden("You are not authorized to view this report.")
 
     # Buscar relatório salvo
-    report = get_object_or_404(DailyReport, id=report_id)
+    report = await aget_object_or_404(DailyReport, id=report_id)
 
-    logger.info(f"Gerando PDF do relatório salvo de {report.date} para {request.user.username}")
+    # O digest inclui as vendas por produto do dia (consulta ao banco)
+    digest = await sync_to_async(report_pdf_digest)(report)
+    etag = quote_etag(digest)
+    last_modified = int(report.updated_at.timestamp())
 
-    # Obter dados do relatório
-    data = report.get_data_dict()
+    # Responder 304 se o cliente já possui a versão atual. Apenas pelo ETag:
+    # as vendas por produto mudam sem alterar o updated_at do relatório
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+        return response
 
-    # Renderizar template HTML
-    html_string = render_to_string(
-        "reports/daily_report.html",
-        {
-            "data": data,
-            "date": report.date,
-            "now": timezone.now(),
-        },
+    path = get_cached_report_pdf(report, digest)
+    pdf_file = None
+    if path is not None:
+        try:
+            pdf_file = open(path, "rb")
+        except FileNotFoundError:
+            # Substituído por uma versão mais nova do relatório entre a busca e a abertura
+            pdf_file = None
+
+    if pdf_file is None:
+        logger.info(
+            f"Cache miss do PDF do relatório de {report.date} para {user.username}"
+        )
+        try:
+            path = await sync_to_async(ensure_report_pdf, thread_sensitive=False)(
+                report
+            )
+        except PDFRenderError as e:
+            return _pdf_unavailable(e)
+        pdf_file = open(path, "rb")
+
+    response = FileResponse(
+        pdf_file,
+        content_type="application/pdf",
+        as_attachment=True,
+        filename=f"relatorio_diario_{report.date.strftime('%Y%m%d')}.pdf",
     )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
 
-    # Gerar PDF com WeasyPrint
-    html = HTML(string=html_string)
-    pdf = html.write_pdf()
+    logger.info(f"PDF do relatório salvo entregue para {report.date}")
+
+    return response
+
+
+def _parse_range_params(request):
+    """
+    Lê os parâmetros do relatório de intervalo da query string.
+
+    Parâmetros: period (today, week, month, last_7, last_30, last_90) ou
+    start/end (YYYY-MM-DD), group_by (day, week, month) e compare (0/1).
+
+    Raises:
+        ValueError: Se algum parâmetro for inválido.
+    """
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+
+    try:
+        start = date.fromisoformat(start) if start else None
+        end = date.fromisoformat(end) if end else None
+    except ValueError:
+        raise ValueError("Datas devem estar no formato YYYY-MM-DD.")
+
+    start, end = resolve_period(request.GET.get("period"), start, end)
+
+    return {
+        "start": start,
+        "end": end,
+        "group_by": request.GET.get("group_by", "day"),
+        "compare": request.GET.get("compare", "1") != "0",
+    }
+
+
+@login_required
+@use_replica
+def range_report(request):
+    """
+    Retorna o relatório de um intervalo de datas em formato JSON.
+    """
+    if not request.user.is_staff:
+        logger.warning(
+            f"Tentativa de acesso não autorizado ao relatório de período por: {request.user.username}"
+        )
+        return HttpResponseForbidden("You are not authorized to view this report.")
+
+    try:
+        params = _parse_range_params(request)
+        data = calculate_range_report_data(**params)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    logger.info(
+        f"Relatório de período gerado: {data['start']} a {data['end']}, "
+        f"{data['summary']['quantity_orders']} pedidos"
+    )
+
+    return JsonResponse(data)
+
+
+def _range_report_html(params):
+    data = calculate_range_report_data(**params)
+    return data, range_report_pdf_html(data, timezone.now())
+
+
+@login_required
+@use_replica
+async def range_report_pdf(request):
+    """
+    Gera o PDF do relatório de um intervalo de datas usando WeasyPrint.
+    """
+    user = await request.auser()
+    if not user.is_staff:
+        logger.warning(
+            f"Tentativa de acesso não autorizado ao PDF do relatório de período por: {user.username}"
+        )
+        return HttpResponseForbidden("You are not authorized to view this report.")
+
+    try:
+        params = _parse_range_params(request)
+        data, html_string = await sync_to_async(_range_report_html)(params)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    logger.info(
+        f"Gerando PDF do relatório de {data['start']} a {data['end']} para {user.username}"
+    )
+
+    try:
+        pdf = await arender_pdf(html_string)
+    except PDFRenderError as e:
+        return _pdf_unavailable(e)
 
-    # Preparar resposta HTTP
     response = HttpResponse(pdf, content_type="application/pdf")
     response["Content-Disposition"] = (
-        f'attachment; filename="relatorio_diario_{report.date.strftime("%Y%m%d")}.pdf"'
+        f'attachment; filename="relatorio_{params["start"].strftime("%Y%m%d")}_'
+        f'{params["end"].strftime("%Y%m%d")}.pdf"'
     )
 
-    logger.info(f"PDF do relatório salvo gerado com sucesso para {report.date}")
-
     return response
@@ -1,8 +1,9 @@
 import urllib.parse
 
-import requests
 from django.conf import settings
 
+from services.http import get_async_client, get_session
+
 
 class CallMeBot:
     def __init__(self):
@@ -13,7 +14,16 @@ class CallMeBot:
     def send_text_message(self, message):
         message_formatted = self.format_message_for_callmebot(message)
         url = f"{self.__base_url}&text={message_formatted}"
-        response = requests.get(url)
+        response = get_session().get(url)
+        if response.status_code != 200:
+            raise Exception(f"Erro ao enviar mensagem: {response.text}")
+        return response
+
+    async def asend_text_message(self, message):
+        """Versão assíncrona de send_text_message, usando o pool de conexões."""
+        message_formatted = self.format_message_for_callmebot(message)
+        url = f"{self.__base_url}&text={message_formatted}"
+        response = await get_async_client().get(url)
         if response.status_code != 200:
             raise Exception(f"Erro ao enviar mensagem: {response.text}")
         return response
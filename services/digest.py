@@ -0,0 +1,253 @@
+"""
+Agregador das notificações do admin (CallMeBot).
+
+O CallMeBot limita o envio de mensagens com rigor: em horários de pico as
+notificações atrasavam ou eram recusadas, e cada envio bloqueado segurava a
+requisição que o disparou. Agora as views apenas enfileiram o evento e uma
+thread do processo faz o envio:
+
+- até NOTIFICATIONS_DIGEST_THRESHOLD eventos por minuto (somados entre os
+  workers pelo cache), cada evento é enviado na hora, como antes;
+- acima disso o processo entra em modo resumo: os eventos são acumulados e
+  enviados em uma única mensagem a cada NOTIFICATIONS_DIGEST_WINDOW segundos,
+  agrupados em novos pedidos, pagamentos e cancelamentos.
+
+Nenhum evento é descartado: o resumo traz uma linha completa por evento, uma
+mensagem individual que falhar entra no próximo resumo e os eventos pendentes
+são enviados no encerramento do processo. Só um resumo que falhar é perdido,
+e nesse caso o texto completo fica no log.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import record_admin_notification
+
+logger = getLogger(__name__)
+
+# Tamanho máximo de cada mensagem de resumo (a mensagem vai na URL do CallMeBot)
+DIGEST_MAX_LENGTH = 1500
+
+# Tempo máximo para enviar os eventos pendentes no encerramento do processo
+SHUTDOWN_TIMEOUT = 10
+
+# Seções do resumo, na ordem em que aparecem
+SECTIONS = {
+    "new_order": "🚨 *Novos pedidos*",
+    "payment_paid": "💰 *Pagamentos aprovados*",
+    "payment_cancelled": "❌ *Pagamentos cancelados*",
+    "payment_update": "⏳ *Atualizações de pagamento*",
+    "order_cancelled": "🚫 *Cancelados pelo cliente*",
+}
+
+_STOP = object()
+
+
+@dataclass
+class AdminEvent:
+    kind: str  # chave de SECTIONS
+    message: str  # mensagem completa, enviada fora do modo resumo
+    summary: str  # linha do evento no resumo
+
+
+def build_digest_messages(events, window, max_length=DIGEST_MAX_LENGTH) -> list[str]:
+    """Monta o resumo dos eventos, dividido em mensagens de até max_length caracteres."""
+    header = f"📋 *RESUMO: {len(events)} notificação(ões) em {window}s*"
+    footer = "\n\n━━━━━━━━━━━━━━━━━━━━━━━━━━"
+    messages = []
+    current = header
+
+    for kind, title in SECTIONS.items():
+        group = [event for event in events if event.kind == kind]
+        if not group:
+            continue
+        section = f"\n\n{title} ({len(group)}):"
+        current_section = None
+        for event in group:
+            line = f"\n• {event.summary}"
+            block = line if current_section == kind else section + line
+            if (
+                current != header
+                and len(current) + len(block) + len(footer) > max_length
+            ):
+                messages.append(current + footer)
+                current = f"{header} (continuação)"
+                block = section + line
+            current += block
+            current_section = kind
+
+    messages.append(current + footer)
+    return messages
+
+
+class NotificationAggregator:
+    """
+    Envia as notificações do admin em uma thread, individualmente ou em resumos.
+    """
+
+    def __init__(self, send, threshold: int, window: int):
+        self._send = send
+        self.threshold = threshold
+        self.window = window
+        self._queue = queue.Queue()
+        self._pending: list[AdminEvent] = []
+        self._flush_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self, kind: str, message: str, summary: str):
+        """Enfileira um evento; não faz I/O na thread de quem chama."""
+        if kind not in SECTIONS:
+            raise ValueError(f"Tipo de notificação desconhecido: {kind!r}")
+        self._ensure_thread()
+        self._queue.put(AdminEvent(kind, message, summary))
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="admin-notifications", daemon=True
+                )
+                self._thread.start()
+
+    def _rate_exceeded(self) -> bool:
+        """Conta o evento no minuto atual (todos os workers) e compara com o limite."""
+        key = f"notifications:admin_rate:{int(time.time() // 60)}"
+        try:
+            cache.add(key, 0, 120)
+            return cache.incr(key) > self.threshold
+        except Exception as e:
+            logger.error(
+                f"[NOTIFY] Erro ao contar notificações no cache: {type(e).__name__}: {str(e)}"
+            )
+            return False
+
+    def _buffer(self, event: AdminEvent):
+        if not self._pending:
+            self._flush_at = time.monotonic() + self.window
+        self._pending.append(event)
+
+    def _handle(self, event: AdminEvent):
+        exceeded = self._rate_exceeded()
+        # Com resumo em andamento o evento entra nele, mantendo a ordem
+        if exceeded or self._pending:
+            if not self._pending:
+                logger.info(
+                    f"[NOTIFY] Mais de {self.threshold} notificações por minuto: "
+                    f"agrupando em resumos a cada {self.window}s"
+                )
+            self._buffer(event)
+            return
+        try:
+            self._send(event.message)
+            record_admin_notification("individual", "sent")
+        except Exception as e:
+            logger.error(
+                f"[NOTIFY] Erro ao enviar notificação, incluída no próximo resumo: "
+                f"{type(e).__name__}: {str(e)}"
+            )
+            record_admin_notification("individual", "error")
+            self._buffer(event)
+
+    def _flush(self):
+        """Envia os eventos pendentes como resumo."""
+        events, self._pending, self._flush_at = self._pending, [], None
+        if not events:
+            return
+        for message in build_digest_messages(events, self.window):
+            try:
+                self._send(message)
+                record_admin_notification("digest", "sent")
+            except Exception as e:
+                logger.error(
+                    f"[NOTIFY] Erro ao enviar resumo de notificações: "
+                    f"{type(e).__name__}: {str(e)}\n{message}"
+                )
+                record_admin_notification("digest", "error")
+        logger.info(f"[NOTIFY] Resumo com {len(events)} notificação(ões) enviado")
+
+    def _flush_if_due(self):
+        """Envia o resumo quando a janela do primeiro evento pendente termina."""
+        if self._pending and time.monotonic() >= self._flush_at:
+            self._flush()
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, self._flush_at - time.monotonic())
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event is _STOP:
+                # Encerramento: o que ainda está na fila vai no último resumo
+                while True:
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if event is not _STOP:
+                        self._pending.append(event)
+                self._flush()
+                return
+
+            if event is not None:
+                self._handle(event)
+            self._flush_if_due()
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """Envia o que estiver pendente e encerra a thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def _send_with_callmebot(message):
+    from services.callmebot import CallMeBot
+
+    CallMeBot().send_text_message(message)
+
+
+def get_aggregator() -> NotificationAggregator:
+    """Retorna o agregador do processo, criando-o se necessário."""
+    global _aggregator
+
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = NotificationAggregator(
+                    send=_send_with_callmebot,
+                    threshold=settings.NOTIFICATIONS_DIGEST_THRESHOLD,
+                    window=settings.NOTIFICATIONS_DIGEST_WINDOW,
+                )
+                atexit.register(_aggregator.shutdown)
+
+    return _aggregator
+
+
+def notify_admin(kind: str, message: str, summary: str):
+    """
+    Envia uma notificação ao admin via CallMeBot, individualmente ou em resumo.
+
+    Args:
+        kind: Tipo do evento (chave de SECTIONS)
+        message: Mensagem completa, usada fora do modo resumo
+        summary: Linha do evento no resumo (deve ter todas as informações necessárias)
+    """
+    get_aggregator().notify(kind, message, summary)
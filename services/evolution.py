@@ -1,6 +1,8 @@
 import requests
 from django.conf import settings
 
+from services.http import get_session
+
 
 class EvolutionAPI:
     def __init__(self):
@@ -20,7 +22,7 @@ class EvolutionAPI:
         headers = {"apikey": self.__api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.get(url, headers=headers)
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -64,7 +66,7 @@ class EvolutionAPI:
         headers = {"apikey": self.__api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = get_session().post(url, json=payload, headers=headers)
             response.raise_for_status()
             response_data = response.json()
 
@@ -88,7 +90,7 @@ class EvolutionAPI:
         headers = {"apikey": self.__api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.get(url, headers=headers)
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()  # Ensures the request was successful
             return response.json()  # Return the JSON response from the API
         except requests.RequestException as e:
@@ -107,7 +109,7 @@ class EvolutionAPI:
         headers = {"apikey": self.__api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.get(url, headers=headers)
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()  # Ensures the request was successful
             data = response.json()
 
@@ -135,7 +137,7 @@ class EvolutionAPI:
         headers = {"apikey": self.__api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.delete(url, headers=headers)
+            response = get_session().delete(url, headers=headers)
             response.raise_for_status()  # Ensures the request was successful
             data = response.json()
 
@@ -0,0 +1,114 @@
+"""
+Clientes HTTP compartilhados pelas integrações externas.
+
+Um único httpx.AsyncClient por event loop mantém um pool de conexões
+keep-alive com o MercadoPago e o CallMeBot, permitindo centenas de chamadas
+simultâneas em um worker sem ocupar threads do pool síncrono. As chamadas
+síncronas usam uma requests.Session compartilhada. Nos dois casos a duração de
+cada chamada é registrada nas métricas (core.metrics).
+"""
+
+import asyncio
+import threading
+import time
+from weakref import WeakKeyDictionary
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core.metrics import record_external_call
+
+# Um cliente por event loop: conexões não podem ser compartilhadas entre loops
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente HTTP assíncrono do event loop atual, criando-o se necessário.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            transport=InstrumentedAsyncTransport(
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                ),
+            ),
+        )
+        _clients[loop] = client
+
+    return client
+
+
+def _status_label(status_code: int | None) -> str:
+    return f"{status_code // 100}xx" if status_code else "error"
+
+
+class InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """Transporte httpx que mede a duração de cada chamada, inclusive as que falham."""
+
+    async def handle_async_request(self, request):
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = await super().handle_async_request(request)
+            status_code = response.status_code
+            return response
+        finally:
+            record_external_call(
+                request.url,
+                request.method,
+                _status_label(status_code),
+                time.perf_counter() - start,
+            )
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """Adapter do requests que mede a duração de cada chamada, inclusive as que falham."""
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = super().send(request, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            record_external_call(
+                request.url,
+                request.method,
+                _status_label(status_code),
+                time.perf_counter() - start,
+            )
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP síncrona compartilhada (pool de conexões keep-alive).
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = InstrumentedHTTPAdapter(
+                    pool_maxsize=settings.HTTP_CLIENT_MAX_KEEPALIVE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
@@ -4,9 +4,12 @@ from typing import Dict
 from urllib.parse import urlparse
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import httpx
 import requests
 from django.conf import settings
 
+from services.http import get_async_client, get_session
+
 
 class MercadoPagoService:
     """
@@ -124,6 +127,40 @@ class MercadoPagoService:
         """
         Cria um pagamento via Pix.
         """
+        payload = self._pix_payload(amount, payer_email, payer_cpf, description)
+
+        try:
+            return self._create_payment(payload)
+        except Exception as e:
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise
+            raise RuntimeError(f"Erro inesperado ao criar pagamento PIX: {str(e)}")
+
+    async def apay_with_pix(
+        self,
+        amount: float,
+        payer_email: str,
+        payer_cpf: str,
+        description: str = "Pagamento",
+    ):
+        """
+        Versão assíncrona de pay_with_pix.
+        """
+        payload = self._pix_payload(amount, payer_email, payer_cpf, description)
+
+        try:
+            return await self._acreate_payment(payload)
+        except Exception as e:
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise
+            raise RuntimeError(f"Erro inesperado ao criar pagamento PIX: {str(e)}")
+
+    def _pix_payload(
+        self, amount: float, payer_email: str, payer_cpf: str, description: str
+    ) -> dict:
+        """
+        Valida os dados e monta o payload de um pagamento via Pix.
+        """
         # Validações de entrada
         if not amount or amount <= 0:
             raise ValueError("O valor do pagamento deve ser maior que zero.")
@@ -137,27 +174,21 @@ class MercadoPagoService:
         if not description or description.strip() == "":
             raise ValueError("Descrição do pagamento não pode estar vazia.")
 
-        try:
-            payload = {
-                "payment_method_id": "pix",
-                "transaction_amount": float(amount),
-                "description": description.strip(),
-                "date_of_expiration": self.generate_payment_expiration_date(minutes=30),
-                "payer": {
-                    "email": payer_email.strip(),
-                    "identification": {
-                        "type": "CPF",
-                        "number": payer_cpf.replace(".", "").replace("-", ""),
-                    },
+        return {
+            "payment_method_id": "pix",
+            "transaction_amount": float(amount),
+            "description": description.strip(),
+            "date_of_expiration": self.generate_payment_expiration_date(minutes=30),
+            "payer": {
+                "email": payer_email.strip(),
+                "identification": {
+                    "type": "CPF",
+                    "number": payer_cpf.replace(".", "").replace("-", ""),
                 },
-                "external_reference": f"ID-PIX-{uuid.uuid4()}",
-                "notification_url": self._notification_url,
-            }
-            return self._create_payment(payload)
-        except Exception as e:
-            if isinstance(e, (ValueError, RuntimeError)):
-                raise
-            raise RuntimeError(f"Erro inesperado ao criar pagamento PIX: {str(e)}")
+            },
+            "external_reference": f"ID-PIX-{uuid.uuid4()}",
+            "notification_url": self._notification_url,
+        }
 
     def pay_with_boleto(
         self,
@@ -343,11 +374,55 @@ class MercadoPagoService:
                 f"Erro inesperado ao buscar informações do pagamento: {str(e)}"
             )
 
+    async def aget_payment_info(self, transaction_id: str):
+        """
+        Versão assíncrona de get_payment_info.
+        """
+        if not transaction_id or transaction_id.strip() == "":
+            raise ValueError("ID da transação não pode estar vazio.")
+
+        try:
+            return await self._aget(f"/v1/payments/{transaction_id.strip()}")
+        except Exception as e:
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise
+            raise RuntimeError(
+                f"Erro inesperado ao buscar informações do pagamento: {str(e)}"
+            )
+
     def create_preference_with_card(self, items: list[dict], order_id: str = None) -> dict:
         """
         Cria uma preferência de pagamento com cartão de crédito ou débito.
         Valida se cada item contém as chaves obrigatórias antes de enviar.
         """
+        payload = self._preference_payload(items, order_id)
+
+        try:
+            return self._post("/checkout/preferences", payload)
+        except Exception as e:
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise
+            raise RuntimeError(f"Erro inesperado ao criar preferência: {str(e)}")
+
+    async def acreate_preference_with_card(
+        self, items: list[dict], order_id: str = None
+    ) -> dict:
+        """
+        Versão assíncrona de create_preference_with_card.
+        """
+        payload = self._preference_payload(items, order_id)
+
+        try:
+            return await self._apost("/checkout/preferences", payload)
+        except Exception as e:
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise
+            raise RuntimeError(f"Erro inesperado ao criar preferência: {str(e)}")
+
+    def _preference_payload(self, items: list[dict], order_id: str = None) -> dict:
+        """
+        Valida os itens e monta o payload de uma preferência de pagamento.
+        """
         if not items or not isinstance(items, list):
             raise ValueError("A lista de itens não pode estar vazia e deve ser uma lista.")
 
@@ -362,28 +437,23 @@ class MercadoPagoService:
 
         # Usar a URL base da aplicação ao invés da URL de notificação
         base_url = settings.BASE_APPLICATION_URL.rstrip('/')
-        
-        try:
-            payload = {
-                "items": items,
-                "back_urls": {
-                    "success": f"{base_url}/checkout/pagamento-realizado/{order_id or '1'}/",
-                    "failure": f"{base_url}/checkout/erro-pagamento/{order_id or '1'}/",
-                    "pending": f"{base_url}/checkout/aguardando-pagamento/{order_id or '1'}/",
-                },
-                "auto_return": "approved",
-                "notification_url": self._notification_url,
-            }
-            
-            # Adiciona external_reference se order_id for fornecido
-            if order_id:
-                payload["external_reference"] = str(order_id)
-                
-            return self._post("/checkout/preferences", payload)
-        except Exception as e:
-            if isinstance(e, (ValueError, RuntimeError)):
-                raise
-            raise RuntimeError(f"Erro inesperado ao criar preferência: {str(e)}")
+
+        payload = {
+            "items": items,
+            "back_urls": {
+                "success": f"{base_url}/checkout/pagamento-realizado/{order_id or '1'}/",
+                "failure": f"{base_url}/checkout/erro-pagamento/{order_id or '1'}/",
+                "pending": f"{base_url}/checkout/aguardando-pagamento/{order_id or '1'}/",
+            },
+            "auto_return": "approved",
+            "notification_url": self._notification_url,
+        }
+
+        # Adiciona external_reference se order_id for fornecido
+        if order_id:
+            payload["external_reference"] = str(order_id)
+
+        return payload
 
 
     # --- Métodos Internos Auxiliares ---
@@ -428,7 +498,7 @@ class MercadoPagoService:
             headers["X-Idempotency-Key"] = str(uuid.uuid4())
 
         try:
-            response = requests.post(
+            response = get_session().post(
                 url=url, headers=headers, json=payload, timeout=30.0
             )
             response.raise_for_status()
@@ -448,7 +518,7 @@ class MercadoPagoService:
         url = f"{self._base_url}{path}"
 
         try:
-            response = requests.get(url, headers=self._headers, timeout=30.0)
+            response = get_session().get(url, headers=self._headers, timeout=30.0)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -463,6 +533,50 @@ class MercadoPagoService:
         except Exception as e:
             raise RuntimeError(f"Erro inesperado na requisição GET: {str(e)}")
 
+    async def _apost(self, path: str, payload: dict, use_idempotency_key: bool = True):
+        """
+        Executa uma requisição POST assíncrona para a API do Mercado Pago.
+        """
+        url = f"{self._base_url}{path}"
+        headers = self._headers.copy()
+
+        if use_idempotency_key:
+            headers["X-Idempotency-Key"] = str(uuid.uuid4())
+
+        try:
+            response = await get_async_client().post(url, headers=headers, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            error_message = self._handle_api_error(e.response)
+            raise RuntimeError(error_message)
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Erro de conexão com a API do Mercado Pago: {str(e)}")
+        except Exception as e:
+            raise RuntimeError(f"Erro inesperado na requisição POST: {str(e)}")
+
+    async def _aget(self, path: str):
+        """
+        Executa uma requisição GET assíncrona para a API do Mercado Pago.
+        """
+        url = f"{self._base_url}{path}"
+
+        try:
+            response = await get_async_client().get(url, headers=self._headers)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            try:
+                error = e.response.json()
+            except ValueError:
+                error = e.response.text
+
+            raise RuntimeError(f"Erro ao acessar {url}: {error}")
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Erro de conexão com a API do Mercado Pago: {str(e)}")
+        except Exception as e:
+            raise RuntimeError(f"Erro inesperado na requisição GET: {str(e)}")
+
     def _get_card_token(self, card_data: dict):
         """
         Obtém um token de cartão de crédito.
@@ -502,6 +616,26 @@ class MercadoPagoService:
         except Exception as e:
             raise RuntimeError(f"Erro inesperado ao criar pagamento: {str(e)}")
     
+    async def _acreate_payment(self, payload: dict):
+        """
+        Versão assíncrona de _create_payment.
+        """
+        try:
+            if self._notification_url:
+                payload["notification_url"] = self._notification_url
+
+            payment_response = await self._apost("/v1/payments", payload)
+
+            if not payment_response:
+                raise RuntimeError("Resposta vazia ao criar pagamento.")
+
+            return payment_response
+        except RuntimeError:
+            # Re-propaga erros já tratados
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Erro inesperado ao criar pagamento: {str(e)}")
+
     def _get_base_url(self, url: str) -> str:
         """
         Retorna apenas a URL base (protocolo + domínio).
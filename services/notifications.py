@@ -1,9 +1,10 @@
+from decimal import Decimal
 from logging import getLogger
 
 from django.conf import settings
 
 from orders.models import Order
-from services.callmebot import CallMeBot
+from services.digest import notify_admin
 from services.evolution import EvolutionAPI
 
 logger = getLogger(__name__)
@@ -83,13 +84,15 @@ def send_order_notifications(order: Order):
         print(f"Erro ao enviar mensagem ao cliente: {e}")
 
 
-def send_order_notifications_with_callmebot(order: Order):
-    callmebot = CallMeBot()
-
+def _build_order_message(order: Order, items) -> str:
+    """
+    Monta a mensagem de novo pedido a partir dos itens já carregados (com produto).
+    """
     # Monta a lista de itens com quantidade
     itens_str = "\n".join(
-        [f"  • {item.product.name} (x{item.quantity})" for item in order.items.all()]
+        [f"  • {item.product.name} (x{item.quantity})" for item in items]
     )
+    total_price = sum(item.quantity * item.product.price for item in items)
 
     # Informações de pagamento
     payment_method_emoji = {
@@ -109,7 +112,7 @@ def send_order_notifications_with_callmebot(order: Order):
     )
 
     if order.payment_method == "dinheiro" and order.cash_value:
-        change = order.change_amount
+        change = max(Decimal("0.00"), Decimal(str(order.cash_value)) - total_price)
         payment_info += f"\nValor recebido: R$ {order.cash_value:.2f}"
         payment_info += f"\nTroco: R$ {change:.2f}"
 
@@ -123,28 +126,66 @@ def send_order_notifications_with_callmebot(order: Order):
         )
 
     # Mensagem para o admin
-    message = (
+    return (
         f"🚨 *NOVO PEDIDO RECEBIDO!*\n\n"
         f"*Pedido:* #{order.id}\n"
         f"*Cliente:* {order.customer_name}\n"
         f"*Telefone:* {order.phone}\n"
         f"*Endereço:* {order.address}\n\n"
         f"*Itens do pedido:*\n{itens_str}\n\n"
-        f"*Total:* R$ {order.total_price:.2f}\n\n"
+        f"*Total:* R$ {total_price:.2f}\n\n"
         f"*Pagamento:*\n{payment_info}{payment_fallback_warning}\n\n"
         f"━━━━━━━━━━━━━━━━━━━━━━━━━━"
     )
+
+
+def _build_order_summary(order: Order, items) -> str:
+    """
+    Linha do novo pedido no resumo (services.digest), com tudo que a entrega precisa.
+    """
+    itens_str = ", ".join(f"{item.quantity}x {item.product.name}" for item in items)
+    total_price = sum(item.quantity * item.product.price for item in items)
+
+    summary = (
+        f"#{order.id} {order.customer_name} - R$ {total_price:.2f} - "
+        f"{order.get_payment_method_display()} ({order.get_payment_status_display()})"
+    )
+    if order.payment_method == "dinheiro" and order.cash_value:
+        change = max(Decimal("0.00"), Decimal(str(order.cash_value)) - total_price)
+        summary += f" - troco R$ {change:.2f}"
+    if order.payment_integration_failed:
+        summary += " ⚠️ pagamento manual"
+    return f"{summary}\n   📞 {order.phone}\n   📍 {order.address}\n   🛒 {itens_str}"
+
+
+def send_order_notifications_with_callmebot(order: Order):
+    """
+    Notifica o admin do novo pedido via CallMeBot (individualmente ou em resumo).
+    """
+    items = list(order.items.select_related("product"))
+    message = _build_order_message(order, items)
+
     logger.info("Enviando notificação de novo pedido via CallMeBot")
     logger.debug(f"Mensagem do pedido: {message}")
-    callmebot.send_text_message(message)
+    notify_admin("new_order", message, _build_order_summary(order, items))
 
 
-def send_payment_update_notification_with_callmebot(order, previous_status=None):
+async def asend_order_notifications_with_callmebot(order: Order):
     """
-    Envia notificação específica para atualizações de pagamento via webhook.
+    Versão assíncrona de send_order_notifications_with_callmebot.
     """
-    callmebot = CallMeBot()
+    items = [item async for item in order.items.select_related("product")]
+    message = _build_order_message(order, items)
 
+    logger.info("Enviando notificação de novo pedido via CallMeBot")
+    logger.debug(f"Mensagem do pedido: {message}")
+    notify_admin("new_order", message, _build_order_summary(order, items))
+
+
+def _build_payment_update_message(order, total_price) -> str:
+    """
+    Monta a mensagem de atualização de pagamento.
+    """
     # Emojis para diferentes status
     status_emoji = {"paid": "✅", "cancelled": "❌", "pending": "⏳"}.get(
         order.payment_status, "⏳"
@@ -172,7 +213,7 @@ def send_payment_update_notification_with_callmebot(order, previous_status=None)
     order_id = getattr(order, "id", "N/A") or "N/A"
     customer_name = getattr(order, "customer_name", "N/A") or "N/A"
     phone = getattr(order, "phone", "N/A") or "N/A"
-    total_price = getattr(order, "total_price", 0) or 0
+    total_price = total_price or 0
 
     message = (
         f"{update_type}\n\n"
@@ -197,29 +238,51 @@ def send_payment_update_notification_with_callmebot(order, previous_status=None)
         )
 
     message += "━━━━━━━━━━━━━━━━━━━━━━━━━━"
+    return message
 
-    try:
-        callmebot.send_text_message(message)
-    except Exception as e:
-        print(f"Erro ao enviar notificação de atualização de pagamento: {e}")
-        raise
+
+def _notify_payment_update(order, total_price):
+    kind = {"paid": "payment_paid", "cancelled": "payment_cancelled"}.get(
+        order.payment_status, "payment_update"
+    )
+    summary = (
+        f"#{order.id} {order.customer_name} - R$ {total_price or 0:.2f} - "
+        f"{order.get_payment_method_display()} ({order.get_payment_status_display()})"
+    )
+    notify_admin(kind, _build_payment_update_message(order, total_price), summary)
+
+
+def send_payment_update_notification_with_callmebot(order, previous_status=None):
+    """
+    Envia notificação específica para atualizações de pagamento via webhook.
+    """
+    _notify_payment_update(order, order.total_price)
+
+
+async def asend_payment_update_notification_with_callmebot(order, previous_status=None):
+    """
+    Versão assíncrona de send_payment_update_notification_with_callmebot.
+    """
+    items = [item async for item in order.items.select_related("product")]
+    total_price = sum(item.quantity * item.product.price for item in items)
+    _notify_payment_update(order, total_price)
 
 
 def send_order_cancellation_notification(order):
     """
     Envia notificação quando um pedido é cancelado pelo cliente.
     """
-    callmebot = CallMeBot()
+    items = list(order.items.select_related("product"))
 
     # Informações do pedido
     order_id = getattr(order, "id", "N/A") or "N/A"
     customer_name = getattr(order, "customer_name", "N/A") or "N/A"
     phone = getattr(order, "phone", "N/A") or "N/A"
-    total_price = getattr(order, "total_price", 0) or 0
+    total_price = sum(item.quantity * item.product.price for item in items)
 
     # Monta a lista de itens com quantidade
     itens_str = "\n".join(
-        [f"  • {item.product.name} (x{item.quantity})" for item in order.items.all()]
+        [f"  • {item.product.name} (x{item.quantity})" for item in items]
     )
 
     # Mensagem para o admin
@@ -235,8 +298,8 @@ def send_order_cancellation_notification(order):
         f"━━━━━━━━━━━━━━━━━━━━━━━━━━"
     )
 
-    try:
-        callmebot.send_text_message(message)
-    except Exception as e:
-        print(f"Erro ao enviar notificação de cancelamento: {e}")
-        raise
+    summary = (
+        f"#{order_id} {customer_name} - R$ {total_price:.2f} - {phone}\n"
+        f"   🛒 {', '.join(f'{item.quantity}x {item.product.name}' for item in items)}"
+    )
+    notify_admin("order_cancelled", message, summary)
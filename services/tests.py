@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from services import digest
+from services.digest import AdminEvent, NotificationAggregator, build_digest_messages
+
+
+class FakeSender:
+    """Registra as mensagens em vez de chamar o CallMeBot."""
+
+    def __init__(self):
+        self.messages = []
+        self.failures = 0
+
+    def __call__(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("CallMeBot indisponível")
+        self.messages.append(message)
+
+
+class NotificationAggregatorTest(SimpleTestCase):
+    """Envio individual ou em resumos das notificações do admin (services.digest)."""
+
+    def setUp(self):
+        cache.clear()
+        self.send = FakeSender()
+        self.aggregator = NotificationAggregator(self.send, threshold=2, window=60)
+
+        clock = mock.patch.object(digest.time, "monotonic", return_value=1000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        # Todos os eventos no mesmo minuto do contador de taxa
+        minute = mock.patch.object(digest.time, "time", return_value=1_700_000_000.0)
+        minute.start()
+        self.addCleanup(minute.stop)
+
+    def handle(self, number, kind="new_order"):
+        self.aggregator._handle(
+            AdminEvent(kind, f"Mensagem {number}", f"Pedido #{number}")
+        )
+
+    def test_events_up_to_the_threshold_are_sent_individually(self):
+        self.handle(1)
+        self.handle(2)
+
+        self.assertEqual(self.send.messages, ["Mensagem 1", "Mensagem 2"])
+        self.assertEqual(self.aggregator._pending, [])
+
+    def test_events_past_the_threshold_are_grouped(self):
+        for number in range(1, 5):
+            self.handle(number)
+
+        self.assertEqual(self.send.messages, ["Mensagem 1", "Mensagem 2"])
+        self.aggregator._flush()
+
+        self.assertEqual(len(self.send.messages), 3)
+        self.assertIn("RESUMO: 2 notificação(ões) em 60s", self.send.messages[2])
+        self.assertIn("• Pedido #3\n• Pedido #4", self.send.messages[2])
+
+    def test_digest_is_sent_when_the_window_ends(self):
+        with mock.patch.object(self.aggregator, "_rate_exceeded", return_value=True):
+            self.handle(1)
+            self.clock.return_value = 1030.0
+            self.handle(2)
+
+        self.clock.return_value = 1059.0
+        self.aggregator._flush_if_due()
+        self.assertEqual(self.send.messages, [])
+
+        self.clock.return_value = 1060.0
+        self.aggregator._flush_if_due()
+        self.assertEqual(len(self.send.messages), 1)
+        self.assertIn("Pedido #1\n• Pedido #2", self.send.messages[0])
+
+    def test_failed_message_goes_to_the_next_digest(self):
+        self.send.failures = 1
+
+        with self.assertLogs("services.digest", "ERROR"):
+            self.handle(1, kind="payment_paid")
+        self.handle(2)
+
+        self.assertEqual(self.send.messages, [])
+        self.aggregator._flush()
+        self.assertIn("Pagamentos aprovados* (1):\n• Pedido #1", self.send.messages[0])
+        self.assertIn("Novos pedidos* (1):\n• Pedido #2", self.send.messages[0])
+
+    def test_failed_digest_is_logged_in_full(self):
+        with mock.patch.object(self.aggregator, "_rate_exceeded", return_value=True):
+            self.handle(1)
+        self.send.failures = 1
+
+        with self.assertLogs("services.digest", "ERROR") as logs:
+            self.aggregator._flush()
+
+        self.assertIn("Pedido #1", logs.output[0])
+        self.assertEqual(self.aggregator._pending, [])
+
+    def test_long_digest_is_split(self):
+        events = [
+            AdminEvent("new_order", "", f"Pedido #{number} - Rua A, {number}")
+            for number in range(1, 21)
+        ]
+
+        messages = build_digest_messages(events, 60, max_length=200)
+
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(all(len(message) <= 200 for message in messages))
+        self.assertIn("(continuação)", messages[1])
+        self.assertTrue(messages[1].split("\n\n")[1].startswith("🚨 *Novos pedidos*"))
+        text = "".join(messages)
+        self.assertEqual(
+            [number for number in range(1, 21) if f"Pedido #{number} -" in text],
+            list(range(1, 21)),
+        )
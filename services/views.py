@@ -1,19 +1,20 @@
 import json
 from logging import getLogger
 
-from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from checkout.payment_status import acache_payment_info, apublish_payment_status
+from core.ratelimit import rate_limit
+from dashboard.utils.realtime import ORDERS_GROUP, abuild_order_event_data
 from orders.models import Order
-from services.mercadopago import MercadoPagoService
-from services.notifications import send_payment_update_notification_with_callmebot
+from orders.transitions import atransition
 
 logger = getLogger(__name__)
 
 
-def update_order_status(
+async def aupdate_order_status(
     payment_id, status, status_detail, date_approved=None, external_reference=None
 ):
     """
@@ -29,20 +30,23 @@ def update_order_status(
     Returns:
         dict: Resultado da operação com sucesso/erro e mensagem
     """
+    # Integrações carregadas sob demanda (não entram na importação das URLs)
+    from services.notifications import asend_payment_update_notification_with_callmebot
+
     try:
         order = None
 
         # Primeiro, tentar encontrar o pedido pelo payment_id (PIX)
-        order = Order.objects.filter(payment_id=payment_id).first()
+        order = await Order.objects.filter(payment_id=payment_id).afirst()
 
         # Se não encontrou e tem external_reference, buscar pelo ID do pedido (Cartão)
         if not order and external_reference:
             try:
-                order = Order.objects.filter(id=int(external_reference)).first()
+                order = await Order.objects.filter(id=int(external_reference)).afirst()
                 # Para cartão online, atualizar o payment_id com o ID real do pagamento
                 if order and order.payment_method == "cartao_online":
                     order.payment_id = payment_id
-                    order.save()
+                    await Order.objects.filter(pk=order.pk).aupdate(payment_id=payment_id)
             except (ValueError, TypeError):
                 # external_reference não é um número válido
                 pass
@@ -55,13 +59,18 @@ def update_order_status(
 
         # Mapear status do MercadoPago para status do pedido
         if status == "approved" and status_detail == "accredited":
-            old_payment_status = order.payment_status
-            order.payment_status = "paid"
-            order.save()
+            # Pedido já pago ou alterado por outra requisição: nada a notificar
+            if not await atransition(order, "payment_approved", retries=2):
+                return {
+                    "success": True,
+                    "message": f"Pedido #{order.id} já estava atualizado",
+                    "order_id": order.id,
+                    "action": "no_action",
+                }
 
             # Enviar notificações WhatsApp para pagamentos aprovados
             try:
-                send_payment_update_notification_with_callmebot(order)
+                await asend_payment_update_notification_with_callmebot(order)
             except Exception as e:
                 print(f"Erro ao enviar notificação WhatsApp: {e}")
                 import traceback
@@ -71,19 +80,13 @@ def update_order_status(
             # Atualizar dashboard via WebSocket
             try:
                 channel_layer = get_channel_layer()
-                if (old_payment_status != "paid"):
-                    async_to_sync(channel_layer.group_send)(
-                        "orders_updates",
-                        {
-                            "type": "order_payment_paid",
-                            "data": {
-                                "order_id": order.id,
-                                "status": order.status,
-                                "payment_status": order.payment_status,
-                                "customer_name": getattr(order, "customer_name", None),
-                            },
-                        },
-                    )
+                await channel_layer.group_send(
+                    ORDERS_GROUP,
+                    {
+                        "type": "order_payment_paid",
+                        "data": await abuild_order_event_data(order.id),
+                    },
+                )
             except Exception as e:
                 logger.error(f"Erro ao enviar atualização via WebSocket: {e}")
 
@@ -97,29 +100,28 @@ def update_order_status(
         elif status == "cancelled" or (
             status == "cancelled" and status_detail == "expired"
         ):
-            order.payment_status = "cancelled"
-            order.status = "cancelled"
-            order.save()
+            if not await atransition(order, "payment_cancelled", retries=2):
+                return {
+                    "success": True,
+                    "message": f"Pedido #{order.id} já estava atualizado",
+                    "order_id": order.id,
+                    "action": "no_action",
+                }
 
             # Enviar notificações WhatsApp para pagamentos cancelados
             try:
-                send_payment_update_notification_with_callmebot(order)
+                await asend_payment_update_notification_with_callmebot(order)
             except Exception as e:
                 print(f"Erro ao enviar notificação WhatsApp: {e}")
             
             # Atualizar dashboard via WebSocket
             try:
                 channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    "orders_updates",
+                await channel_layer.group_send(
+                    ORDERS_GROUP,
                     {
                         "type": "order_payment_cancelled",
-                        "data": {
-                            "order_id": order.id,
-                            "status": order.status,
-                            "payment_status": order.payment_status,
-                            "customer_name": getattr(order, "customer_name", None),
-                        },
+                        "data": await abuild_order_event_data(order.id),
                     },
                 )
             except Exception as e:
@@ -133,9 +135,7 @@ def update_order_status(
             }
 
         elif status == "pending":
-            order.payment_status = "pending"
-            order.save()
-
+            # Não volta para pendente um pagamento já aprovado (webhooks fora de ordem)
             return {
                 "success": True,
                 "message": f"Pedido #{order.id} mantido como pendente",
@@ -156,7 +156,8 @@ def update_order_status(
 
 
 @csrf_exempt
-def webhook_mercadopago(request):
+@rate_limit("webhook", key="ip")
+async def webhook_mercadopago(request):
     """
     Webhook do MercadoPago para processar atualizações de pagamento.
     Suporta tanto o formato antigo (action/data) quanto o novo (resource/topic).
@@ -196,12 +197,17 @@ def webhook_mercadopago(request):
 
     try:
         # Buscar detalhes do pagamento no MercadoPago
+        from services.mercadopago import MercadoPagoService
+
         mercado_pago = MercadoPagoService()
-        payment_data = mercado_pago.get_payment_info(payment_id)
+        payment_data = await mercado_pago.aget_payment_info(payment_id)
 
         if not payment_data:
             return HttpResponse("Payment not found", status=404)
 
+        # Atualizar o status em cache lido pela página de aguardando pagamento
+        payment_entry = await acache_payment_info(payment_id, payment_data)
+
         # Extrair informações do pagamento
         status = payment_data.get("status")
         status_detail = payment_data.get("status_detail")
@@ -214,7 +220,7 @@ def webhook_mercadopago(request):
         )
 
         # Atualizar status do pedido
-        update_result = update_order_status(
+        update_result = await aupdate_order_status(
             payment_id=payment_id,
             status=status,
             status_detail=status_detail,
@@ -226,6 +232,16 @@ def webhook_mercadopago(request):
             print(f"Erro ao atualizar pedido: {update_result['message']}")
             return HttpResponse(update_result["message"], status=400)
 
+        # Enviar o novo status para o cliente na página de aguardando pagamento
+        order_id = update_result.get("order_id")
+        if order_id:
+            order_payment_status = await (
+                Order.objects.filter(id=order_id)
+                .values_list("payment_status", flat=True)
+                .afirst()
+            )
+            await apublish_payment_status(order_id, payment_entry, order_payment_status)
+
         print(f"Webhook processado com sucesso: {update_result['message']}")
         return HttpResponse("OK", status=200)
 
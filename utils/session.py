@@ -1,12 +1,75 @@
+"""
+Identidade do cliente (ClientSession) guardada na sessão do Django.
+
+A sessão fica no Redis (SESSION_ENGINE/SESSION_CACHE_ALIAS) e guarda o id da
+ClientSession; a linha no banco só é criada quando um carrinho ou pedido
+precisa da FK. Navegar sem carrinho não gera SQL de sessão, e last_activity
+(usado pela retenção) é atualizado no máximo uma vez a cada
+CLIENT_SESSION_TOUCH_INTERVAL.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
 from django.utils import timezone
 
 from core.models import ClientSession
 
+CLIENT_SESSION_KEY = "client_session_id"
+CLIENT_SESSION_TOUCHED_KEY = "client_session_touched_at"
+
+CLIENT_SESSION_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def _client_session_ref(client_session_id, session_key):
+    """Instância apenas com a chave primária, para usar como FK sem consultar o banco."""
+    client_session = ClientSession(pk=client_session_id, session_key=session_key)
+    client_session._state.adding = False
+    return client_session
+
+
+def _touch_due(touched_at) -> bool:
+    if touched_at is None:
+        return True
+    elapsed = timezone.now().timestamp() - touched_at
+    return elapsed >= CLIENT_SESSION_TOUCH_INTERVAL.total_seconds()
+
+
+def _new_client_session_defaults(request) -> dict:
+    return {
+        "user_agent": request.META.get("HTTP_USER_AGENT", "")[:255],
+        "ip_address": get_client_ip(request),
+    }
+
+
+def get_client_session(request):
+    """
+    ClientSession já persistida do visitante, lida apenas da sessão.
+    Não cria nada nem consulta o banco.
+
+    Returns:
+        ClientSession | None: Instância com o id (None se ainda não existe)
+    """
+    client_session_id = request.session.get(CLIENT_SESSION_KEY)
+    if client_session_id is None:
+        return None
+    return _client_session_ref(client_session_id, request.session.session_key)
+
+
+async def aget_client_session(request):
+    """Versão assíncrona de get_client_session."""
+    client_session_id = await request.session.aget(CLIENT_SESSION_KEY)
+    if client_session_id is None:
+        return None
+    return _client_session_ref(client_session_id, request.session.session_key)
+
 
 def get_or_create_client_session(request):
     """
-    Pega ou cria uma ClientSession baseada na sessão Django.
-    Atualiza last_activity automaticamente.
+    Pega ou cria a ClientSession do visitante, para gravar carrinho ou pedido.
+
+    Com a identidade já na sessão, não consulta o banco (exceto para atualizar
+    last_activity a cada CLIENT_SESSION_TOUCH_INTERVAL).
 
     Args:
         request: HttpRequest object
@@ -14,52 +77,90 @@ def get_or_create_client_session(request):
     Returns:
         ClientSession: Instância da sessão do cliente
     """
+    client_session = get_client_session(request)
+    now = timezone.now()
+
+    if client_session is not None:
+        if not _touch_due(request.session.get(CLIENT_SESSION_TOUCHED_KEY)):
+            return client_session
+        # Se a linha foi removida pela retenção, cria uma nova abaixo
+        if ClientSession.objects.filter(pk=client_session.pk).update(last_activity=now):
+            request.session[CLIENT_SESSION_TOUCHED_KEY] = now.timestamp()
+            return client_session
+
     # Garantir que a sessão Django existe
     if not request.session.session_key:
         request.session.create()
 
-    session_key = request.session.session_key
+    client_session, created = ClientSession.objects.get_or_create(
+        session_key=request.session.session_key,
+        defaults=_new_client_session_defaults(request),
+    )
+    if not created:
+        ClientSession.objects.filter(pk=client_session.pk).update(last_activity=now)
+
+    # Guardar a identidade na sessão: as próximas requisições não consultam o banco
+    request.session[CLIENT_SESSION_KEY] = client_session.id
+    request.session[CLIENT_SESSION_TOUCHED_KEY] = now.timestamp()
+
+    return client_session
+
+
+async def aget_or_create_client_session(request):
+    """
+    Versão assíncrona de get_or_create_client_session, para views async.
 
-    # Tentar pegar da sessão Django primeiro (mais rápido)
-    client_session_id = request.session.get("client_session_id")
+    Args:
+        request: HttpRequest object
 
-    if client_session_id:
-        try:
-            client_session = ClientSession.objects.get(id=client_session_id)
-            # Atualizar last_activity
-            client_session.last_activity = timezone.now()
-            client_session.save(update_fields=["last_activity"])
+    Returns:
+        ClientSession: Instância da sessão do cliente
+    """
+    client_session = await aget_client_session(request)
+    now = timezone.now()
+
+    if client_session is not None:
+        if not _touch_due(await request.session.aget(CLIENT_SESSION_TOUCHED_KEY)):
+            return client_session
+        # Se a linha foi removida pela retenção, cria uma nova abaixo
+        if await ClientSession.objects.filter(pk=client_session.pk).aupdate(
+            last_activity=now
+        ):
+            await request.session.aset(CLIENT_SESSION_TOUCHED_KEY, now.timestamp())
             return client_session
-        except ClientSession.DoesNotExist:
-            pass
 
-    # Se não achou, buscar ou criar pelo session_key
-    client_session, created = ClientSession.objects.get_or_create(
-        session_key=session_key,
-        defaults={
-            "user_agent": request.META.get("HTTP_USER_AGENT", "")[:255],
-            "ip_address": get_client_ip(request),
-        },
-    )
+    # Garantir que a sessão Django existe
+    if not request.session.session_key:
+        await request.session.acreate()
 
+    client_session, created = await ClientSession.objects.aget_or_create(
+        session_key=request.session.session_key,
+        defaults=_new_client_session_defaults(request),
+    )
     if not created:
-        # Atualizar last_activity se já existia
-        client_session.last_activity = timezone.now()
-        client_session.save(update_fields=["last_activity"])
+        await ClientSession.objects.filter(pk=client_session.pk).aupdate(
+            last_activity=now
+        )
 
-    # Guardar ID na sessão Django para acesso rápido
-    request.session["client_session_id"] = client_session.id
+    # Guardar a identidade na sessão: as próximas requisições não consultam o banco
+    await request.session.aset(CLIENT_SESSION_KEY, client_session.id)
+    await request.session.aset(CLIENT_SESSION_TOUCHED_KEY, now.timestamp())
 
     return client_session
 
 
 def get_client_ip(request):
     """
-    Pega o IP real do cliente, considerando proxies
+    Pega o IP real do cliente, considerando apenas os proxies confiáveis
+
+    Cada proxy acrescenta o endereço de quem o chamou ao fim do X-Forwarded-For;
+    as entradas à esquerda vêm do próprio cliente e podem ser forjadas. Com
+    TRUSTED_PROXY_COUNT = N, o IP é a N-ésima entrada a partir da direita.
     """
+    proxy_count = settings.TRUSTED_PROXY_COUNT
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(",")[0].strip()
-    else:
-        ip = request.META.get("REMOTE_ADDR")
-    return ip
+    if proxy_count and x_forwarded_for:
+        forwarded = [ip.strip() for ip in x_forwarded_for.split(",")]
+        if len(forwarded) >= proxy_count:
+            return forwarded[-proxy_count]
+    return request.META.get("REMOTE_ADDR")